@@ -32,6 +32,13 @@ with open('CHANGELOG.rst') as history_file:
 with open('requirements.txt') as f:
     requirements = f.read().splitlines()
 
+# optional packages of the binary and columnar export formats
+extras_requirements = {
+    'msgpack': ['msgpack>=1.0.0'],
+    'cbor': ['cbor2>=5.2.0'],
+    'parquet': ['pyarrow>=3.0.0']
+}
+
 setup_requirements = ['pytest-runner', ]
 
 test_requirements = ['pytest>=3', ]
@@ -59,6 +66,7 @@ setup(
         ],
     },
     install_requires=requirements,
+    extras_require=extras_requirements,
     license="Apache2.0",
     long_description=readme + '\n\n' + history,
     include_package_data=True,
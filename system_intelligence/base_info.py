@@ -1,11 +1,88 @@
-from rich.box import HEAVY_HEAD
-from rich.style import Style
-from rich.table import Table
-from rich.console import Console
 from sys import platform
 import typing as t
 import csv
+import functools
 import os.path
+import re
+
+# unit prefixes by base of the unit conversion
+_POWER_LABELS = {
+    1000: ('', 'K', 'M', 'G', 'T'),
+    1024: ('', 'Ki', 'Mi', 'Gi', 'Ti')
+}
+
+
+class PlatformProfile(t.NamedTuple):
+    """
+    Operating system, Linux distribution (the NAME of /etc/os-release, lowercase) and the base of storage unit conversion.
+    """
+    os: str
+    distro: str
+    storage_base: int
+
+    def unit_base(self, device: str = '') -> int:
+        """
+        Get the base of unit conversion for a device ('' for storage like file and disk sizes).
+        """
+        # MacOS uses base10 conversion for all devices, Ubuntu only for storage
+        if self.os == 'darwin':
+            return 1000
+        return 1024 if device else self.storage_base
+
+
+@functools.lru_cache(maxsize=None)
+def platform_profile(os_name: str = platform, os_release: str = '/etc/os-release') -> PlatformProfile:
+    """
+    Determine the platform profile once per process, so that /etc/os-release is read only once.
+    """
+    distro = ''
+    # this file stores some OS release details in most linux distros
+    if os_name == 'linux' and os.path.isfile(os_release):
+        with open(os_release) as f:
+            reader = csv.reader(f, delimiter="=")
+            os_data = {row[0]: row[1] for row in reader if len(row) > 1}
+        distro = os_data.get('NAME', '').lower()
+    # MacOS and Linux Ubuntu use base10 conversion, most other Linux distros and Windows base2
+    storage_base = 1000 if os_name == 'darwin' or distro == 'ubuntu' else 1024
+
+    return PlatformProfile(os_name, distro, storage_base)
+
+
+# a pre-formatted size like 48 KiB (1 instance), 1.5 MiB (32 instances) or 8 GB
+_SIZE = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([KMGT]?)i?B?\s*(?:\(.*\))?\s*$', re.IGNORECASE)
+
+
+def parse_bytes(size: t.Union[str, int, None]) -> t.Optional[int]:
+    """
+    Convert a size, which may be pre-formatted like 48 KiB (1 instance) as reported by py-cpuinfo 7 or 8 GB by MacOS, to bytes.
+    Prefixes count in powers of 1024 like for memory and caches. Sizes which can not be parsed are None.
+    """
+    if size is None or isinstance(size, int):
+        return size
+    match = _SIZE.match(size)
+    if match is None:
+        return None
+    number, prefix = match.groups()
+
+    return int(float(number) * 1024 ** ' KMGT'.index(prefix.upper() or ' '))
+
+
+def _format_size(size: t.Union[str, int, float], power: int, power_labels: t.Sequence[str]) -> str:
+    # No result
+    if not size or size == 'NA':
+        return ''
+    if isinstance(size, str):
+        # on some systems and linux distros, some of the values may be pre-formatted (like 128 KiB)
+        # therefore, they don't need to be casted and formatted
+        try:
+            size = int(size)
+        except ValueError:
+            return size
+    n = 0
+    while size >= power and n < len(power_labels) - 1:
+        size /= power
+        n += 1
+    return f"{('%.2f' % size).rstrip('0').rstrip('.')} {power_labels[n]}B"
 
 
 class BaseInfo:
@@ -30,6 +107,11 @@ class BaseInfo:
         """
         Creates a custom rich styled table, which all outputs share.
         """
+        # rich tables are only imported when results are printed
+        from rich.box import HEAVY_HEAD
+        from rich.style import Style
+        from rich.table import Table
+
         self.table_title = title
         self.table = Table(title=f'[bold]{self.table_title}', title_style='red', header_style=Style(color="red", bold=True), box=HEAVY_HEAD)
 
@@ -45,6 +127,8 @@ class BaseInfo:
         """
         Print the result table to stdout
         """
+        from rich.console import Console
+
         self.console = Console()
         self.console.print(self.table)
 
@@ -58,28 +142,17 @@ class BaseInfo:
             123456 = 1MB
         """
         power = self.determine_base_conversion_factor(device)
-        n = 0
-        # if OS uses base10 conversion, use base10 units
-        if power == 1000:
-            power_labels = {0: '', 1: 'K', 2: 'M', 3: 'G', 4: 'T'}
-        # if OS uses base2 conversion, use SI units
-        else:
-            power_labels = {0: '', 1: 'Ki', 2: 'Mi', 3: 'Gi', 4: 'Ti'}
-        # No result
-        if not size or size == 'NA':
-            return ''
 
-        if isinstance(size, str):
-            # on some systems and linux distros, some of the values may be pre-formatted (like 128 KiB)
-            # therefore, they don't need to be casted and formatted
-            try:
-                size = int(size)
-            except ValueError:
-                return size
-        while size >= power and n < len(power_labels) - 1:
-            size /= power
-            n += 1
-        return f"{('%.2f' % size).rstrip('0').rstrip('.')} {power_labels[n]}B"
+        return _format_size(size, power, _POWER_LABELS[power])
+
+    def format_bytes_bulk(self, sizes: t.Iterable[t.Union[str, int]], device: str = '') -> t.List[str]:
+        """
+        Format many byte values at once like format_bytes, determining the unit conversion only once.
+        """
+        power = self.determine_base_conversion_factor(device)
+        power_labels = _POWER_LABELS[power]
+
+        return [_format_size(size, power, power_labels) for size in sizes]
 
     @staticmethod
     def hz_to_hreadable_string(hz: int) -> str:
@@ -116,20 +189,4 @@ class BaseInfo:
 
         So to convert bytes to other units (like KB or KiB), base10 will use a factor of 1000 where base2 will use a factor of 1024!
         """
-        if self.OS == 'linux' and not device:
-            # this file stores some OS release details in most linux distros
-            if os.path.isfile('/etc/os-release'):
-                os_data = {}
-                with open('/etc/os-release') as f:
-                    reader = csv.reader(f, delimiter="=")
-                    for row in reader:
-                        if row:
-                            os_data[row[0]] = row[1]
-                # Linux Ubuntu uses base10 conversion
-                if os_data['NAME'].lower() == "ubuntu":
-                    return 1000
-        # MacOS uses base10 conversion as well
-        elif self.OS == 'darwin':
-            return 1000
-        # if the user os isn't either Linux Ubuntu nor MacOS use base2 conversion
-        return 1024
+        return platform_profile(self.OS).unit_base(device)
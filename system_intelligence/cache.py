@@ -0,0 +1,189 @@
+"""Persistent on-disk cache of query results."""
+
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import typing as t
+
+from .records import SCHEMA_VERSION, from_builtin, to_builtin
+
+_LOG = logging.getLogger(__name__)
+
+# seconds a query result of a scope stays valid; results of scopes with a TTL of 0 are never cached
+SCOPE_TTLS = {
+    'host': 24 * 3600,
+    'os': 24 * 3600,
+    'cpu': 24 * 3600,
+    'topology': 24 * 3600,
+    'gpus': 24 * 3600,
+    'ram': 24 * 3600,
+    'software': 3600,
+    'hdd': 0,
+    'diskio': 0,
+    'swap': 0,
+    'network': 0
+}
+
+# results of these scopes are invalidated on every reboot
+BOOT_SCOPES = {'os', 'cpu', 'topology', 'gpus', 'ram'}
+
+
+def default_cache_directory() -> pathlib.Path:
+    """
+    Get the directory to store cached results in.
+    Can be overwritten with the environment variable SYSTEM_INTELLIGENCE_CACHE_DIR.
+    """
+    if 'SYSTEM_INTELLIGENCE_CACHE_DIR' in os.environ:
+        return pathlib.Path(os.environ['SYSTEM_INTELLIGENCE_CACHE_DIR'])
+    if sys.platform == 'win32' and 'LOCALAPPDATA' in os.environ:
+        return pathlib.Path(os.environ['LOCALAPPDATA'], 'system-intelligence', 'cache')
+    return pathlib.Path(os.environ.get('XDG_CACHE_HOME', pathlib.Path.home() / '.cache'), 'system-intelligence')
+
+
+def boot_id() -> str:
+    """
+    Get an identifier which changes on every reboot of the system.
+    """
+    try:
+        with open('/proc/sys/kernel/random/boot_id') as boot_id_file:
+            return boot_id_file.read().strip()
+    except OSError:
+        import psutil
+        return str(psutil.boot_time())
+
+
+def _software_fingerprint(python_env: t.Optional[str] = None, **_) -> t.List[t.Any]:
+    """
+    Fingerprint the installed software by the PATH and the modification times of all queried programs and package directories.
+    """
+    from .software_info import SoftwareInfo, _find_site_packages
+
+    fingerprint: t.List[t.Any] = [os.environ.get('PATH', '')]
+    for program in SoftwareInfo().VERSION_QUERY_FLAGS:
+        path = shutil.which(program)
+        fingerprint.append([program, path, _mtime(path)])
+    if python_env is None:
+        package_directories = [directory for directory in sys.path if os.path.basename(directory) in {'site-packages', 'dist-packages'}]
+    else:
+        package_directories = _find_site_packages(python_env)
+    fingerprint.extend([str(directory), _mtime(directory)] for directory in package_directories)
+
+    return fingerprint
+
+
+def _mtime(path: t.Optional[t.Union[str, os.PathLike]]) -> t.Optional[float]:
+    if not path:
+        return None
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+def _refresh_cpu(cpu: t.Any) -> t.Any:
+    """
+    Replace the clock of a cached CPU by the current one, which changes with frequency scaling.
+    """
+    from .cpu_info import CpuInfo
+
+    clock = CpuInfo().query_cpu_clock()[0]
+
+    return cpu._replace(clock=int(clock * 10 ** 6) if clock is not None else None)
+
+
+# functions computing a fingerprint of everything a scope's result depends on; results are invalidated if it changes
+FINGERPRINTS: t.Dict[str, t.Callable[..., t.Any]] = {
+    'software': _software_fingerprint
+}
+
+# functions updating the dynamic fields of a cached result, which change too often to be cached
+REFRESHERS: t.Dict[str, t.Callable[[t.Any], t.Any]] = {
+    'cpu': _refresh_cpu
+}
+
+
+class ResultCache:
+    """
+    Cache query results per scope and host on disk.
+    Results expire after the TTL of their scope, on reboot (for hardware scopes) or if their scope's fingerprint changes.
+    """
+
+    def __init__(self, directory: t.Optional[t.Union[str, os.PathLike]] = None, ttls: t.Optional[t.Mapping[str, float]] = None):
+        self.directory = pathlib.Path(directory) if directory else default_cache_directory()
+        self.ttls = {**SCOPE_TTLS, **(ttls or {})}
+
+    def get(self, scope: str, **kwargs) -> t.Any:
+        """
+        Get the cached result of a scope queried with the given keyword arguments. Dynamic fields are queried again, see REFRESHERS.
+
+        :raise KeyError: if no valid result is cached
+        """
+        if not self.ttls.get(scope):
+            raise KeyError(scope)
+        try:
+            with open(self._path(scope, **kwargs), encoding='utf-8') as cache_file:
+                entry = json.load(cache_file)
+        except (OSError, ValueError) as err:
+            raise KeyError(scope) from err
+        # results cached by versions with other records can not be converted back
+        if entry.get('schema') != SCHEMA_VERSION or time.time() - entry['created'] > self.ttls[scope]:
+            raise KeyError(scope)
+        if scope in FINGERPRINTS and entry['fingerprint'] != self._fingerprint(scope, **kwargs):
+            _LOG.debug(f'cached result of {scope} is outdated')
+            raise KeyError(scope)
+
+        try:
+            info = from_builtin(scope, entry['info'])
+        except TypeError as err:
+            raise KeyError(scope) from err
+
+        return REFRESHERS[scope](info) if scope in REFRESHERS else info
+
+    def set(self, scope: str, info: t.Any, **kwargs) -> None:
+        """
+        Cache the result of a scope queried with the given keyword arguments. Results of scopes without a TTL are ignored.
+        """
+        if not self.ttls.get(scope):
+            return
+        entry = {'scope': scope,
+                 'schema': SCHEMA_VERSION,
+                 'created': time.time(),
+                 'fingerprint': self._fingerprint(scope, **kwargs) if scope in FINGERPRINTS else None,
+                 'info': to_builtin(info)}
+        path = self._path(scope, **kwargs)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # write to a temporary file first, so that concurrent readers never see partial results
+            with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=str(path.parent), delete=False) as cache_file:
+                json.dump(entry, cache_file, ensure_ascii=False)
+            os.replace(cache_file.name, str(path))
+        except (OSError, TypeError, ValueError) as err:
+            _LOG.warning(f'Unable to cache result of {scope}: {err}')
+
+    def clear(self) -> None:
+        """
+        Remove all cached results.
+        """
+        for path in self.directory.glob('*.json'):
+            path.unlink()
+
+    def _path(self, scope: str, **kwargs) -> pathlib.Path:
+        """
+        Get the path of a scope's cache file. Results are stored per host (and boot for hardware scopes) and query arguments.
+        """
+        key = [scope, platform.node(), boot_id() if scope in BOOT_SCOPES else None, sorted((k, str(v)) for k, v in kwargs.items())]
+        digest = hashlib.sha1(json.dumps(key).encode()).hexdigest()
+
+        return self.directory / f'{scope}-{digest}.json'
+
+    @staticmethod
+    def _fingerprint(scope: str, **kwargs) -> t.Any:
+        # round trip through JSON to compare with the stored fingerprint
+        return json.loads(json.dumps(FINGERPRINTS[scope](**kwargs)))
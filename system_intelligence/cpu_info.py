@@ -1,34 +1,21 @@
 import logging
 import subprocess
 import typing as t
-from rich import print
 
-from .base_info import BaseInfo
+from . import sysfs_backend, timing
+from .base_info import BaseInfo, parse_bytes
+from .records import CpuRecord
+from .util.import_util import import_optional
 
 _LOG = logging.getLogger(__name__)
 
 
-try:
-    import cpuinfo
-except ImportError:
-    cpuinfo = None
-    print('[bold yellow]Unable to import package cpuinfo. CPU information may be limited.')
-except Exception:  # noqa E722
-    # raise Exception("py-cpuinfo currently only works on X86 and some ARM CPUs.")
-    cpuinfo = None  # pylint: disable = invalid-name
-    print('[bold red]Package cpuinfo does not support this system!')
+def _cpuinfo():
+    return import_optional('cpuinfo', 'Unable to import package cpuinfo. CPU information may be limited.')
 
-try:
-    import pint
-except ImportError:
-    pint = None
-    print('[bold yellow]Unable to import package pint. CPU information may be limited.')
 
-try:
-    import psutil
-except ImportError:
-    psutil = None
-    print('[bold yellow]Unable to import package psutil. CPU and Network information may be limited.')
+def _psutil():
+    return import_optional('psutil', 'Unable to import package psutil. CPU and Network information may be limited.')
 
 
 class CpuInfo(BaseInfo):
@@ -38,34 +25,39 @@ class CpuInfo(BaseInfo):
 
     def __init__(self):
         super().__init__()
-        self.CPU = cpuinfo is not None and pint is not None
-        self.CPU_CLOCK = psutil is not None
-        self.CPU_CORES = psutil is not None
+        self.CPU_CLOCK = _psutil() is not None
+        self.CPU_CORES = _psutil() is not None
 
-    def query_cpu(self, **_) -> t.Mapping[str, t.Any]:
+    def query_cpu(self, backend: str = 'default', **_) -> CpuRecord:
         """
         Get information about CPU present in the system.
+
+        With the sysfs backend (only on Linux) /proc/cpuinfo and /sys/devices/system/cpu are read directly instead of using cpuinfo,
+        which is then not even imported.
         """
-        if not self.CPU:
-            return {}
-        cpu = cpuinfo.get_cpu_info()
-        clock_current, clock_min, clock_max = self.query_cpu_clock()
+        if backend == 'sysfs' and self.OS == 'linux':
+            cpu = sysfs_backend.get_cpu_info()
+        else:
+            cpuinfo = _cpuinfo()
+            if cpuinfo is None:
+                return CpuRecord()
+            cpu = cpuinfo.get_cpu_info()
+        clock_current, clock_min, clock_max = (int(clock * 10 ** 6) if clock is not None else None for clock in self.query_cpu_clock())
         logical_cores, physical_cores = self.query_cpu_cores()
-        cache = dict(self._get_cache_sizes(cpu))
-        for level, hz in cache.items():
-            cache[level] = hz
-
-        return {
-            'vendor_id_raw': cpu.get('vendor_id_raw'),
-            'hardware_raw': cpu.get('hardware_raw') if self.OS == 'linux' else 'NA',
-            'brand_raw': cpu.get('brand_raw'),
-            'arch': cpu.get('arch'),
-            'logical_cores': str(logical_cores),
-            'physical_cores': str(physical_cores),
-            'clock': f'{str(clock_current)} MHz',
-            'clock_min': f'{str(clock_min)} MHz',
-            'clock_max': f'{str(clock_max)} MHz',
-            'cache': '\n'.join(f'L{cache_level}: {size}' for cache_level, size in cache.items())}
+        l1_cache, l2_cache, l3_cache = self._get_cache_sizes(cpu).values()
+
+        return CpuRecord(vendor_id_raw=cpu.get('vendor_id_raw'),
+                         hardware_raw=cpu.get('hardware_raw') if self.OS == 'linux' else None,
+                         brand_raw=cpu.get('brand_raw'),
+                         arch=cpu.get('arch'),
+                         logical_cores=logical_cores,
+                         physical_cores=physical_cores,
+                         clock=clock_current,
+                         clock_min=clock_min,
+                         clock_max=clock_max,
+                         l1_cache=l1_cache,
+                         l2_cache=l2_cache,
+                         l3_cache=l3_cache)
 
     def query_cpu_clock(self) -> t.Tuple[t.Optional[int], t.Optional[int], t.Optional[int]]:
         """
@@ -74,7 +66,7 @@ class CpuInfo(BaseInfo):
         if not self.CPU_CLOCK:
             return None, None, None
         try:
-            cpu_clock = psutil.cpu_freq()
+            cpu_clock = _psutil().cpu_freq()
         except FileNotFoundError:
             return None, None, None
         if cpu_clock is None:
@@ -87,41 +79,54 @@ class CpuInfo(BaseInfo):
         """
         if not self.CPU_CORES:
             return None, None
-        return psutil.cpu_count(), psutil.cpu_count(logical=False)
+        return _psutil().cpu_count(), _psutil().cpu_count(logical=False)
 
     def _get_cache_size(self, level: int, cpuinfo_data: dict) -> t.Optional[str]:
         """
-        Get CPU cache size in bytes at a given level.
+        Get CPU cache size at a given level as human readable string.
+        """
+        return self.format_bytes(self._get_cache_bytes(level, cpuinfo_data), device='cpu_cache')
+
+    def _get_cache_bytes(self, level: int, cpuinfo_data: dict) -> t.Optional[int]:
+        """
+        Get CPU cache size in bytes at a given level. Pre-formatted strings, like 48 KiB (1 instance) of py-cpuinfo 7, are parsed.
         """
         # L2 cache on MacOS is already included in cpuinfo data (required for L1 and L3)
         # L1i and L1d cache are summed up into one value for L1 cache
         cache_size = 0
         if self.OS == 'darwin' and level != 2:
             cmd = (['sysctl', 'hw'])
-            result = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            hw_cache_level = subprocess.check_output(('grep', f'l{level}'), stdin=result.stdout).decode('utf-8')
+            with timing.span('subprocess', 'sysctl', command=' '.join(cmd)) as sysctl_span:
+                result = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+                hw_cache_level = subprocess.check_output(('grep', f'l{level}'), stdin=result.stdout).decode('utf-8')
+                sysctl_span.attributes['returncode'] = result.wait()
             # for each cache level part (basically only relevant for L1) get the total cache size
             for cache_level_part in hw_cache_level.split('\n')[:-1]:
                 split_cache_parts = cache_level_part.split(':')
                 cache_size += int(split_cache_parts[1])
         else:
             cache_size = cpuinfo_data.get(f'l{level}_data_cache_size', cpuinfo_data.get(f'l{level}_cache_size', None))
-        # return cache size in nicely formatted bytes unit
-        return self.format_bytes(cache_size, device='cpu_cache')
+        return parse_bytes(cache_size)
 
     def _get_cache_sizes(self, cpuinfo_data: dict) -> t.Mapping[int, t.Optional[int]]:
         """
-        For each Cache Level (L1, L2 and L3) get the actual cache size
+        For each Cache Level (L1, L2 and L3) get the actual cache size in bytes
         """
-        return {lvl: CpuInfo._get_cache_size(self, lvl, cpuinfo_data) for lvl in range(1, 4)}
+        return {lvl: CpuInfo._get_cache_bytes(self, lvl, cpuinfo_data) for lvl in range(1, 4)}
 
-    def print_cpu_info(self, cpu_info: dict) -> None:
+    def print_cpu_info(self, cpu_info: CpuRecord) -> None:
         """
         Print all Infos available for CPUs for the users operating system
         """
-        # Prettify cache
-        cpu_info['cache'] = cpu_info['cache'].replace('{', '').replace('}', '')
+        caches = self.format_bytes_bulk((cpu_info.l1_cache, cpu_info.l2_cache, cpu_info.l3_cache), device='cpu_cache')
         column_names = ['Vendor ID', 'Hardware', 'Brand', 'Architecture', 'Logical Cores', 'Physical Cores', 'Clock', 'Minimal Clock', 'Maximal Clock', 'Cache']
         self.init_table(title='Central Processing Unit', column_names=column_names)
-        self.table.add_row(*cpu_info.values())
+        self.table.add_row(cpu_info.vendor_id_raw or '',
+                           cpu_info.hardware_raw if cpu_info.hardware_raw is not None else 'NA',
+                           cpu_info.brand_raw or '',
+                           cpu_info.arch or '',
+                           str(cpu_info.logical_cores),
+                           str(cpu_info.physical_cores),
+                           *(self.hz_to_hreadable_string(clock) for clock in (cpu_info.clock, cpu_info.clock_min, cpu_info.clock_max)),
+                           '\n'.join(f'L{level}: {size}' for level, size in enumerate(caches, start=1)))
         self.print_table()
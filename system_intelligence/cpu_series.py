@@ -0,0 +1,148 @@
+"""Per core CPU frequency and utilisation time series."""
+
+import glob
+import os
+import re
+import time
+import typing as t
+import warnings
+
+import psutil
+
+from .util.import_util import import_optional
+
+
+def _numpy():
+    return import_optional('numpy', 'Unable to import package numpy. Per core CPU time series are not available.')
+
+
+def _cpu_index(path: str) -> int:
+    return int(re.search(r'cpu(\d+)', path).group(1))
+
+
+class CpuSeries:
+    """
+    Sample frequency and utilisation of every core into preallocated NumPy arrays holding the last window samples.
+
+    Frequencies are read from /sys/devices/system/cpu/cpu*/cpufreq (falling back to psutil), utilisations from psutil.
+    Summaries over the window are computed with vectorised operations across all cores at once.
+    """
+
+    def __init__(self, window: int = 60, sysfs_root: str = '/sys/devices/system/cpu'):
+        np = _numpy()
+        if np is None:
+            raise ImportError('Per core CPU time series require numpy')
+        self.np = np
+        self.window = window
+        self.cores = psutil.cpu_count()
+        self.times = np.full(window, np.nan)
+        self.frequencies = np.full((window, self.cores), np.nan, dtype=np.float32)
+        self.utilisation = np.full((window, self.cores), np.nan, dtype=np.float32)
+        self.size = 0
+        self._next = 0
+        # keep the frequency files open and re-read them, so that a sample costs one pread per core
+        paths = sorted(glob.glob(os.path.join(sysfs_root, 'cpu[0-9]*', 'cpufreq', 'scaling_cur_freq')), key=_cpu_index)
+        self._frequency_files = [os.open(path, os.O_RDONLY) for path in paths] if len(paths) == self.cores else []
+        self.reference_frequencies = self._read_reference_frequencies(sysfs_root)
+        # the first utilisation of psutil is meaningless, it is measured since the previous call
+        psutil.cpu_percent(percpu=True)
+
+    def _read_reference_frequencies(self, sysfs_root: str) -> t.Any:
+        """
+        Get the nominal frequency of every core in MHz, which is the base frequency if known or else the maximal frequency.
+        """
+        np = self.np
+        reference = np.full(self.cores, np.nan, dtype=np.float32)
+        for core in range(self.cores):
+            for name in ('base_frequency', 'cpuinfo_max_freq'):
+                try:
+                    with open(os.path.join(sysfs_root, f'cpu{core}', 'cpufreq', name)) as frequency_file:
+                        reference[core] = int(frequency_file.read()) / 1000
+                    break
+                except (OSError, ValueError):
+                    continue
+        if np.isnan(reference).all():
+            try:
+                reference[:] = [frequency.max or np.nan for frequency in psutil.cpu_freq(percpu=True)][:self.cores]
+            except (FileNotFoundError, ValueError):
+                pass
+
+        return reference
+
+    def read_frequencies(self) -> t.Any:
+        """
+        Get the current frequency of every core in MHz.
+        """
+        np = self.np
+        if self._frequency_files:
+            return np.fromiter((int(os.pread(fd, 32, 0)) for fd in self._frequency_files), dtype=np.float32, count=self.cores) / 1000
+        try:
+            frequencies = psutil.cpu_freq(percpu=True)
+        except FileNotFoundError:
+            frequencies = []
+        # some systems only report one frequency for all cores
+        if len(frequencies) != self.cores:
+            return np.full(self.cores, frequencies[0].current if frequencies else np.nan, dtype=np.float32)
+        return np.fromiter((frequency.current for frequency in frequencies), dtype=np.float32, count=self.cores)
+
+    def sample(self) -> None:
+        """
+        Sample the frequency and utilisation of all cores once.
+        """
+        self.record(time.time(), self.read_frequencies(), psutil.cpu_percent(percpu=True))
+
+    def record(self, timestamp: float, frequencies: t.Sequence[float], utilisation: t.Sequence[float]) -> None:
+        """
+        Store one sample, overwriting the oldest one if the window is full.
+        """
+        self.times[self._next] = timestamp
+        self.frequencies[self._next] = frequencies
+        self.utilisation[self._next] = utilisation
+        self._next = (self._next + 1) % self.window
+        self.size = min(self.size + 1, self.window)
+
+    def latest(self) -> t.Tuple[t.Any, t.Any]:
+        """
+        Get the frequencies and utilisations of the latest sample.
+        """
+        latest = (self._next - 1) % self.window
+
+        return self.frequencies[latest], self.utilisation[latest]
+
+    def summary(self, busy: float = 90., throttle_ratio: float = 0.9) -> t.Dict[str, t.Any]:
+        """
+        Summarize the samples in the window per core.
+
+        A core counts as throttled in a sample if it is busy (utilisation of at least busy percent)
+        while running below throttle_ratio times its nominal frequency.
+
+        :return: arrays with one value per core of p50, p95 and maximal frequency and utilisation and the fraction of throttled samples
+        """
+        np = self.np
+        if not self.size:
+            return {}
+        frequencies = self.frequencies[:self.size]
+        utilisation = self.utilisation[:self.size]
+        with warnings.catch_warnings():
+            # cores without known frequencies are all NaN
+            warnings.simplefilter('ignore', RuntimeWarning)
+            frequency_p50, frequency_p95 = np.nanpercentile(frequencies, [50, 95], axis=0)
+            utilisation_p50, utilisation_p95 = np.nanpercentile(utilisation, [50, 95], axis=0)
+            summary = {'frequency_p50': frequency_p50,
+                       'frequency_p95': frequency_p95,
+                       'frequency_max': np.nanmax(frequencies, axis=0),
+                       'utilisation_p50': utilisation_p50,
+                       'utilisation_p95': utilisation_p95,
+                       'utilisation_max': np.nanmax(utilisation, axis=0)}
+        throttled = (utilisation >= busy) & (frequencies < throttle_ratio * self.reference_frequencies)
+        summary['throttled'] = throttled.mean(axis=0)
+
+        return summary
+
+    def close(self) -> None:
+        """
+        Close all frequency files.
+        """
+        for fd in self._frequency_files:
+            os.close(fd)
+        self._frequency_files = []
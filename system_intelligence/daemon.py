@@ -0,0 +1,219 @@
+"""Serve query results from a long-running process over a Unix socket or localhost HTTP."""
+
+import http.client
+import http.server
+import json
+import logging
+import os
+import pathlib
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+import typing as t
+import urllib.parse
+
+from .cache import REFRESHERS, SCOPE_TTLS
+from .query import SAMPLED_SCOPES, SCOPES, create_querier
+from .records import to_builtin
+
+_LOG = logging.getLogger(__name__)
+
+
+def default_socket_path() -> pathlib.Path:
+    """
+    Get the default path of the daemon's Unix socket.
+    """
+    if 'XDG_RUNTIME_DIR' in os.environ:
+        return pathlib.Path(os.environ['XDG_RUNTIME_DIR'], 'system-intelligence.sock')
+    return pathlib.Path(tempfile.gettempdir(), f'system-intelligence-{os.getuid()}.sock')
+
+
+class QueryService:
+    """
+    Keep one querier instance per scope alive and answer queries, reusing results within the TTL of their scope.
+    """
+
+    def __init__(self, ttls: t.Optional[t.Mapping[str, float]] = None, **query_kwargs):
+        self.ttls = {**SCOPE_TTLS, **(ttls or {})}
+        self.query_kwargs = query_kwargs
+        self._queriers: t.Dict[str, t.Any] = {}
+        self._results: t.Dict[str, t.Tuple[float, t.Any]] = {}
+        self._locks = {scope: threading.Lock() for scope in SCOPES}
+
+    def query(self, scopes: t.Optional[t.Iterable[str]] = None, refresh: bool = False) -> t.Dict[str, t.Any]:
+        """
+        Get the results of the given scopes (or all scopes except the sampled ones), in the order of SCOPES.
+        """
+        scopes = set(scopes) if scopes else set(SCOPES).difference(SAMPLED_SCOPES)
+        unknown = scopes.difference(SCOPES)
+        if unknown:
+            raise ValueError(f'Unknown scopes: {", ".join(sorted(unknown))}')
+
+        return {scope: self.query_scope(scope, refresh=refresh) for scope in SCOPES if scope in scopes}
+
+    def query_scope(self, scope: str, refresh: bool = False) -> t.Any:
+        """
+        Get the result of a scope. Results younger than the TTL of the scope are reused, unless refresh is set.
+        Dynamic fields of reused results are queried again, see cache.REFRESHERS.
+        """
+        with self._locks[scope]:
+            if not refresh and scope in self._results:
+                created, info = self._results[scope]
+                if time.monotonic() - created < self.ttls.get(scope, 0):
+                    return REFRESHERS[scope](info) if scope in REFRESHERS else info
+            if scope not in self._queriers:
+                self._queriers[scope] = create_querier(scope, monitor=True)
+            info = getattr(self._queriers[scope], f'query_{scope}')(**self.query_kwargs)
+            self._results[scope] = (time.monotonic(), info)
+
+            return info
+
+    def warm_up(self) -> None:
+        """
+        Query all scopes once, so that first requests are answered from memory.
+        """
+        for scope in SCOPES:
+            if scope in SAMPLED_SCOPES:
+                continue
+            try:
+                self.query_scope(scope)
+            except Exception:
+                _LOG.exception(f'Unable to query scope {scope}')
+
+
+class QueryRequestHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Answer GET requests of the daemon's API:
+
+    /query?scope=<scope>&scope=<scope>&refresh=1 results of the given scopes (or all scopes) as JSON
+    /scopes all available scopes
+    /health liveness check
+    """
+    server_version = 'system-intelligence'
+
+    def do_GET(self) -> None:
+        url = urllib.parse.urlsplit(self.path)
+        parameters = urllib.parse.parse_qs(url.query)
+        if url.path == '/query':
+            try:
+                body = self.server.service.query(parameters.get('scope'), refresh=parameters.get('refresh', ['0'])[0] in {'1', 'true'})
+            except ValueError as err:
+                self._send_json(400, {'error': str(err)})
+                return
+            except Exception as err:
+                # e.g. lshw, pyudev or cpuinfo failing; answer instead of dropping the connection
+                _LOG.exception(f'Unable to answer {self.path}')
+                self._send_json(500, {'error': f'{type(err).__name__}: {err}'})
+                return
+            self._send_json(200, body)
+        elif url.path == '/scopes':
+            self._send_json(200, SCOPES)
+        elif url.path == '/health':
+            self._send_json(200, {'status': 'ok'})
+        else:
+            self._send_json(404, {'error': f'Unknown path {url.path}'})
+
+    def _send_json(self, status: int, body: t.Any) -> None:
+        data = json.dumps(to_builtin(body), ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args) -> None:
+        # client addresses of Unix sockets are empty, so do not use address_string
+        _LOG.debug(format, *args)
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    HTTP server listening on a Unix socket.
+    """
+    daemon_threads = True
+
+
+def create_server(service: QueryService,
+                  socket_path: t.Optional[t.Union[str, os.PathLike]] = None,
+                  host: str = '127.0.0.1',
+                  port: t.Optional[int] = None) -> socketserver.BaseServer:
+    """
+    Create a server answering queries of the given service on a Unix socket or, if a port is given, via HTTP on host:port.
+    """
+    if port is not None:
+        server: socketserver.BaseServer = http.server.ThreadingHTTPServer((host, port), QueryRequestHandler)
+    else:
+        socket_path = pathlib.Path(socket_path) if socket_path else default_socket_path()
+        # remove the socket of a previous daemon, which was not shut down cleanly
+        if socket_path.is_socket():
+            socket_path.unlink()
+        server = UnixHTTPServer(str(socket_path), QueryRequestHandler)
+    server.service = service  # type: ignore
+
+    return server
+
+
+def serve(socket_path: t.Optional[t.Union[str, os.PathLike]] = None,
+          host: str = '127.0.0.1',
+          port: t.Optional[int] = None,
+          warm_up: bool = True,
+          **query_kwargs) -> None:
+    """
+    Run the daemon until it is interrupted.
+    """
+    service = QueryService(**query_kwargs)
+    server = create_server(service, socket_path=socket_path, host=host, port=port)
+    if warm_up:
+        threading.Thread(target=service.warm_up, name='system-intelligence-warm-up', daemon=True).start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if port is None:
+            pathlib.Path(server.server_address).unlink()
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """
+    HTTP connection over a Unix socket.
+    """
+
+    def __init__(self, socket_path: t.Union[str, os.PathLike], timeout: t.Optional[float] = None):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = str(socket_path)
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def request(scopes: t.Optional[t.Iterable[str]] = None,
+            refresh: bool = False,
+            socket_path: t.Optional[t.Union[str, os.PathLike]] = None,
+            host: str = '127.0.0.1',
+            port: t.Optional[int] = None,
+            timeout: t.Optional[float] = 60) -> t.Dict[str, t.Any]:
+    """
+    Query a running daemon for the given scopes (or all scopes).
+    """
+    if port is not None:
+        connection: http.client.HTTPConnection = http.client.HTTPConnection(host, port, timeout=timeout)
+    else:
+        connection = UnixHTTPConnection(socket_path if socket_path else default_socket_path(), timeout=timeout)
+    parameters = [('scope', scope) for scope in scopes or []] + ([('refresh', '1')] if refresh else [])
+    try:
+        connection.request('GET', f'/query?{urllib.parse.urlencode(parameters)}')
+        response = connection.getresponse()
+        body = json.loads(response.read().decode('utf-8'))
+    finally:
+        connection.close()
+    if response.status != 200:
+        raise RuntimeError(body.get('error', f'Daemon answered with status {response.status}'))
+
+    return body
@@ -0,0 +1,162 @@
+"""Compare query results with a baseline and export only what changed."""
+
+import copy
+import hashlib
+import json
+import typing as t
+
+# paths which differ on every run and are therefore not compared by default
+DEFAULT_IGNORED = ('/timings',)
+
+
+class Change(t.NamedTuple):
+    """
+    A changed value. op is add, remove or replace as in JSON Patch (RFC 6902), path a JSON Pointer (RFC 6901) like /hdd/model/~1dev~1sda.
+    """
+    op: str
+    path: str
+    old: t.Any = None
+    new: t.Any = None
+
+
+def diff(old: t.Any, new: t.Any, ignore: t.Iterable[str] = DEFAULT_IGNORED) -> t.List[Change]:
+    """
+    Compare two results converted with records.to_builtin.
+    Dictionaries are compared by key and lists by index, all other values by equality. Paths in ignore and below them are skipped.
+
+    :return: all changes, in an order in which they can be applied to old to get new
+    """
+    changes: t.List[Change] = []
+    _diff(old, new, '', changes, frozenset(ignore))
+
+    return changes
+
+
+def _diff(old: t.Any, new: t.Any, path: str, changes: t.List[Change], ignore: t.FrozenSet[str]) -> None:
+    if path in ignore:
+        return
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key, value in old.items():
+            child = f'{path}/{_escape(key)}'
+            if key in new:
+                _diff(value, new[key], child, changes, ignore)
+            elif child not in ignore:
+                changes.append(Change('remove', child, old=value))
+        for key, value in new.items():
+            child = f'{path}/{_escape(key)}'
+            if key not in old and child not in ignore:
+                changes.append(Change('add', child, new=value))
+    elif isinstance(old, list) and isinstance(new, list):
+        for index in range(min(len(old), len(new))):
+            _diff(old[index], new[index], f'{path}/{index}', changes, ignore)
+        # remove surplus items from the end, so that the indices of all other items stay valid
+        for index in range(len(old) - 1, len(new) - 1, -1):
+            changes.append(Change('remove', f'{path}/{index}', old=old[index]))
+        for index in range(len(old), len(new)):
+            changes.append(Change('add', f'{path}/{index}', new=new[index]))
+    elif old != new or isinstance(old, bool) != isinstance(new, bool):
+        changes.append(Change('replace', path, old=old, new=new))
+
+
+def to_patch(changes: t.Iterable[Change]) -> t.List[t.Dict[str, t.Any]]:
+    """
+    Convert changes into JSON Patch operations.
+    """
+    return [{'op': change.op, 'path': change.path} if change.op == 'remove' else {'op': change.op, 'path': change.path, 'value': change.new}
+            for change in changes]
+
+
+def apply_patch(document: t.Any, operations: t.Iterable[t.Mapping[str, t.Any]]) -> t.Any:
+    """
+    Apply JSON Patch add, remove and replace operations to a copy of document.
+
+    :raise ValueError: if an operation does not match the document
+    """
+    document = copy.deepcopy(document)
+    for operation in operations:
+        path = operation['path']
+        if path == '':
+            document = copy.deepcopy(operation.get('value'))
+            continue
+        *parents, last = [_unescape(token) for token in path.split('/')[1:]]
+        try:
+            parent = document
+            for token in parents:
+                parent = parent[int(token)] if isinstance(parent, list) else parent[token]
+            if isinstance(parent, list):
+                index = int(last)
+                if operation['op'] == 'add':
+                    parent.insert(index, copy.deepcopy(operation['value']))
+                elif operation['op'] == 'remove':
+                    del parent[index]
+                else:
+                    parent[index] = copy.deepcopy(operation['value'])
+            elif operation['op'] == 'remove':
+                del parent[last]
+            else:
+                if operation['op'] == 'replace' and last not in parent:
+                    raise KeyError(last)
+                parent[last] = copy.deepcopy(operation['value'])
+        except (IndexError, KeyError, TypeError, ValueError) as err:
+            raise ValueError(f'Unable to {operation["op"]} {path}: {err!r}') from err
+
+    return document
+
+
+def fingerprint(snapshot: t.Any) -> str:
+    """
+    Get a hash identifying a result converted with records.to_builtin, independent of the order of its keys.
+    """
+    return hashlib.sha256(json.dumps(snapshot, sort_keys=True, ensure_ascii=False, separators=(',', ':')).encode('utf-8')).hexdigest()
+
+
+def delta(baseline: t.Any, snapshot: t.Any, ignore: t.Iterable[str] = DEFAULT_IGNORED) -> t.Dict[str, t.Any]:
+    """
+    Get the changes from baseline to snapshot as JSON Patch together with the fingerprint of the baseline they apply to.
+    """
+    return {'baseline': fingerprint(baseline), 'changes': to_patch(diff(baseline, snapshot, ignore=ignore))}
+
+
+def apply_delta(baseline: t.Any, snapshot_delta: t.Mapping[str, t.Any]) -> t.Any:
+    """
+    Reconstruct a snapshot from its baseline and its delta. Ignored paths keep their value of the baseline.
+
+    :raise ValueError: if the delta was computed against another baseline
+    """
+    if snapshot_delta['baseline'] != fingerprint(baseline):
+        raise ValueError('The delta was computed against another baseline')
+
+    return apply_patch(baseline, snapshot_delta['changes'])
+
+
+def print_changes(changes: t.Sequence[Change], title: str = 'Changes') -> None:
+    """
+    Print all changes as rich table.
+    """
+    from rich.console import Console
+    from rich.markup import escape
+    from .util.rich_util import create_styled_table
+
+    table = create_styled_table(title)
+    for column in ['Change', 'Path', 'Old', 'New']:
+        table.add_column(column, justify='left')
+    styles = {'add': 'green', 'remove': 'red', 'replace': 'yellow'}
+    for change in changes:
+        old = _shorten(change.old) if change.op != 'add' else ''
+        new = _shorten(change.new) if change.op != 'remove' else ''
+        table.add_row(f'[{styles[change.op]}]{change.op}', escape(change.path), escape(old), escape(new))
+    table.caption = f'{len(changes)} changes'
+    Console().print(table)
+
+
+def _shorten(value: t.Any, width: int = 60) -> str:
+    text = json.dumps(value, ensure_ascii=False)
+    return text if len(text) <= width else text[:width - 3] + '...'
+
+
+def _escape(key: t.Any) -> str:
+    return str(key).replace('~', '~0').replace('/', '~1')
+
+
+def _unescape(token: str) -> str:
+    return token.replace('~1', '/').replace('~0', '~')
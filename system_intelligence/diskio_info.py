@@ -0,0 +1,163 @@
+import os
+import sys
+import time
+import typing as t
+import psutil
+
+from .base_info import BaseInfo
+from .records import DiskIoRecord
+from .sysfs_backend import read_file
+
+# /proc/diskstats counts sectors of 512 bytes, regardless of the logical block size of the disk
+SECTOR_SIZE = 512
+
+
+class DiskCounters(t.NamedTuple):
+    """
+    Cumulative I/O counters of a disk, times in milliseconds.
+    """
+    reads: int
+    read_bytes: int
+    read_time: int
+    writes: int
+    write_bytes: int
+    write_time: int
+    busy_time: t.Optional[int] = None
+    weighted_time: t.Optional[int] = None
+
+
+def read_diskstats(root: str = '/') -> t.Dict[str, DiskCounters]:
+    """
+    Parse the counters of all block devices from a single read of /proc/diskstats, keyed by kernel name (e.g. sda).
+    """
+    counters = {}
+    for line in read_file(os.path.join(root, 'proc', 'diskstats'), '').splitlines():
+        fields = line.split()
+        if len(fields) < 14:
+            continue
+        values = [int(value) for value in fields[3:14]]
+        counters[fields[2]] = DiskCounters(reads=values[0],
+                                           read_bytes=values[2] * SECTOR_SIZE,
+                                           read_time=values[3],
+                                           writes=values[4],
+                                           write_bytes=values[6] * SECTOR_SIZE,
+                                           write_time=values[7],
+                                           busy_time=values[9],
+                                           weighted_time=values[10])
+
+    return counters
+
+
+def read_counters(root: str = '/') -> t.Dict[str, DiskCounters]:
+    """
+    Read the I/O counters of all disks, from /proc/diskstats on Linux and from psutil otherwise.
+    """
+    if sys.platform.startswith('linux'):
+        return read_diskstats(root)
+
+    return {name: DiskCounters(reads=counters.read_count,
+                               read_bytes=counters.read_bytes,
+                               read_time=counters.read_time,
+                               writes=counters.write_count,
+                               write_bytes=counters.write_bytes,
+                               write_time=counters.write_time,
+                               busy_time=getattr(counters, 'busy_time', None))
+            for name, counters in (psutil.disk_io_counters(perdisk=True) or {}).items()}
+
+
+def compute_rates(before: DiskCounters, after: DiskCounters, interval: float) -> DiskIoRecord:
+    """
+    Compute the I/O rates of a disk between two readings of its counters taken interval seconds apart, like iostat -x.
+    Counters which went backwards (wrapped around or reset) count as unchanged.
+    """
+    delta = DiskCounters(*(max(new - old, 0) if new is not None and old is not None else None for old, new in zip(before, after)))
+
+    return DiskIoRecord(reads_per_second=delta.reads / interval,
+                        writes_per_second=delta.writes / interval,
+                        read_bytes_per_second=delta.read_bytes / interval,
+                        write_bytes_per_second=delta.write_bytes / interval,
+                        read_await=delta.read_time / delta.reads / 1000 if delta.reads else None,
+                        write_await=delta.write_time / delta.writes / 1000 if delta.writes else None,
+                        queue_size=delta.weighted_time / interval / 1000 if delta.weighted_time is not None else None,
+                        utilisation=min(delta.busy_time / interval / 10, 100.) if delta.busy_time is not None else None)
+
+
+class DiskioInfo(BaseInfo):
+    """
+    Sample I/O rates of the hard disks
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.hdd_info = None
+        if self.OS == 'linux':
+            from .hdd_info import HddInfo
+
+            self.hdd_info = HddInfo()
+        self._last: t.Optional[t.Tuple[float, t.Dict[str, DiskCounters]]] = None
+
+    def monitor_devices(self) -> bool:
+        """
+        Keep the disks up to date from udev events instead of enumerating them on every sample, see HddInfo.monitor_devices.
+        """
+        return self.hdd_info is not None and self.hdd_info.monitor_devices()
+
+    def query_diskio(self, sample_interval: float = 1.0, **_) -> t.Dict[str, DiskIoRecord]:
+        """
+        Get the I/O rates of every disk, averaged over sample_interval seconds.
+        """
+        self.sample()
+        time.sleep(sample_interval)
+
+        return self.sample()
+
+    def sample(self) -> t.Dict[str, DiskIoRecord]:
+        """
+        Get the I/O rates of every disk since the previous sample, by device node. The first sample is empty.
+
+        All counters are read at once. On Linux, only the disks listed by HddInfo.query_hdd_model are reported, partitions,
+        device mapper, loop and software RAID devices are left out.
+        """
+        now = time.monotonic()
+        counters = read_counters()
+        last, self._last = self._last, (now, counters)
+        if last is None or now <= last[0]:
+            return {}
+        # without udev information about the disks, all block devices are reported
+        disks = (self.hdd_info.query_hdd_model() if self.hdd_info is not None else None) or None
+
+        rates = {}
+        for name, after in counters.items():
+            # kernel names use ! instead of / for devices in subdirectories of /dev, e.g. cciss!c0d0
+            node = '/dev/' + name.replace('!', '/') if self.hdd_info is not None else name
+            if (disks is not None and node not in disks) or name not in last[1]:
+                continue
+            rates[node] = compute_rates(last[1][name], after, now - last[0])
+
+        return rates
+
+    def print_diskio_info(self, diskio_info: t.Mapping[str, DiskIoRecord]) -> None:
+        """
+        Print the I/O rates of the hard disks
+        """
+        self.init_table(title='Disk I/O', column_names=['Device', 'Read IOPS', 'Write IOPS', 'Read', 'Write', 'Read Await', 'Write Await', 'Queue', 'Util %'])
+
+        records = diskio_info.values()
+        # format both bandwidths of all disks at once
+        sizes = iter(self.format_bytes_bulk(int(size) for record in records for size in (record.read_bytes_per_second, record.write_bytes_per_second)))
+        for (device, record), read, write in zip(diskio_info.items(), sizes, sizes):
+            self.table.add_row(device,
+                               f'{record.reads_per_second:.1f}',
+                               f'{record.writes_per_second:.1f}',
+                               f'{read or "0 B"}/s',
+                               f'{write or "0 B"}/s',
+                               _format_await(record.read_await),
+                               _format_await(record.write_await),
+                               f'{record.queue_size:.2f}' if record.queue_size is not None else '',
+                               f'{record.utilisation:.1f}' if record.utilisation is not None else '')
+
+        self.print_table()
+
+
+def _format_await(seconds: t.Optional[float]) -> str:
+    return f'{seconds * 1000:.2f} ms' if seconds is not None else ''
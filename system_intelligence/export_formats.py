@@ -0,0 +1,255 @@
+"""Write query results in text, compact binary and columnar formats, either one snapshot or a batch of many snapshots at a time."""
+
+import contextlib
+import io
+import json
+import pathlib
+import sys
+import typing as t
+
+from .util.import_util import import_optional
+
+FORMATS = ['raw', 'json', 'yml', 'ndjson', 'msgpack', 'cbor', 'parquet']
+
+# optional packages required by a format and the extra of system-intelligence installing them
+DEPENDENCIES = {
+    'msgpack': ('msgpack', 'msgpack'),
+    'cbor': ('cbor2', 'cbor'),
+    'parquet': ('pyarrow.parquet', 'parquet')
+}
+
+# formats by file extension
+EXTENSIONS = {
+    '.txt': 'raw', '.raw': 'raw', '.json': 'json', '.yml': 'yml', '.yaml': 'yml', '.ndjson': 'ndjson', '.jsonl': 'ndjson',
+    '.msgpack': 'msgpack', '.mpk': 'msgpack', '.cbor': 'cbor', '.parquet': 'parquet'
+}
+
+# formats whose files are appended to, so that the snapshots of many runs (or nodes) form a batch
+APPEND_FORMATS = {'raw', 'ndjson', 'msgpack', 'cbor'}
+
+
+def require(export_format: str) -> t.Any:
+    """
+    Import the optional package a format requires, if any.
+
+    :raise ImportError: if the package is not installed
+    """
+    if export_format not in DEPENDENCIES:
+        return None
+    package, extra = DEPENDENCIES[export_format]
+    module = import_optional(package)
+    if module is None:
+        raise ImportError(f'Exporting {export_format} requires the package {package.split(".")[0]}. '
+                          f'Install it with pip install system-intelligence[{extra}]')
+
+    return module
+
+
+@contextlib.contextmanager
+def open_target(target: t.Any, export_format: str) -> t.Iterator[t.BinaryIO]:
+    """
+    Open a file to export to as binary stream. '-' is the standard output.
+    """
+    if str(target) != '-':
+        with open(str(target), 'ab' if export_format in APPEND_FORMATS else 'wb') as target_file:
+            yield target_file
+        return
+    stream = io.BytesIO()
+    yield stream
+    if hasattr(sys.stdout, 'buffer'):
+        sys.stdout.flush()
+        sys.stdout.buffer.write(stream.getvalue())
+        sys.stdout.buffer.flush()
+    else:
+        # e.g. redirected to a StringIO
+        sys.stdout.write(stream.getvalue().decode('utf-8', errors='replace'))
+
+
+def format_of(path: t.Any, default: str = 'json') -> str:
+    """
+    Guess the format of a file from its extension.
+    """
+    return EXTENSIONS.get(pathlib.PurePath(str(path)).suffix.lower(), default)
+
+
+def read(stream: t.BinaryIO, export_format: str) -> t.Any:
+    """
+    Read a snapshot written with write. Of raw, ndjson, msgpack and cbor files holding a sequence of snapshots, the last one is returned.
+
+    :raise ValueError: if the stream holds no snapshot
+    """
+    if export_format == 'json':
+        return json.loads(stream.read().decode('utf-8'))
+    if export_format == 'yml':
+        from ruamel.yaml import YAML
+
+        return YAML(typ='safe').load(stream)
+    if export_format in {'raw', 'ndjson'}:
+        lines = stream.read().decode('utf-8').splitlines()
+        for line in reversed(lines):
+            if line.strip():
+                return _parse_line(line, export_format)
+    elif export_format == 'msgpack':
+        snapshot = missing = object()
+        for snapshot in require('msgpack').Unpacker(stream, raw=False):
+            pass
+        if snapshot is not missing:
+            return snapshot
+    elif export_format == 'cbor':
+        cbor2 = require('cbor')
+        data = stream.read()
+        cbor_stream = io.BytesIO(data)
+        decoder = cbor2.CBORDecoder(cbor_stream)
+        snapshot = None
+        while cbor_stream.tell() < len(data):
+            snapshot = decoder.decode()
+        if data:
+            return snapshot
+    else:
+        raise NotImplementedError(f'Reading format={export_format} is not supported')
+    raise ValueError(f'No {export_format} snapshot found')
+
+
+def iter_snapshots(path: t.Any, export_format: t.Optional[str] = None) -> t.Iterator[t.Any]:
+    """
+    Read all snapshots of a file one at a time, in the format given by its extension unless export_format is set.
+    raw, ndjson, msgpack and cbor sequences are decoded lazily. json, yml and every line of raw files may hold a single snapshot,
+    a list of snapshots or a mapping of hostnames to snapshots as written by the fleet command.
+    """
+    export_format = export_format or format_of(path)
+    if export_format == 'parquet':
+        raise NotImplementedError('Reading format=parquet is not supported')
+    with open(str(path), 'rb') as stream:
+        if export_format == 'ndjson':
+            for line in stream:
+                if line.strip():
+                    yield json.loads(line)
+        elif export_format == 'raw':
+            for line in stream:
+                if line.strip():
+                    yield from _snapshots(_parse_line(line.decode('utf-8'), export_format))
+        elif export_format == 'msgpack':
+            yield from require('msgpack').Unpacker(stream, raw=False)
+        elif export_format == 'cbor':
+            decoder = require('cbor').CBORDecoder(stream)
+            while stream.peek(1):
+                yield decoder.decode()
+        else:
+            yield from _snapshots(read(stream, export_format))
+
+
+def _parse_line(line: str, export_format: str) -> t.Any:
+    if export_format == 'raw':
+        import ast
+
+        return ast.literal_eval(line)
+
+    return json.loads(line)
+
+
+def _snapshots(data: t.Any) -> t.Iterator[t.Any]:
+    if isinstance(data, list):
+        yield from data
+    elif _is_snapshot(data):
+        yield data
+    else:
+        yield from data.values()
+
+
+def _is_snapshot(data: t.Any) -> bool:
+    from .query import SCOPES
+
+    return not isinstance(data, dict) or bool(data.keys() & set(SCOPES)) or not all(isinstance(value, dict) for value in data.values())
+
+
+def load(path: t.Any, export_format: t.Optional[str] = None) -> t.Any:
+    """
+    Read a snapshot from a file, in the format given by its extension unless export_format is set. See read.
+    """
+    with open(str(path), 'rb') as stream:
+        return read(stream, export_format or format_of(path))
+
+
+def write(info: t.Mapping[str, t.Any], export_format: str, stream: t.BinaryIO) -> None:
+    """
+    Write a single snapshot converted with records.to_builtin to a binary stream.
+    """
+    if export_format == 'parquet':
+        write_batch([info], export_format, stream)
+    elif export_format == 'json':
+        stream.write(json.dumps(info, indent=2, ensure_ascii=False).encode('utf-8'))
+    elif export_format == 'raw':
+        # one literal per line, like ndjson, so that appended snapshots can be read back one at a time
+        stream.write(str(info).encode('utf-8') + b'\n')
+    elif export_format == 'yml':
+        from ruamel.yaml import YAML
+
+        YAML(typ='safe').dump(info, stream)
+    elif export_format == 'ndjson':
+        stream.write(json.dumps(info, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n')
+    elif export_format == 'msgpack':
+        stream.write(require('msgpack').packb(info, use_bin_type=True))
+    elif export_format == 'cbor':
+        require('cbor').dump(info, stream)
+    else:
+        raise NotImplementedError(f'format={export_format}')
+
+
+def write_batch(snapshots: t.Iterable[t.Mapping[str, t.Any]], export_format: str, stream: t.BinaryIO) -> None:
+    """
+    Write many snapshots converted with records.to_builtin to a binary stream.
+
+    json and yml are written as one list, parquet as one table with a row per snapshot and a column per value (see flatten).
+    All other formats are written as a sequence of snapshots.
+    """
+    if export_format == 'parquet':
+        parquet = require('parquet')
+        parquet.write_table(_to_table([flatten(snapshot) for snapshot in snapshots]), stream, compression='zstd')
+    elif export_format == 'json':
+        stream.write(json.dumps(list(snapshots), indent=2, ensure_ascii=False).encode('utf-8'))
+    elif export_format == 'yml':
+        from ruamel.yaml import YAML
+
+        YAML(typ='safe').dump(list(snapshots), stream)
+    else:
+        for snapshot in snapshots:
+            write(snapshot, export_format, stream)
+
+
+def flatten(info: t.Mapping[str, t.Any], prefix: str = '') -> t.Dict[str, t.Any]:
+    """
+    Flatten nested dictionaries into a dictionary with one entry per value, keyed by the path joined with dots, e.g. 'cpu.clock'.
+    Lists, like the banks of the ram scope, are stored as JSON strings.
+    """
+    flat: t.Dict[str, t.Any] = {}
+    for key, value in info.items():
+        path = f'{prefix}{key}'
+        if isinstance(value, dict) and value:
+            flat.update(flatten(value, f'{path}.'))
+        elif isinstance(value, (dict, list, tuple)):
+            flat[path] = json.dumps(value, ensure_ascii=False, separators=(',', ':')) if value else None
+        else:
+            flat[path] = value
+
+    return flat
+
+
+def _to_table(rows: t.List[t.Dict[str, t.Any]]) -> t.Any:
+    """
+    Convert flattened snapshots into an Arrow table with the union of their columns. Missing values are null.
+    """
+    import pyarrow
+
+    columns: t.Dict[str, None] = {}
+    for row in rows:
+        columns.update(dict.fromkeys(row))
+    arrays = {}
+    for column in columns:
+        values = [row.get(column) for row in rows]
+        try:
+            arrays[column] = pyarrow.array(values)
+        except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError):
+            # values of different types, e.g. sizes which are pre-formatted on some nodes
+            arrays[column] = pyarrow.array([None if value is None else str(value) for value in values])
+
+    return pyarrow.table(arrays)
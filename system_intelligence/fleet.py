@@ -0,0 +1,210 @@
+"""Query many hosts at once over SSH (or another transport) and merge their results into one dataset keyed by hostname."""
+
+import abc
+import functools
+import json
+import shlex
+import subprocess
+import sys
+import time
+import typing as t
+
+from . import timing
+from .util.process_util import kill_process_tree, new_process_group_kwargs
+from .util.thread_util import run_with_deadlines
+
+
+class HostResult(t.NamedTuple):
+    """
+    Outcome of querying a host of the inventory: its results or the error of its last attempt.
+    """
+    host: str
+    info: t.Optional[t.Dict[str, t.Any]]
+    attempts: int
+    seconds: float
+    error: t.Optional[str] = None
+
+
+class Transport(abc.ABC):
+    """
+    Run system-intelligence with the given arguments on a host and return its standard output.
+    Subclasses only need to build the command running it.
+    """
+
+    @abc.abstractmethod
+    def command(self, host: str, arguments: t.Sequence[str]) -> t.List[str]:
+        """
+        Build the command running system-intelligence with the given arguments on host.
+        """
+
+    def run(self, host: str, arguments: t.Sequence[str], timeout: t.Optional[float] = None) -> bytes:
+        """
+        Run the query on host.
+
+        :raise subprocess.TimeoutExpired: after killing the command if it took longer than timeout seconds
+        :raise subprocess.CalledProcessError: if the command failed
+        """
+        cmd = self.command(host, arguments)
+        with timing.span('subprocess', cmd[0], command=' '.join(cmd), host=host) as transport_span:
+            process = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE, **new_process_group_kwargs())
+            try:
+                output, error = process.communicate(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                kill_process_tree(process)
+                raise
+            finally:
+                transport_span.attributes['returncode'] = process.returncode
+        if process.returncode != 0:
+            raise subprocess.CalledProcessError(process.returncode, cmd, output, error)
+
+        return output
+
+
+class SSHTransport(Transport):
+    """
+    Run the query via ssh. Hosts are anything ssh accepts as destination, e.g. user@node042 or an alias of ~/.ssh/config.
+    """
+
+    def __init__(self, remote_command: str = 'system-intelligence', options: t.Sequence[str] = (), connect_timeout: float = 10):
+        self.remote_command = remote_command
+        self.options = list(options)
+        self.connect_timeout = connect_timeout
+
+    def command(self, host: str, arguments: t.Sequence[str]) -> t.List[str]:
+        # never prompt for passwords or host keys, which would block a worker until its deadline
+        return (['ssh', '-o', 'BatchMode=yes', '-o', f'ConnectTimeout={self.connect_timeout:.0f}'] + self.options
+                + [host, '--', ' '.join([self.remote_command] + [shlex.quote(argument) for argument in arguments])])
+
+
+class LocalTransport(Transport):
+    """
+    Run the query as local subprocess for every host, e.g. to test an inventory or the orchestration itself.
+    """
+
+    def command(self, host: str, arguments: t.Sequence[str]) -> t.List[str]:
+        return [sys.executable, '-m', 'system_intelligence.system_intelligence_cli'] + list(arguments)
+
+
+TRANSPORTS: t.Dict[str, t.Callable[..., Transport]] = {
+    'ssh': SSHTransport,
+    'local': LocalTransport
+}
+
+
+def read_inventory(path: str) -> t.List[str]:
+    """
+    Read a host inventory with one host per line. Empty lines and everything after a # are ignored, duplicates are dropped.
+    """
+    with open(path, encoding='utf-8') as inventory:
+        hosts = [line.split('#', 1)[0].strip() for line in inventory]
+
+    return list(dict.fromkeys(host for host in hosts if host))
+
+
+def query_host(host: str,
+               transport: Transport,
+               arguments: t.Sequence[str],
+               retries: int = 2,
+               timeout: t.Optional[float] = 120,
+               deadline: t.Optional[float] = None,
+               retry_delay: float = 1.0) -> HostResult:
+    """
+    Query a host, retrying failed attempts with exponentially growing delays.
+
+    Every attempt is killed after timeout seconds. The host is given up deadline seconds after the first attempt was started.
+    """
+    started = time.monotonic()
+    attempts = 0
+    error = None
+    with timing.span('fleet', host) as host_span:
+        while attempts <= retries:
+            remaining = None if deadline is None else started + deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                error = f'{error}, deadline of {deadline:.1f} s exceeded' if error else f'deadline of {deadline:.1f} s exceeded'
+                break
+            attempt_timeout = timeout if remaining is None else min(timeout or remaining, remaining)
+            attempts += 1
+            try:
+                info = json.loads(transport.run(host, arguments, timeout=attempt_timeout))
+                host_span.attributes['attempts'] = attempts
+                return HostResult(host, info, attempts, time.monotonic() - started)
+            except subprocess.TimeoutExpired:
+                error = f'timed out after {attempt_timeout:.1f} s'
+            except subprocess.CalledProcessError as err:
+                stderr = (err.stderr or b'').decode('utf-8', errors='replace').strip().splitlines()
+                error = stderr[-1] if stderr else f'exit code {err.returncode}'
+            except OSError as err:
+                # e.g. ssh is not installed, retrying will not help
+                error = str(err)
+                break
+            except ValueError:
+                error = 'output is no valid JSON'
+                break
+            if attempts <= retries:
+                delay = retry_delay * 2 ** (attempts - 1)
+                time.sleep(delay if remaining is None else max(0., min(delay, started + deadline - time.monotonic())))
+        host_span.attributes['attempts'] = attempts
+        host_span.attributes['error'] = error
+
+    return HostResult(host, None, attempts, time.monotonic() - started, error)
+
+
+def collect(hosts: t.Sequence[str],
+            scopes: t.Iterable[str] = ('all',),
+            transport: t.Optional[Transport] = None,
+            concurrency: int = 32,
+            **kwargs) -> t.Tuple[t.Dict[str, t.Dict[str, t.Any]], t.List[HostResult]]:
+    """
+    Query all hosts, at most concurrency at a time. See query_host for all other keyword arguments.
+
+    The host scope is always queried, results are keyed by the hostname it reports.
+    If several hosts of the inventory report the same hostname, only the first one is kept.
+
+    :return: the results by hostname and the outcome of every host in the order of the inventory
+    """
+    transport = transport or SSHTransport()
+    scopes = set(scopes)
+    if 'all' not in scopes:
+        scopes.add('host')
+    arguments = sorted(scopes) + ['--output_format', 'json', '--output', '-', '--silent']
+    tasks = {host: functools.partial(query_host, host, transport, arguments, **kwargs) for host in hosts}
+    results, errors, _ = run_with_deadlines(tasks, workers=min(concurrency, max(len(tasks), 1)))
+
+    dataset: t.Dict[str, t.Dict[str, t.Any]] = {}
+    outcomes = []
+    hostnames: t.Dict[str, str] = {}
+    for host in hosts:
+        if host in errors:
+            outcomes.append(HostResult(host, None, 0, 0., repr(errors[host])))
+            continue
+        outcome = results[host]
+        if outcome.info is not None:
+            hostname = (outcome.info.get('host') or {}).get('hostname') or host
+            if hostname in hostnames:
+                outcome = outcome._replace(info=None, error=f'hostname {hostname} was already reported by {hostnames[hostname]}')
+            else:
+                hostnames[hostname] = host
+                dataset[hostname] = outcome.info
+        outcomes.append(outcome)
+
+    return dataset, outcomes
+
+
+def print_outcomes(outcomes: t.Sequence[HostResult]) -> None:
+    """
+    Print the status of every host as rich table.
+    """
+    from rich.console import Console
+    from rich.markup import escape
+    from .util.rich_util import create_styled_table
+
+    table = create_styled_table('Fleet')
+    for column in ['Host', 'Hostname', 'Status', 'Attempts', 'Time (s)']:
+        table.add_column(column, justify='left')
+    for outcome in outcomes:
+        hostname = (outcome.info.get('host') or {}).get('hostname', '') if outcome.info else ''
+        status = '[green]ok' if outcome.error is None else f'[red]{escape(outcome.error)}'
+        table.add_row(outcome.host, hostname, status, str(outcome.attempts), f'{outcome.seconds:.1f}')
+    succeeded = sum(outcome.error is None for outcome in outcomes)
+    table.caption = f'{succeeded} of {len(outcomes)} hosts queried'
+    Console().print(table)
@@ -1,7 +1,11 @@
+import functools
 import typing as t
 from rich import print
 
+from . import timing
 from .base_info import BaseInfo
+from .records import GpuRecord
+from .util.import_util import import_optional
 
 
 class QueryError(RuntimeError):
@@ -10,13 +14,23 @@ class QueryError(RuntimeError):
     """
 
 
-try:
-    import pycuda
-    import pycuda.driver as cuda
-    import pycuda.autoinit  # noqa F401
-    is_CUDA_available = True
-except (ModuleNotFoundError, ImportError):
-    is_CUDA_available = False
+@functools.lru_cache(maxsize=None)
+def _cuda():
+    """
+    Import and initialize the CUDA driver API on first use.
+    Unlike pycuda.autoinit no CUDA context is created, since querying device attributes does not require one.
+
+    :return: the pycuda.driver module or None if pycuda or CUDA is not available
+    """
+    with timing.span('init', 'pycuda'):
+        cuda = import_optional('pycuda.driver')
+        if cuda is None:
+            return None
+        try:
+            cuda.init()
+        except cuda.Error:
+            return None
+    return cuda
 
 
 class GpusInfo(BaseInfo):
@@ -34,11 +48,12 @@ class GpusInfo(BaseInfo):
             8: 'Ampere'
         }
 
-    def query_gpus(self, **_) -> t.List[t.Mapping[str, t.Any]]:
+    def query_gpus(self, **_) -> t.List[GpuRecord]:
         """
         Get information about all GPUs.
         """
-        if not is_CUDA_available:
+        cuda = _cuda()
+        if cuda is None:
             print('[bold yellow]Unable to import package pycuda. GPU information may be limited.')
             return []
 
@@ -49,10 +64,11 @@ class GpusInfo(BaseInfo):
 
         return gpus
 
-    def query_gpu(self, device: 'cuda.Device') -> t.Mapping[str, t.Any]:
+    def query_gpu(self, device: t.Any) -> GpuRecord:
         """
-        Get information about a given GPU.
+        Get information about a given GPU (a pycuda.driver.Device).
         """
+        cuda = _cuda()
         attributes = device.get_attributes()
         compute_capability = device.compute_capability()
         multiprocessors = attributes[cuda.device_attribute.MULTIPROCESSOR_COUNT]
@@ -63,17 +79,15 @@ class GpusInfo(BaseInfo):
             # compute capability in case its not implemented in SI yet
             except KeyError:
                 compute_cap_arch = "Unknown"
-            return {
-                'architecture': compute_cap_arch,
-                'brand': device.name(),
-                'compute_capability': str(float('.'.join(str(_) for _ in compute_capability))),
-                'memory': GpusInfo.format_bytes(self, device.total_memory()),
-                'memory_clock': GpusInfo.hz_to_hreadable_string(attributes[cuda.device_attribute.MEMORY_CLOCK_RATE]),
-                'clock': GpusInfo.hz_to_hreadable_string(attributes[cuda.device_attribute.CLOCK_RATE]),
-                'multiprocessors': str(multiprocessors),
-                'cores': str(cuda_cores),
-                'warp_size': str(attributes[cuda.device_attribute.WARP_SIZE])
-            }
+            return GpuRecord(architecture=compute_cap_arch,
+                             brand=device.name(),
+                             compute_capability=float('.'.join(str(_) for _ in compute_capability)),
+                             memory=device.total_memory(),
+                             memory_clock=attributes[cuda.device_attribute.MEMORY_CLOCK_RATE],
+                             clock=attributes[cuda.device_attribute.CLOCK_RATE],
+                             multiprocessors=multiprocessors,
+                             cores=cuda_cores,
+                             warp_size=attributes[cuda.device_attribute.WARP_SIZE])
         except KeyError as err:
             raise QueryError(f'expected value not present among device attributes: {device.get_attributes()}') from err
 
@@ -101,7 +115,7 @@ class GpusInfo(BaseInfo):
             return multiprocessors * 64
         return None
 
-    def print_gpus_info(self, gpus_info: list):
+    def print_gpus_info(self, gpus_info: t.List[GpuRecord]):
         """
         Print info on any GPUs on the users system
         """
@@ -109,6 +123,14 @@ class GpusInfo(BaseInfo):
             column_names = ['Architecture', 'Brand', 'Compute Capability', 'Memory', 'Memory Clock', 'Clock', 'Multiprocessors', 'Cores', 'Warp Size']
             self.init_table(title='Graphical Processing Unit', column_names=column_names)
             for gpu in gpus_info:
-                self.table.add_row(*gpu.values())
+                self.table.add_row(gpu.architecture,
+                                   gpu.brand,
+                                   str(gpu.compute_capability),
+                                   self.format_bytes(gpu.memory),
+                                   self.hz_to_hreadable_string(gpu.memory_clock),
+                                   self.hz_to_hreadable_string(gpu.clock),
+                                   str(gpu.multiprocessors),
+                                   str(gpu.cores),
+                                   str(gpu.warp_size))
 
             self.print_table()
@@ -1,10 +1,23 @@
-import itertools
+import fnmatch
+import functools
+import logging
 import os
+import threading
 import typing as t
 import psutil
 from rich import print
 
 from .base_info import BaseInfo
+from . import udev_inventory
+from .records import DiskRecord, DiskUsageRecord, HddRecord
+from .util.thread_util import run_with_deadlines
+
+_LOG = logging.getLogger(__name__)
+
+# virtual file systems without a usage worth reporting; network file systems like nfs, cifs and lustre are kept
+PSEUDO_FSTYPES = frozenset({'autofs', 'binfmt_misc', 'bpf', 'cgroup', 'cgroup2', 'configfs', 'debugfs', 'devfs', 'devpts', 'devtmpfs',
+                            'efivarfs', 'fusectl', 'hugetlbfs', 'mqueue', 'nsfs', 'overlay', 'proc', 'pstore', 'ramfs', 'rpc_pipefs',
+                            'securityfs', 'selinuxfs', 'sysfs', 'tmpfs', 'tracefs'})
 
 
 class HddInfo(BaseInfo):
@@ -14,7 +27,11 @@ class HddInfo(BaseInfo):
 
     def __init__(self):
         super().__init__()
-        self.IGNORED_DEVICE_PATHS = {'/dm', '/loop', '/md'}
+        self.inventory: t.Optional[udev_inventory.DiskInventory] = None
+        # mountpoints whose usage query is still running after it timed out, e.g. of a dead NFS server. They are reported
+        # as stalled instead of being queried again, so that hung threads do not pile up in long-running processes.
+        self._stalled_mounts: t.Set[str] = set()
+        self._stalled_mounts_lock = threading.Lock()
         if self.OS == 'linux':
             import pyudev
             self.context = pyudev.Context()
@@ -23,79 +40,151 @@ class HddInfo(BaseInfo):
             print('[bold yellow]Unable to import package pyudev. HDD information may be limited.')
         self.HDD = pyudev is not None
 
-    def query_hdd(self):
+    def monitor_devices(self) -> bool:
+        """
+        Keep the disks up to date from udev events instead of enumerating them on every query, for long-running processes.
+
+        :return: whether the udev monitor could be started
         """
-        Query info on any available HDDs on the users system
+        if not self.HDD:
+            return False
+        if self.inventory is None:
+            inventory = udev_inventory.DiskInventory(self.context)
+            try:
+                inventory.start()
+            except OSError as err:
+                _LOG.debug(f'Unable to monitor udev events: {err}')
+                return False
+            self.inventory = inventory
+
+        return True
+
+    def query_hdd(self, **kwargs) -> HddRecord:
+        """
+        Query info on any available HDDs on the users system. Keyword arguments are passed on to query_hdd_usage.
         """
         hdd_models = self.query_hdd_model()
-        hdd_usage = self.query_hdd_usage()
+        hdd_usage = self.query_hdd_usage(**kwargs)
 
-        return {'model': hdd_models, 'usage': hdd_usage}
+        return HddRecord(model=hdd_models, usage=hdd_usage)
 
-    def query_hdd_model(self) -> t.Dict[str, dict]:
+    def query_hdd_model(self) -> t.Dict[str, DiskRecord]:
         """
-        Get information about all hard drives.
+        Get information about all hard drives. The disks are taken from the udev monitor if it was started by monitor_devices.
         """
         if not self.HDD:
             return {}
-        hdds = {}
-        for device in self.context.list_devices(subsystem='block', DEVTYPE='disk'):
-            if any(_ in device.device_path for _ in self.IGNORED_DEVICE_PATHS):
-                continue
-            hdd = {'size': device.attributes.asint('size')}
-            for device_ in itertools.chain([device], device.ancestors):
-                try:
-                    hdd['model'] = device_.attributes.asstring('model')
-                    break
-                except KeyError:
-                    hdd['model'] = ''
-            hdds[device.device_node] = hdd
-
-        return hdds
-
-    def query_hdd_usage(self) -> t.Dict[t.Any, t.Dict[str, str]]:
+        if self.inventory is not None:
+            return dict(self.inventory.devices)
+
+        return udev_inventory.list_disks(self.context)
+
+    def query_hdd_usage(self,
+                        mount_timeout: t.Optional[float] = 5.0,
+                        workers: int = 8,
+                        max_abandoned: t.Optional[int] = 4,
+                        include_fstypes: t.Collection[str] = (),
+                        exclude_fstypes: t.Collection[str] = (),
+                        include_mounts: t.Collection[str] = (),
+                        exclude_mounts: t.Collection[str] = (),
+                        **_) -> t.Dict[str, DiskUsageRecord]:
         """
-        Query info on any HDD usage on the users system
+        Query info on any HDD usage on the users system.
+
+        Mounted partitions are queried concurrently by at most workers threads. A partition which does not answer within mount_timeout
+        seconds, like a hung network file system, is reported with status timeout and once max_abandoned partitions timed out,
+        all remaining ones are reported as skipped. Bind mounts of a device are queried once, for the first mountpoint of the device.
+        Pseudo file systems (PSEUDO_FSTYPES) like proc, tmpfs and overlay are left out unless they are included explicitly.
+
+        :param include_fstypes: only query partitions of these file system types, all by default
+        :param exclude_fstypes: do not query partitions of these file system types
+        :param include_mounts: only query partitions whose mountpoint matches one of these glob patterns, all by default
+        :param exclude_mounts: do not query partitions whose mountpoint matches one of these glob patterns
         """
-        hdd_to_usage = {}
-        for part in psutil.disk_partitions(all=False):
+        partitions = {}
+        # all=False would leave out network file systems, which are marked nodev just like pseudo file systems
+        for part in psutil.disk_partitions(all=True):
+            if part.fstype in PSEUDO_FSTYPES and part.fstype not in include_fstypes:
+                continue
             if os.name == 'nt':
                 # skip cd-rom drives with no disk in it; they may raise ENOENT,
                 # pop-up a Windows GUI error for a non-ready partition or just hang.
                 if 'cdrom' in part.opts or part.fstype == '':
                     continue
-            usage = psutil.disk_usage(part.mountpoint)
-            hdd_to_usage[part.device] = {'total': self.format_bytes(usage.total),
-                                         'used': self.format_bytes(usage.used),
-                                         'free': self.format_bytes(usage.free),
-                                         'percentage': str(usage.percent),
-                                         'fstype': part.fstype,
-                                         'mountpoint': part.mountpoint}
+            if (include_fstypes and part.fstype not in include_fstypes) or part.fstype in exclude_fstypes:
+                continue
+            if (include_mounts and not any(fnmatch.fnmatchcase(part.mountpoint, pattern) for pattern in include_mounts)) \
+                    or any(fnmatch.fnmatchcase(part.mountpoint, pattern) for pattern in exclude_mounts):
+                continue
+            # bind mounts share the usage of their device
+            partitions.setdefault(part.device, part)
+
+        started: t.Set[str] = set()
+
+        def disk_usage(device: str, mountpoint: str) -> t.Any:
+            with self._stalled_mounts_lock:
+                started.add(device)
+                self._stalled_mounts.add(mountpoint)
+            try:
+                return psutil.disk_usage(mountpoint)
+            finally:
+                with self._stalled_mounts_lock:
+                    self._stalled_mounts.discard(mountpoint)
+
+        with self._stalled_mounts_lock:
+            stalled = {device for device, part in partitions.items() if part.mountpoint in self._stalled_mounts}
+        tasks = {device: functools.partial(disk_usage, device, part.mountpoint) for device, part in partitions.items() if device not in stalled}
+        usages, errors, _ = run_with_deadlines(tasks, workers=workers, timeout=mount_timeout, max_abandoned=max_abandoned)
+
+        hdd_to_usage = {}
+        for device, part in partitions.items():
+            if device in usages:
+                usage = usages[device]
+                hdd_to_usage[device] = DiskUsageRecord(total=usage.total,
+                                                       used=usage.used,
+                                                       free=usage.free,
+                                                       percent=usage.percent,
+                                                       fstype=part.fstype,
+                                                       mountpoint=part.mountpoint)
+                continue
+            if device in errors:
+                _LOG.debug(f'Unable to query usage of {part.mountpoint}: {errors[device]}')
+                status = 'error'
+            elif device in stalled:
+                status = 'stalled'
+            else:
+                status = 'timeout' if device in started else 'skipped'
+            hdd_to_usage[device] = DiskUsageRecord(fstype=part.fstype, mountpoint=part.mountpoint, status=status)
 
         return hdd_to_usage
 
-    def print_hdd_info(self, hdd_info: dict) -> None:
+    def print_hdd_info(self, hdd_info: HddRecord) -> None:
         """
         Print info on any available HDDs on the users system
         """
         # Models
-        self.init_table(title='Hard Disks Drives', column_names=['Disk Name', 'Model'])
+        self.init_table(title='Hard Disks Drives', column_names=['Disk Name', 'Model', 'Size'])
 
-        for hdd, details in hdd_info['model'].items():
-            self.table.add_row(hdd, details['model'])
+        sizes = self.format_bytes_bulk(details.size for details in hdd_info.model.values())
+        for (hdd, details), size in zip(hdd_info.model.items(), sizes):
+            self.table.add_row(hdd, details.model, size)
 
         self.print_table()
 
         # Usage
-        self.init_table(title='Disk Usage', column_names=['Device', 'Total', 'Used', 'Free', 'Use %', 'Type', 'Mount'])
+        self.init_table(title='Disk Usage', column_names=['Device', 'Total', 'Used', 'Free', 'Use %', 'Type', 'Mount', 'Status'])
 
-        for device, usage in hdd_info['usage'].items():
+        usages = hdd_info.usage.values()
+        # format the sizes of all partitions at once, three per partition
+        sizes = iter(self.format_bytes_bulk(size for usage in usages for size in (usage.total, usage.used, usage.free)))
+        for (device, usage), total, used, free in zip(hdd_info.usage.items(), sizes, sizes, sizes):
             self.table.add_row(device,
-                               usage['total'],
-                               usage['used'],
-                               usage['free'],
-                               usage['percentage'],
-                               usage['fstype'],
-                               usage['mountpoint'])
+                               total,
+                               used,
+                               free,
+                               str(usage.percent) if usage.percent is not None else '',
+                               usage.fstype,
+                               usage.mountpoint,
+                               usage.status if usage.status == 'ok' else f'[bold yellow]{usage.status}')
 
         self.print_table()
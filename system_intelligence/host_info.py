@@ -1,10 +1,11 @@
 import platform
 import plistlib
-import subprocess
 from pathlib import Path
 from rich import print
 
+from . import timing
 from .base_info import BaseInfo
+from .records import HostRecord
 
 
 class HostInfo(BaseInfo):
@@ -14,14 +15,14 @@ class HostInfo(BaseInfo):
     def __init__(self):
         super().__init__()
 
-    def query_host(self) -> dict:
+    def query_host(self, **_) -> HostRecord:
         """
         Get information about current host.
         """
-        host = {'hostname': platform.node()}
+        host = HostRecord(hostname=platform.node())
         if self.OS == 'darwin':
             # get model identifier from sysctl
-            model = subprocess.check_output(["/usr/sbin/sysctl", "-n", "hw.model"]).strip().decode('utf-8')
+            model = timing.check_output(["/usr/sbin/sysctl", "-n", "hw.model"]).strip().decode('utf-8')
             plist_file_path = Path("/System/Library/PrivateFrameworks/ServerInformation.framework/Versions/A/Resources/"
                                    "en.lproj/SIMachineAttributes.plist")
             # in older versions of MacOS: en.lproj -> English.lproj
@@ -35,16 +36,16 @@ class HostInfo(BaseInfo):
 
             # check, whether the model obtained from sysctl is in the property list file
             if model in plist:
-                host['model marketing name'] = plist[model]["_LOCALIZABLE_"]["marketingModel"]
+                host = host._replace(model=plist[model]["_LOCALIZABLE_"]["marketingModel"])
             else:
-                host['model marketing name'] = model
+                host = host._replace(model=model)
 
         return host
 
-    def print_host_info(self, host):
+    def print_host_info(self, host: HostRecord):
         """
         Print users hostname. Additionally, on MacOS, try to print the model marketing name.
         """
-        print(f'[bold blue]Hostname: {host["hostname"]}')
-        if 'model marketing name' in host.keys():
-            print(f'[bold blue]Model name: {host["model marketing name"]}')
+        print(f'[bold blue]Hostname: {host.hostname}')
+        if host.model is not None:
+            print(f'[bold blue]Model name: {host.model}')
@@ -0,0 +1,230 @@
+"""Render query results as self-contained HTML reports, writing the document section by section."""
+
+import html
+import itertools
+import typing as t
+
+from .base_info import BaseInfo
+from .records import to_builtin
+
+# all styles are inlined, so that reports can be viewed without network access
+STYLE = '''
+body { font-family: sans-serif; font-size: 14px; margin: 2em; color: #222; }
+h1 { font-size: 1.6em; } h2 { font-size: 1.3em; margin-top: 1.5em; border-bottom: 1px solid #ccc; } h3 { font-size: 1.1em; }
+table { border-collapse: collapse; margin: 0.5em 0; }
+th, td { border: 1px solid #ccc; padding: 0.25em 0.6em; text-align: left; vertical-align: top; }
+th { background: #f0f0f0; }
+table.sortable th { cursor: pointer; user-select: none; }
+table.sortable th[aria-sort="ascending"]::after { content: " \\25B2"; }
+table.sortable th[aria-sort="descending"]::after { content: " \\25BC"; }
+tr:nth-child(even) td { background: #fafafa; }
+td.number { text-align: right; font-variant-numeric: tabular-nums; }
+.empty { color: #888; }
+nav.pages { margin: 0.5em 0; } nav.pages button { margin-right: 0.5em; }
+'''
+
+# sorts tables with class sortable by the clicked column (numerically if possible) and shows tables with data-page-size in pages
+SCRIPT = '''
+(function () {
+  function key(cell) {
+    var value = cell.getAttribute('data-sort');
+    if (value === null) { value = cell.textContent.trim(); }
+    var number = parseFloat(value);
+    return isNaN(number) || String(number) !== value ? value.toLowerCase() : number;
+  }
+  function compare(a, b) {
+    if (typeof a === typeof b) { return a < b ? -1 : a > b ? 1 : 0; }
+    return typeof a === 'number' ? -1 : 1;
+  }
+  function paginate(table, page) {
+    var size = parseInt(table.getAttribute('data-page-size'), 10);
+    var rows = table.tBodies[0].rows;
+    if (!size) { return; }
+    var pages = Math.max(1, Math.ceil(rows.length / size));
+    page = Math.min(Math.max(page, 0), pages - 1);
+    table.setAttribute('data-page', page);
+    for (var i = 0; i < rows.length; i++) {
+      rows[i].style.display = Math.floor(i / size) === page ? '' : 'none';
+    }
+    var nav = table.nextElementSibling;
+    nav.querySelector('span').textContent = 'Page ' + (page + 1) + ' of ' + pages + ' (' + rows.length + ' rows)';
+  }
+  document.querySelectorAll('table.sortable').forEach(function (table) {
+    table.querySelectorAll('th').forEach(function (header, column) {
+      header.addEventListener('click', function () {
+        var descending = header.getAttribute('aria-sort') === 'ascending';
+        table.querySelectorAll('th').forEach(function (other) { other.removeAttribute('aria-sort'); });
+        header.setAttribute('aria-sort', descending ? 'descending' : 'ascending');
+        var body = table.tBodies[0];
+        var rows = Array.prototype.slice.call(body.rows);
+        rows.sort(function (a, b) {
+          var order = compare(key(a.cells[column]), key(b.cells[column]));
+          return descending ? -order : order;
+        });
+        rows.forEach(function (row) { body.appendChild(row); });
+        paginate(table, 0);
+      });
+    });
+  });
+  document.querySelectorAll('table[data-page-size]').forEach(function (table) {
+    var nav = table.nextElementSibling;
+    nav.querySelector('.previous').addEventListener('click', function () { paginate(table, parseInt(table.getAttribute('data-page'), 10) - 1); });
+    nav.querySelector('.next').addEventListener('click', function () { paginate(table, parseInt(table.getAttribute('data-page'), 10) + 1); });
+    paginate(table, 0);
+  });
+})();
+'''
+
+# columns of the fleet report: header and function extracting the (raw) value from a snapshot
+FLEET_COLUMNS: t.List[t.Tuple[str, t.Callable[[t.Mapping[str, t.Any]], t.Any]]] = [
+    ('Hostname', lambda snapshot: (snapshot.get('host') or {}).get('hostname')),
+    ('OS', lambda snapshot: snapshot.get('os') or None),
+    ('CPU', lambda snapshot: (snapshot.get('cpu') or {}).get('brand_raw')),
+    ('Cores', lambda snapshot: (snapshot.get('cpu') or {}).get('logical_cores')),
+    ('Clock', lambda snapshot: (snapshot.get('cpu') or {}).get('clock')),
+    ('RAM', lambda snapshot: (snapshot.get('ram') or {}).get('total')),
+    ('GPUs', lambda snapshot: len(snapshot['gpus']) if isinstance(snapshot.get('gpus'), list) else None),
+    ('GPU', lambda snapshot: snapshot['gpus'][0].get('brand') if isinstance(snapshot.get('gpus'), list) and snapshot['gpus'] else None),
+    ('Disks', lambda snapshot: len((snapshot.get('hdd') or {}).get('model') or {}) if snapshot.get('hdd') else None),
+    ('Python', lambda snapshot: ((snapshot.get('software') or {}).get('python') or {}).get('version'))
+]
+
+_formatter = BaseInfo()
+# formatting of the raw values of fleet report columns
+_FLEET_FORMATS: t.Dict[str, t.Callable[[t.Any], str]] = {
+    'Clock': BaseInfo.hz_to_hreadable_string,
+    'RAM': lambda size: _formatter.format_bytes(size, device='ram')
+}
+
+
+def _document_start(write: t.Callable[[str], t.Any], title: str) -> None:
+    write('<!DOCTYPE html>\n<html lang="en">\n<head>\n<meta charset="utf-8">\n')
+    write(f'<title>{html.escape(title)}</title>\n<style>{STYLE}</style>\n</head>\n<body>\n<h1>{html.escape(title)}</h1>\n')
+
+
+def _document_end(write: t.Callable[[str], t.Any]) -> None:
+    write(f'<script>{SCRIPT}</script>\n</body>\n</html>\n')
+
+
+def write_report(info: t.Mapping[str, t.Any], stream: t.TextIO, title: str = 'system-intelligence') -> None:
+    """
+    Write the results of a query as HTML document with one section per scope.
+    Every scope is converted and written on its own, so that the document is never held in memory as a whole.
+    """
+    write = stream.write
+    _document_start(write, title)
+    _write_sections(info, write)
+    _document_end(write)
+
+
+def write_fleet_report(snapshots: t.Iterable[t.Mapping[str, t.Any]],
+                       stream: t.TextIO,
+                       title: str = 'system-intelligence fleet report',
+                       page_size: int = 100,
+                       details: bool = False) -> None:
+    """
+    Write one sortable and paginated table with a row per snapshot (e.g. per host) as HTML document, see FLEET_COLUMNS.
+    If details is set, the full results of every host can be expanded below its hostname.
+
+    Snapshots are consumed one at a time, so that reports over thousands of hosts are written with bounded memory.
+    """
+    write = stream.write
+    _document_start(write, title)
+    write(f'<table class="sortable fleet" data-page-size="{page_size}">\n<thead><tr>')
+    write(''.join(f'<th>{html.escape(header)}</th>' for header, _ in FLEET_COLUMNS))
+    write('</tr></thead>\n<tbody>\n')
+    for snapshot in snapshots:
+        snapshot = to_builtin(snapshot)
+        cells = []
+        for header, extract in FLEET_COLUMNS:
+            value = extract(snapshot)
+            text = _FLEET_FORMATS[header](value) if header in _FLEET_FORMATS and value is not None else _text(value)
+            number = isinstance(value, (int, float)) and not isinstance(value, bool)
+            attributes = f' class="number" data-sort="{value}"' if number else ''
+            if header == 'Hostname' and details:
+                cells.append(f'<td data-sort="{html.escape(text)}"><details><summary>{html.escape(text)}</summary>\n')
+                cells.append(''.join(_section_chunks(snapshot)))
+                cells.append('</details></td>')
+            else:
+                cells.append(f'<td{attributes}>{html.escape(text)}</td>')
+        write('<tr>' + ''.join(cells) + '</tr>\n')
+    write('</tbody>\n</table>\n')
+    write('<nav class="pages"><button class="previous">Previous</button><button class="next">Next</button><span></span></nav>\n')
+    _document_end(write)
+
+
+def _write_sections(info: t.Mapping[str, t.Any], write: t.Callable[[str], t.Any]) -> None:
+    for chunk in _section_chunks(info):
+        write(chunk)
+
+
+def _section_chunks(info: t.Mapping[str, t.Any]) -> t.Iterator[str]:
+    """
+    Render every scope with results as section.
+    """
+    for scope, value in info.items():
+        value = to_builtin(value)
+        if value in ({}, [], None, ''):
+            continue
+        yield f'<section id="{html.escape(str(scope))}">\n<h2>{html.escape(str(scope))}</h2>\n'
+        yield from _render(value)
+        yield '</section>\n'
+
+
+def _render(value: t.Any, depth: int = 3) -> t.Iterator[str]:
+    """
+    Render a value: lists of dictionaries and dictionaries of dictionaries as table with a row per item,
+    dictionaries as table with a row per key (nested dictionaries as sub sections) and everything else as text.
+    """
+    if isinstance(value, list) and value and all(isinstance(item, dict) for item in value):
+        yield from _table(None, value)
+    elif isinstance(value, dict) and value and all(isinstance(item, dict) and item for item in value.values()) \
+            and all(_is_flat(item) for item in value.values()):
+        yield from _table(list(value), list(value.values()))
+    elif isinstance(value, dict):
+        scalars = {key: item for key, item in value.items() if _is_scalar(item)}
+        if scalars:
+            yield '<table>\n'
+            for key, item in scalars.items():
+                yield f'<tr><th>{html.escape(str(key))}</th>{_cell(item)}</tr>\n'
+            yield '</table>\n'
+        for key, item in value.items():
+            if key not in scalars:
+                yield f'<h{min(depth, 6)}>{html.escape(str(key))}</h{min(depth, 6)}>\n'
+                yield from _render(item, depth + 1) if item not in ({}, []) else iter(['<p class="empty">none</p>\n'])
+    else:
+        yield f'<p>{html.escape(_text(value))}</p>\n'
+
+
+def _table(keys: t.Optional[t.List[t.Any]], rows: t.List[t.Dict[str, t.Any]]) -> t.Iterator[str]:
+    """
+    Render rows as sortable table with the union of their keys as columns, preceded by a column of keys if given.
+    """
+    columns = list(dict.fromkeys(itertools.chain.from_iterable(rows)))
+    yield '<table class="sortable">\n<thead><tr>'
+    yield ('<th></th>' if keys is not None else '') + ''.join(f'<th>{html.escape(str(column))}</th>' for column in columns)
+    yield '</tr></thead>\n<tbody>\n'
+    for index, row in enumerate(rows):
+        key = f'<th>{html.escape(str(keys[index]))}</th>' if keys is not None else ''
+        yield '<tr>' + key + ''.join(_cell(row.get(column)) for column in columns) + '</tr>\n'
+    yield '</tbody>\n</table>\n'
+
+
+def _cell(value: t.Any) -> str:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f'<td class="number">{value}</td>'
+    if not _is_scalar(value):
+        return '<td>' + ''.join(_render(value, depth=6)) + '</td>'
+    return f'<td>{html.escape(_text(value))}</td>'
+
+
+def _text(value: t.Any) -> str:
+    return '' if value is None else str(value)
+
+
+def _is_scalar(value: t.Any) -> bool:
+    return not isinstance(value, (dict, list))
+
+
+def _is_flat(value: t.Mapping[str, t.Any]) -> bool:
+    return all(_is_scalar(item) or isinstance(item, dict) and len(item) <= 8 for item in value.values())
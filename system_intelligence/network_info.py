@@ -1,7 +1,91 @@
+import fnmatch
+import os
+import sys
+import time
 import typing as t
 import psutil
 
 from .base_info import BaseInfo
+from .records import NicRecord
+from .sysfs_backend import read_file
+
+# names of the psutil.NIC_DUPLEX_* constants
+DUPLEX_NAMES = {psutil.NIC_DUPLEX_FULL: 'full', psutil.NIC_DUPLEX_HALF: 'half', psutil.NIC_DUPLEX_UNKNOWN: 'unknown'}
+
+
+class NicCounters(t.NamedTuple):
+    """
+    Cumulative traffic counters of a network interface.
+    """
+    rx_bytes: int
+    rx_packets: int
+    rx_errors: int
+    rx_drops: int
+    tx_bytes: int
+    tx_packets: int
+    tx_errors: int
+    tx_drops: int
+
+
+def read_net_dev(root: str = '/') -> t.Dict[str, NicCounters]:
+    """
+    Parse the counters of all network interfaces from a single read of /proc/net/dev.
+    """
+    counters = {}
+    for line in read_file(os.path.join(root, 'proc', 'net', 'dev'), '').splitlines()[2:]:
+        nic, _, values = line.partition(':')
+        fields = values.split()
+        if len(fields) < 12:
+            continue
+        counters[nic.strip()] = NicCounters(*(int(fields[index]) for index in (0, 1, 2, 3, 8, 9, 10, 11)))
+
+    return counters
+
+
+def read_counters(root: str = '/') -> t.Dict[str, NicCounters]:
+    """
+    Read the traffic counters of all network interfaces, from /proc/net/dev on Linux and from psutil otherwise.
+    """
+    if sys.platform.startswith('linux'):
+        return read_net_dev(root)
+
+    return {nic: NicCounters(counters.bytes_recv, counters.packets_recv, counters.errin, counters.dropin,
+                             counters.bytes_sent, counters.packets_sent, counters.errout, counters.dropout)
+            for nic, counters in psutil.net_io_counters(pernic=True).items()}
+
+
+def is_virtual(nic: str, root: str = '/') -> bool:
+    """
+    Check if a network interface is virtual (loopback, veth, bridge, bond, tunnel...), i.e. not backed by a device. Only known on Linux.
+    """
+    net = os.path.join(root, 'sys', 'class', 'net')
+
+    return sys.platform.startswith('linux') and os.path.isdir(os.path.join(net, nic)) and not os.path.exists(os.path.join(net, nic, 'device'))
+
+
+def select_nic(nic: str, include_nics: t.Collection[str] = (), exclude_nics: t.Collection[str] = (), exclude_virtual: bool = False) -> bool:
+    """
+    Check if a network interface passes the include and exclude glob patterns and, if exclude_virtual is set, is no virtual interface.
+    """
+    if include_nics and not any(fnmatch.fnmatchcase(nic, pattern) for pattern in include_nics):
+        return False
+    if any(fnmatch.fnmatchcase(nic, pattern) for pattern in exclude_nics):
+        return False
+
+    return not (exclude_virtual and is_virtual(nic))
+
+
+def compute_rates(before: NicCounters, after: NicCounters, interval: float, speed: int = 0) -> t.Dict[str, float]:
+    """
+    Compute the per second rates of a network interface between two readings of its counters taken interval seconds apart,
+    as the fields of a NicRecord. The utilisation is only known for interfaces with a speed (in Mbit/s).
+    Counters which went backwards (wrapped around or reset) count as unchanged.
+    """
+    delta = NicCounters(*(max(new - old, 0) for old, new in zip(before, after)))
+    rates: t.Dict[str, t.Any] = {f'{name}_per_second': value / interval for name, value in delta._asdict().items()}
+    rates['utilisation'] = min(max(delta.rx_bytes, delta.tx_bytes) * 8 / interval / (speed * 1e4), 100.) if speed else None
+
+    return rates
 
 
 class NetworkInfo(BaseInfo):
@@ -11,32 +95,84 @@ class NetworkInfo(BaseInfo):
 
     def __init__(self):
         super().__init__()
+        self._last: t.Optional[t.Tuple[float, t.Dict[str, NicCounters]]] = None
 
-    def query_network(self) -> t.Dict[t.Any, t.Dict[str, str]]:
+    def query_network(self,
+                      sample_interval: t.Optional[float] = None,
+                      include_nics: t.Collection[str] = (),
+                      exclude_nics: t.Collection[str] = (),
+                      exclude_virtual: bool = False,
+                      **_) -> t.Dict[str, NicRecord]:
         """
         Get information about network.
+
+        If sample_interval is set, the traffic of every interface is sampled over that many seconds as well.
+
+        :param include_nics: only query interfaces whose name matches one of these glob patterns, all by default
+        :param exclude_nics: do not query interfaces whose name matches one of these glob patterns, e.g. veth*
+        :param exclude_virtual: do not query virtual interfaces like loopback, veth and bridges (only on Linux)
         """
-        stats = psutil.net_if_stats()
+        stats = {nic: snicstats for nic, snicstats in psutil.net_if_stats().items()
+                 if select_nic(nic, include_nics=include_nics, exclude_nics=exclude_nics, exclude_virtual=exclude_virtual)}
+        rates: t.Dict[str, t.Dict[str, float]] = {}
+        if sample_interval:
+            self.sample(stats)
+            time.sleep(sample_interval)
+            rates = self.sample(stats)
         final_repr = {}
         for device, snicstats in stats.items():
-            final_repr[device] = {'isup': str(snicstats.isup),
-                                  'duplex': str(snicstats.duplex),
-                                  'speed': str(snicstats.speed),
-                                  'mtu': str(snicstats.mtu)}
+            final_repr[device] = NicRecord(isup=snicstats.isup,
+                                           duplex=int(snicstats.duplex),
+                                           speed=snicstats.speed,
+                                           mtu=snicstats.mtu,
+                                           **rates.get(device, {}))
 
         return final_repr
 
-    def print_network_info(self, network_info):
+    def sample(self, stats: t.Optional[t.Mapping[str, t.Any]] = None) -> t.Dict[str, t.Dict[str, float]]:
+        """
+        Get the traffic rates of every interface since the previous sample, see compute_rates. The first sample is empty.
+
+        The counters of all interfaces are read at once. If stats (like psutil.net_if_stats) is given,
+        only the interfaces listed in it are reported and their speed is used for the utilisation.
+        """
+        now = time.monotonic()
+        counters = read_counters()
+        last, self._last = self._last, (now, counters)
+        if last is None or now <= last[0]:
+            return {}
+
+        rates = {}
+        for nic, after in counters.items():
+            if nic not in last[1] or (stats is not None and nic not in stats):
+                continue
+            rates[nic] = compute_rates(last[1][nic], after, now - last[0], stats[nic].speed if stats is not None else 0)
+
+        return rates
+
+    def print_network_info(self, network_info: t.Mapping[str, NicRecord]):
         """
         Print the network info
         """
-        self.init_table(title='Network Information', column_names=['Network Name', 'Status', 'Duplex', 'Speed', 'mtu'])
+        column_names = ['Network Name', 'Status', 'Duplex', 'Speed', 'mtu']
+        sampled = any(snicstats.rx_bytes_per_second is not None for snicstats in network_info.values())
+        if sampled:
+            column_names += ['Received', 'Sent', 'Packets/s', 'Errors/s', 'Drops/s', 'Util %']
+        self.init_table(title='Network Information', column_names=column_names)
 
         for network, snicstats in network_info.items():
-            self.table.add_row(network,
-                               snicstats['isup'],
-                               snicstats['duplex'],
-                               snicstats['speed'],
-                               snicstats['mtu'])
+            row = [network,
+                   'up' if snicstats.isup else 'down',
+                   DUPLEX_NAMES.get(snicstats.duplex, str(snicstats.duplex)),
+                   f'{snicstats.speed} Mbit/s' if snicstats.speed else '',
+                   str(snicstats.mtu)]
+            if sampled and snicstats.rx_bytes_per_second is not None:
+                row += [f'{self.format_bytes(int(snicstats.rx_bytes_per_second)) or "0 B"}/s',
+                        f'{self.format_bytes(int(snicstats.tx_bytes_per_second)) or "0 B"}/s',
+                        f'{snicstats.rx_packets_per_second + snicstats.tx_packets_per_second:.1f}',
+                        f'{snicstats.rx_errors_per_second + snicstats.tx_errors_per_second:.1f}',
+                        f'{snicstats.rx_drops_per_second + snicstats.tx_drops_per_second:.1f}',
+                        f'{snicstats.utilisation:.1f}' if snicstats.utilisation is not None else '']
+            self.table.add_row(*row)
 
         self.print_table()
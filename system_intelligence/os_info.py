@@ -12,7 +12,7 @@ class OsInfo(BaseInfo):
     def __init__(self):
         super().__init__()
 
-    def query_os(self):
+    def query_os(self, **_):
         """
         Get information about OS.
         """
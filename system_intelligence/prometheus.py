@@ -0,0 +1,293 @@
+"""Serve query results as Prometheus metrics in the OpenMetrics (or the classic text) exposition format."""
+
+import http.server
+import logging
+import threading
+import time
+import typing as t
+
+from .query import create_querier
+
+_LOG = logging.getLogger(__name__)
+
+PREFIX = 'system_intelligence'
+
+OPENMETRICS_CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+TEXT_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# static scopes, whose metrics are rendered once and refreshed in the background; all other metrics are sampled on every scrape
+STATIC_SCOPES = ['host', 'os', 'cpu', 'gpus', 'ram', 'hdd', 'software']
+DYNAMIC_SCOPES = ['cpu', 'ram', 'swap', 'hdd', 'network']
+
+Labels = t.Mapping[str, t.Any]
+
+
+class Metric(t.NamedTuple):
+    """
+    A metric family: its name without prefix, type (gauge or info), help text, unit and samples of labels and values.
+    Names of gauges with a unit end with the unit, e.g. ram_total_bytes. Info metrics always have the value 1.
+    """
+    name: str
+    kind: str
+    help: str
+    samples: t.List[t.Tuple[Labels, float]]
+    unit: str = ''
+
+
+def _escape(value: t.Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(int(value))
+
+
+def render(metrics: t.Iterable[Metric], openmetrics: bool = True) -> str:
+    """
+    Render metric families in the OpenMetrics format or, if openmetrics is not set, the Prometheus text format 0.0.4,
+    which has no info type, so that info metrics are rendered as gauges named like the info samples.
+    """
+    lines = []
+    for metric in metrics:
+        if not metric.samples:
+            continue
+        name = f'{PREFIX}_{metric.name}'
+        sample_name = f'{name}_info' if metric.kind == 'info' else name
+        family = name if openmetrics else sample_name
+        lines.append(f'# HELP {family} {metric.help}')
+        lines.append(f'# TYPE {family} {metric.kind if openmetrics else "gauge"}')
+        if metric.unit and openmetrics:
+            lines.append(f'# UNIT {family} {metric.unit}')
+        for labels, value in metric.samples:
+            label_text = ','.join(f'{key}="{_escape(label)}"' for key, label in labels.items() if label is not None)
+            lines.append(f'{sample_name}{{{label_text}}} {_format_value(value)}' if label_text else f'{sample_name} {_format_value(value)}')
+
+    return '\n'.join(lines) + '\n' if lines else ''
+
+
+def _number(value: t.Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class MetricsCollector:
+    """
+    Collect the metrics of the given scopes. Static metadata (models, versions, sizes) is queried once, rendered and refreshed
+    in the background every static_ttl seconds. Only the dynamic gauges (current CPU clock, usage of memory, swap and disks, network links) are
+    sampled when rendering, so that scrapes stay cheap.
+    """
+
+    def __init__(self, scopes: t.Optional[t.Iterable[str]] = None, static_ttl: float = 3600, **query_kwargs):
+        scopes = set(scopes) if scopes else set(STATIC_SCOPES + DYNAMIC_SCOPES)
+        self.static_scopes = [scope for scope in STATIC_SCOPES if scope in scopes]
+        self.dynamic_scopes = [scope for scope in DYNAMIC_SCOPES if scope in scopes]
+        self.static_ttl = static_ttl
+        self.query_kwargs = query_kwargs
+        self._queriers: t.Dict[str, t.Any] = {}
+        # rendered static metrics per format and the time they were queried
+        self._static: t.Dict[bool, str] = {}
+        self._static_time = -float('inf')
+        self._refresh_lock = threading.Lock()
+
+    def _querier(self, scope: str) -> t.Any:
+        if scope not in self._queriers:
+            self._queriers[scope] = create_querier(scope, monitor=True)
+        return self._queriers[scope]
+
+    def static_metrics(self) -> t.List[Metric]:
+        """
+        Query the static metadata of all static scopes.
+        """
+        metrics = []
+        for scope in self.static_scopes:
+            try:
+                metrics.extend(getattr(self, f'_static_{scope}')(self._querier(scope)))
+            except Exception:
+                _LOG.exception(f'Unable to query static metrics of scope {scope}')
+
+        return metrics
+
+    def dynamic_metrics(self) -> t.List[Metric]:
+        """
+        Sample the current values of all dynamic gauges.
+        """
+        metrics = []
+        for scope in self.dynamic_scopes:
+            try:
+                metrics.extend(getattr(self, f'_dynamic_{scope}')(self._querier(scope)))
+            except Exception:
+                _LOG.exception(f'Unable to sample metrics of scope {scope}')
+
+        return metrics
+
+    def refresh_static(self) -> None:
+        """
+        Query and render the static metrics again.
+        """
+        metrics = self.static_metrics()
+        self._static = {openmetrics: render(metrics, openmetrics) for openmetrics in (True, False)}
+        self._static_time = time.monotonic()
+
+    def collect(self, openmetrics: bool = True) -> str:
+        """
+        Render all metrics. Expired static metrics are refreshed in a background thread, while the previous ones are served.
+        """
+        started = time.perf_counter()
+        if not self._static:
+            with self._refresh_lock:
+                if not self._static:
+                    self.refresh_static()
+        elif time.monotonic() - self._static_time > self.static_ttl and self._refresh_lock.acquire(blocking=False):
+            def refresh() -> None:
+                try:
+                    self.refresh_static()
+                finally:
+                    self._refresh_lock.release()
+            threading.Thread(target=refresh, name='system-intelligence-refresh', daemon=True).start()
+        dynamic = render(self.dynamic_metrics(), openmetrics)
+        duration = Metric('scrape_duration_seconds', 'gauge', 'Time spent collecting the metrics of this scrape.',
+                          [({}, time.perf_counter() - started)], unit='seconds')
+
+        return self._static[openmetrics] + dynamic + render([duration], openmetrics) + ('# EOF\n' if openmetrics else '')
+
+    @staticmethod
+    def _static_host(querier: t.Any) -> t.List[Metric]:
+        host = querier.query_host()
+        return [Metric('host', 'info', 'Hostname and model of the host.', [({'hostname': host.hostname, 'model': host.model}, 1)])]
+
+    @staticmethod
+    def _static_os(querier: t.Any) -> t.List[Metric]:
+        return [Metric('os', 'info', 'Operating system.', [({'platform': querier.query_os()}, 1)])]
+
+    def _static_cpu(self, querier: t.Any) -> t.List[Metric]:
+        cpu = querier.query_cpu(**self.query_kwargs)
+        metrics = [Metric('cpu', 'info', 'Model of the CPU.', [({'brand': cpu.brand_raw, 'vendor': cpu.vendor_id_raw, 'arch': cpu.arch}, 1)])]
+        for name, value, description, unit in [('cpu_logical_cores', cpu.logical_cores, 'Number of logical CPU cores.', ''),
+                                               ('cpu_physical_cores', cpu.physical_cores, 'Number of physical CPU cores.', ''),
+                                               ('cpu_clock_max_hertz', cpu.clock_max, 'Maximum clock rate of the CPU.', 'hertz')]:
+            if _number(value) and value:
+                metrics.append(Metric(name, 'gauge', description, [({}, value)], unit=unit))
+
+        return metrics
+
+    @staticmethod
+    def _static_gpus(querier: t.Any) -> t.List[Metric]:
+        gpus = querier.query_gpus()
+        models = [({'index': index, 'brand': gpu.brand, 'architecture': gpu.architecture, 'compute_capability': gpu.compute_capability}, 1)
+                  for index, gpu in enumerate(gpus)]
+        return [Metric('gpu', 'info', 'Model of a GPU.', models),
+                Metric('gpu_memory_bytes', 'gauge', 'Memory of a GPU.', [({'index': index}, gpu.memory) for index, gpu in enumerate(gpus)],
+                       unit='bytes')]
+
+    @staticmethod
+    def _static_ram(querier: t.Any) -> t.List[Metric]:
+        total = querier.query_ram_total()
+        return [Metric('ram_total_bytes', 'gauge', 'Total memory.', [({}, total)] if _number(total) else [], unit='bytes')]
+
+    @staticmethod
+    def _disk_metrics(disks: t.Mapping[str, t.Any]) -> t.List[Metric]:
+        return [Metric('disk_size_bytes', 'gauge', 'Size of a hard disk.',
+                       [({'device': device, 'model': disk.model}, disk.size) for device, disk in disks.items() if _number(disk.size)], unit='bytes')]
+
+    def _static_hdd(self, querier: t.Any) -> t.List[Metric]:
+        if querier.inventory is not None:
+            # hotplugged disks are tracked from udev events, so the disks are rendered on every scrape instead
+            return []
+        return self._disk_metrics(querier.query_hdd_model())
+
+    def _static_software(self, querier: t.Any) -> t.List[Metric]:
+        software = querier.query_software(**self.query_kwargs)
+        return [Metric('software', 'info', 'Version of an installed program.',
+                       [({'name': name, 'version': program.version}, 1) for name, program in software.items() if program.version])]
+
+    @staticmethod
+    def _dynamic_cpu(querier: t.Any) -> t.List[Metric]:
+        # the current clock changes with frequency scaling
+        clock = querier.query_cpu_clock()[0]
+        return [Metric('cpu_clock_hertz', 'gauge', 'Current clock rate of the CPU.', [({}, int(clock * 10 ** 6))] if clock else [], unit='hertz')]
+
+    @staticmethod
+    def _dynamic_ram(_: t.Any) -> t.List[Metric]:
+        import psutil
+
+        return [Metric('ram_available_bytes', 'gauge', 'Memory available for starting new applications.',
+                       [({}, psutil.virtual_memory().available)], unit='bytes')]
+
+    @staticmethod
+    def _dynamic_swap(_: t.Any) -> t.List[Metric]:
+        import psutil
+
+        swap = psutil.swap_memory()
+        return [Metric('swap_total_bytes', 'gauge', 'Total swap memory.', [({}, swap.total)], unit='bytes'),
+                Metric('swap_used_bytes', 'gauge', 'Used swap memory.', [({}, swap.used)], unit='bytes')]
+
+    def _dynamic_hdd(self, querier: t.Any) -> t.List[Metric]:
+        metrics = self._disk_metrics(querier.inventory.devices) if querier.inventory is not None else []
+        usage = querier.query_hdd_usage(mount_timeout=1.0)
+        labels = {device: {'device': device, 'mountpoint': record.mountpoint, 'fstype': record.fstype} for device, record in usage.items()}
+        # file systems which did not answer in time, like hung network mounts, are reported as not responding
+        metrics.append(Metric('filesystem_responding', 'gauge', 'Whether the usage of a mounted file system could be determined.',
+                              [(labels[device], int(record.status == 'ok')) for device, record in usage.items()]))
+        for name, description in [('total', 'Size'), ('used', 'Used space'), ('free', 'Free space')]:
+            metrics.append(Metric(f'filesystem_{name}_bytes', 'gauge', f'{description} of a mounted file system.',
+                                  [(labels[device], getattr(record, name)) for device, record in usage.items() if record.status == 'ok'], unit='bytes'))
+
+        return metrics
+
+    @staticmethod
+    def _dynamic_network(querier: t.Any) -> t.List[Metric]:
+        nics = querier.query_network()
+        return [Metric('network_up', 'gauge', 'Whether a network interface is up.', [({'interface': nic}, int(stats.isup)) for nic, stats in nics.items()]),
+                Metric('network_speed_bytes_per_second', 'gauge', 'Link speed of a network interface.',
+                       [({'interface': nic}, stats.speed * 125000) for nic, stats in nics.items() if stats.speed], unit='bytes_per_second'),
+                Metric('network_mtu_bytes', 'gauge', 'MTU of a network interface.', [({'interface': nic}, stats.mtu) for nic, stats in nics.items()],
+                       unit='bytes')]
+
+
+class MetricsRequestHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Answer GET /metrics with all metrics, in the OpenMetrics format if the scraper accepts it.
+    """
+    server_version = 'system-intelligence'
+
+    def do_GET(self) -> None:
+        if self.path.split('?')[0] != '/metrics':
+            self._send(404, 'text/plain; charset=utf-8', 'Metrics are served at /metrics\n')
+            return
+        openmetrics = 'application/openmetrics-text' in self.headers.get('Accept', '')
+        self._send(200, OPENMETRICS_CONTENT_TYPE if openmetrics else TEXT_CONTENT_TYPE, self.server.collector.collect(openmetrics))
+
+    def _send(self, status: int, content_type: str, body: str) -> None:
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args) -> None:
+        _LOG.debug(format, *args)
+
+
+def create_server(collector: MetricsCollector, host: str = '0.0.0.0', port: int = 9101) -> http.server.ThreadingHTTPServer:
+    """
+    Create a server answering scrapes with the metrics of collector on host:port.
+    """
+    server = http.server.ThreadingHTTPServer((host, port), MetricsRequestHandler)
+    server.collector = collector  # type: ignore
+
+    return server
+
+
+def serve(host: str = '0.0.0.0', port: int = 9101, scopes: t.Optional[t.Iterable[str]] = None, static_ttl: float = 3600, **query_kwargs) -> None:
+    """
+    Run the exporter until it is interrupted. Static metrics are queried before the first scrape is answered.
+    """
+    collector = MetricsCollector(scopes, static_ttl=static_ttl, **query_kwargs)
+    collector.refresh_static()
+    server = create_server(collector, host=host, port=port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
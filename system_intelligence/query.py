@@ -1,11 +1,19 @@
 """Query and export system data in one step."""
 
-import json
+import contextlib
+import functools
 import pathlib
+import sys
 import typing as t
 import importlib
-from ruamel.yaml import YAML
-from json2html import *  # noqa F403
+from rich import print
+
+from . import timing
+from .records import to_builtin
+from .util.thread_util import run_with_deadlines
+
+if t.TYPE_CHECKING:
+    from .cache import ResultCache
 
 
 def query_and_export(query_scope: set,
@@ -13,70 +21,169 @@ def query_and_export(query_scope: set,
                      export_format: str,
                      generate_html_table: bool,
                      output: t.Any,
+                     timings: bool = False,
+                     delta_baseline: t.Optional[str] = None,
                      **kwargs):
-    """Query the given scope of the system and export results in a given format to a given target."""
-    info = query(query_scope, verbose, **kwargs)
+    """
+    Query the given scope of the system and export results in a given format to a given target.
+    If timings is set, the spans of all scopes and subprocesses are added to the export as 'timings' and all spans are printed as table.
+    If output is '-', the results are written to the standard output and everything else is printed to the standard error.
+    If delta_baseline is set to a previously exported result, only the changes relative to it are exported, see diff.delta.
+    """
+    to_stdout = str(output) == '-'
+    if timings:
+        timing.start_recording()
+    with contextlib.redirect_stdout(sys.stderr) if to_stdout else contextlib.nullcontext():
+        info = query(query_scope, verbose, **kwargs)
+    if timings:
+        info['timings'] = [span.to_dict() for span in timing.recorded()]
+    if output and delta_baseline:
+        from . import export_formats
+        from .diff import delta
+
+        info = delta(export_formats.load(delta_baseline), to_builtin(info))
     if output:
-        output = pathlib.Path(output)
-        export(info, export_format, generate_html_table, output)
+        export(info, export_format, generate_html_table and not to_stdout, output if to_stdout else pathlib.Path(output))
+    if timings:
+        with contextlib.redirect_stdout(sys.stderr) if to_stdout else contextlib.nullcontext():
+            timing.print_timings(timing.stop_recording())
+
+
+# order in which scopes are queried and printed
+SCOPES = ['host', 'os', 'swap', 'network', 'cpu', 'topology', 'gpus', 'ram', 'hdd', 'diskio', 'software']
 
+# scopes which sample rates over an interval; they are not part of 'all' and only queried when selected explicitly
+SAMPLED_SCOPES = {'diskio'}
 
-def query(query_scope: set, verbose: bool, **kwargs) -> t.Any:
+# backends selectable per scope, the first one is the default
+BACKENDS = {
+    'cpu': ['default', 'sysfs'],
+    'ram': ['default', 'sysfs']
+}
+
+
+def query(query_scope: set,
+          verbose: bool,
+          parallel: bool = False,
+          workers: t.Optional[int] = None,
+          timeout: t.Optional[float] = None,
+          backends: t.Optional[t.Mapping[str, str]] = None,
+          options: t.Optional[t.Mapping[str, t.Mapping[str, t.Any]]] = None,
+          **kwargs) -> t.Any:
     """
     Wrap around selected system query functions.
+
+    If parallel is set, all selected scopes are queried at the same time using at most workers threads.
+    Scopes which take longer than timeout seconds are skipped. Results are always printed in the order of SCOPES.
+    backends selects the backend of each scope, e.g. {'cpu': 'sysfs'}; scopes not listed use their default backend.
+    options holds keyword arguments passed on to the query function of a single scope only, e.g. {'hdd': {'mount_timeout': 1}}.
+    If a ResultCache is passed as cache, cached results are used for all scopes with a valid cache entry, unless refresh is set.
+    All other keyword arguments are passed on to the query functions of the scopes.
     """
     info = {'cpu': {},
+            'topology': {},
             'gpus': {},
             'ram': {},
             'host': {},
             'os': {},
             'hdd': {},
+            'diskio': {},
             'swap': {},
             'network': {},
             'software': {}}
     if query_scope == {'all'}:
-        query_scope = ['host', 'os', 'swap', 'network', 'cpu', 'gpus', 'ram', 'hdd', 'software']
+        query_scope = set(SCOPES).difference(SAMPLED_SCOPES)
+    scopes = [scope for scope in SCOPES if scope in query_scope]
+    backends = backends or {}
+    options = options or {}
+    scope_kwargs = {scope: {**kwargs, **options.get(scope, {}), **({'backend': backends[scope]} if scope in backends else {})} for scope in scopes}
 
-    for query in query_scope:
-        querier_class = getattr(importlib.import_module(f'system_intelligence.{query}_info'), f'{query.capitalize()}Info')
-        instance = querier_class()
-        query_info = getattr(instance, f'query_{query}')()
-        info[query] = query_info
+    if not parallel:
+        for scope in scopes:
+            instance, info[scope] = _query_scope(scope, **scope_kwargs[scope])
+            if verbose:
+                getattr(instance, f'print_{scope}_info')(info[scope])
+        return info
 
+    results, errors, expired = run_with_deadlines({scope: functools.partial(_query_scope, scope, **scope_kwargs[scope]) for scope in scopes},
+                                                  workers=workers,
+                                                  timeout=timeout)
+    for scope in scopes:
+        if scope in errors:
+            raise errors[scope]
+        if scope in expired:
+            print(f'[bold yellow]Query of scope {scope} did not finish within {timeout} seconds and was skipped.')
+            continue
+        instance, info[scope] = results[scope]
         if verbose:
-            getattr(instance, f'print_{query}_info')(query_info)
+            getattr(instance, f'print_{scope}_info')(info[scope])
 
     return info
 
 
+def create_querier(scope: str, monitor: bool = False) -> t.Any:
+    """
+    Instantiate the querier class of a scope, e.g. CpuInfo for cpu.
+    If monitor is set, queriers which support it keep their devices up to date from hardware events, for long-running processes.
+    """
+    querier_class = getattr(importlib.import_module(f'system_intelligence.{scope}_info'), f'{scope.capitalize()}Info')
+    querier = querier_class()
+    if monitor and hasattr(querier, 'monitor_devices'):
+        querier.monitor_devices()
+
+    return querier
+
+
+def _query_scope(scope: str, cache: t.Optional['ResultCache'] = None, refresh: bool = False, **kwargs) -> t.Tuple[t.Any, t.Any]:
+    """
+    Instantiate the querier class of a scope and run its query. All other keyword arguments are passed on to the query.
+    If a cache is given, a cached result is returned instead if available, unless refresh is set.
+
+    :return: the querier instance and the queried info
+    """
+    with timing.span('scope', scope, cached=False) as scope_span:
+        instance = create_querier(scope)
+        if cache is not None and not refresh:
+            try:
+                query_info = cache.get(scope, **kwargs)
+                scope_span.attributes['cached'] = True
+                return instance, query_info
+            except KeyError:
+                pass
+        query_info = getattr(instance, f'query_{scope}')(**kwargs)
+        if cache is not None:
+            cache.set(scope, query_info, **kwargs)
+
+    return instance, query_info
+
+
 def export(info, export_format: str, generate_html_table: bool, export_target: t.Any):
     """
-    Export information obtained by system query to a specified format.
+    Export information obtained by system query to a specified format. Records are exported as dictionaries.
+    The export target '-' is the standard output. See export_formats for all formats.
     """
-    if export_format == 'json':
-        with open(str(export_target), 'w', encoding='utf-8') as json_file:
-            json.dump(info, json_file, indent=2, ensure_ascii=False)
-    elif export_format == 'raw':
-        with open(str(export_target), 'a', encoding='utf-8') as text_file:
-            text_file.write(str(info))
-    elif export_format == 'yml':
-        yaml = YAML(typ='safe')
-        yaml.dump(info, export_target)
-    else:
-        raise NotImplementedError(f'format={export_format} target={export_target}')
-    # write HTML Table
+    from . import export_formats
+
+    info = to_builtin(info)
+    with timing.span('export', export_format, target=str(export_target)):
+        with export_formats.open_target(export_target, export_format) as stream:
+            export_formats.write(info, export_format, stream)
     if generate_html_table:
-        html_output_name = f'{export_target}.html' if not str(export_target).endswith('.html') else export_target
-        with open(html_output_name, 'w', encoding='utf-8') as html_file:
-            json_formatted = json.dumps(info, indent=2, ensure_ascii=False)
-            html_table = json2html.convert(json=json_formatted,  # noqa F405
-                                           table_attributes="id=\"system-intelligence\""
-                                           + "class=\"table table-condensed table-bordered table-hover\"")
-            html_file.write('<!DOCTYPE html>\n')
-            html_file.write('<html lang="en">\n')
-            html_file.write('<link href="https://stackpath.bootstrapcdn.com/bootstrap/4.5.0/css/bootstrap.min.css"'
-                            + 'rel="stylesheet"'
-                            + ' integrity="sha384-9aIt2nRpC12Uk9gS9baDl411NQApFmC26EwAOH8WgZl5MYYxFfc+NcPb1dKGj7Sk"'
-                            + ' crossorigin="anonymous">\n')
-
-            html_file.write(html_table)
+        with timing.span('export', 'html'):
+            from .html_report import write_report
+
+            html_output_name = f'{export_target}.html' if not str(export_target).endswith('.html') else export_target
+            with open(html_output_name, 'w', encoding='utf-8') as html_file:
+                write_report(info, html_file)
+
+
+def export_batch(snapshots: t.Iterable[t.Any], export_format: str, export_target: t.Any) -> None:
+    """
+    Export the results of many queries, e.g. of many nodes, at once. The export target '-' is the standard output.
+    Parquet exports are written as one table with a row per snapshot, see export_formats.write_batch.
+    """
+    from . import export_formats
+
+    with timing.span('export', export_format, target=str(export_target), batch=True):
+        with export_formats.open_target(export_target, export_format) as stream:
+            export_formats.write_batch((to_builtin(info) for info in snapshots), export_format, stream)
@@ -0,0 +1,296 @@
+"""
+Typed records holding the results of the queriers.
+
+Values are kept as numbers in base units (bytes, Hz, Mbit/s), human readable formatting only happens when printing.
+Records are NamedTuples, which are immutable and store no per-instance __dict__.
+Use to_builtin to convert results into plain dictionaries and lists (e.g. for JSON) and from_builtin to convert them back.
+"""
+
+import typing as t
+
+# increased whenever records change incompatibly, so that results cached with older versions are discarded
+# 2: sizes are always bytes, pre-formatted strings are parsed by base_info.parse_bytes
+SCHEMA_VERSION = 2
+
+# sizes in bytes
+Size = t.Optional[int]
+
+
+class CpuRecord(t.NamedTuple):
+    """
+    CPU model, cores, clock frequencies in Hz and cache sizes in bytes.
+    """
+    vendor_id_raw: t.Optional[str] = None
+    hardware_raw: t.Optional[str] = None
+    brand_raw: t.Optional[str] = None
+    arch: t.Optional[str] = None
+    logical_cores: t.Optional[int] = None
+    physical_cores: t.Optional[int] = None
+    clock: t.Optional[int] = None
+    clock_min: t.Optional[int] = None
+    clock_max: t.Optional[int] = None
+    l1_cache: Size = None
+    l2_cache: Size = None
+    l3_cache: Size = None
+
+
+class GpuRecord(t.NamedTuple):
+    """
+    GPU model, memory in bytes and clock rates as reported by CUDA.
+    """
+    architecture: str
+    brand: str
+    compute_capability: float
+    memory: int
+    memory_clock: int
+    clock: int
+    multiprocessors: int
+    cores: t.Optional[int]
+    warp_size: int
+
+
+class RamBankRecord(t.NamedTuple):
+    """
+    A RAM bank (slot) with its memory in bytes and clock in Hz.
+    """
+    slot: t.Optional[str] = None
+    product: t.Optional[str] = None
+    vendor: t.Optional[str] = None
+    serial: t.Optional[str] = None
+    description: t.Optional[str] = None
+    memory: Size = None
+    clock: t.Union[int, str, None] = None
+
+
+class RamCacheRecord(t.NamedTuple):
+    """
+    A memory cache with its capacity in bytes.
+    """
+    slot: t.Optional[str] = None
+    physid: t.Optional[str] = None
+    capacity: Size = None
+
+
+class RamRecord(t.NamedTuple):
+    """
+    Total (and online) memory in bytes, RAM banks and caches.
+    """
+    total: t.Optional[int] = None
+    banks: t.Sequence[RamBankRecord] = ()
+    cache: t.Sequence[RamCacheRecord] = ()
+    online: t.Optional[int] = None
+
+
+class DiskRecord(t.NamedTuple):
+    """
+    A hard disk with its size in bytes.
+    """
+    size: t.Optional[int] = None
+    model: str = ''
+
+
+class DiskUsageRecord(t.NamedTuple):
+    """
+    Usage of a mounted partition in bytes and percent.
+    status is ok, or error, timeout, stalled or skipped if the usage could not be determined (see HddInfo.query_hdd_usage).
+    """
+    total: t.Optional[int] = None
+    used: t.Optional[int] = None
+    free: t.Optional[int] = None
+    percent: t.Optional[float] = None
+    fstype: str = ''
+    mountpoint: str = ''
+    status: str = 'ok'
+
+
+class HddRecord(t.NamedTuple):
+    """
+    Hard disks and the usage of mounted partitions by device.
+    """
+    model: t.Dict[str, DiskRecord]
+    usage: t.Dict[str, DiskUsageRecord]
+
+
+class DiskIoRecord(t.NamedTuple):
+    """
+    I/O rates of a disk averaged over a sampling interval: operations and bytes per second, the average time in seconds
+    a read or write took (None without any), the average number of queued requests and the percentage of time the disk was busy.
+    """
+    reads_per_second: float
+    writes_per_second: float
+    read_bytes_per_second: float
+    write_bytes_per_second: float
+    read_await: t.Optional[float] = None
+    write_await: t.Optional[float] = None
+    queue_size: t.Optional[float] = None
+    utilisation: t.Optional[float] = None
+
+
+class NicRecord(t.NamedTuple):
+    """
+    State of a network interface, its speed in Mbit/s and its MTU in bytes.
+    If the interface was sampled, received (rx) and transmitted (tx) bytes, packets, errors and drops per second
+    and the utilisation of the link in percent of its speed (by the busier direction) as well.
+    """
+    isup: bool
+    duplex: int
+    speed: int
+    mtu: int
+    rx_bytes_per_second: t.Optional[float] = None
+    tx_bytes_per_second: t.Optional[float] = None
+    rx_packets_per_second: t.Optional[float] = None
+    tx_packets_per_second: t.Optional[float] = None
+    rx_errors_per_second: t.Optional[float] = None
+    tx_errors_per_second: t.Optional[float] = None
+    rx_drops_per_second: t.Optional[float] = None
+    tx_drops_per_second: t.Optional[float] = None
+    utilisation: t.Optional[float] = None
+
+
+class CpuCacheRecord(t.NamedTuple):
+    """
+    A CPU cache with its level, type (Data, Instruction or Unified), size in bytes and the logical CPUs sharing it.
+    """
+    level: int
+    type: str
+    size: t.Optional[int]
+    cpus: t.Tuple[int, ...]
+
+
+class CoreRecord(t.NamedTuple):
+    """
+    A physical core and its logical CPUs (SMT siblings).
+    """
+    id: int
+    cpus: t.Tuple[int, ...]
+
+
+class PackageRecord(t.NamedTuple):
+    """
+    A socket with its logical CPUs, cores and caches.
+    """
+    id: int
+    cpus: t.Tuple[int, ...]
+    cores: t.Tuple[CoreRecord, ...]
+    caches: t.Tuple[CpuCacheRecord, ...]
+
+
+class NumaNodeRecord(t.NamedTuple):
+    """
+    A NUMA node with its logical CPUs, its memory in bytes and its distances to all nodes in the order of the nodes (10 is local).
+    """
+    id: int
+    cpus: t.Tuple[int, ...]
+    memory: t.Optional[int]
+    distances: t.Tuple[int, ...]
+
+
+class DeviceLocalityRecord(t.NamedTuple):
+    """
+    A network interface (kind net), disk (block) or other PCI device (pci) with its PCI address and class,
+    the NUMA node it is attached to (None if unknown) and the logical CPUs local to it.
+    """
+    kind: str
+    name: str
+    pci_address: t.Optional[str] = None
+    pci_class: t.Optional[str] = None
+    numa_node: t.Optional[int] = None
+    cpus: t.Tuple[int, ...] = ()
+
+
+class TopologyRecord(t.NamedTuple):
+    """
+    Sockets, NUMA nodes and the NUMA locality of devices, whether SMT is active and the online logical CPUs.
+    """
+    packages: t.Tuple[PackageRecord, ...] = ()
+    nodes: t.Tuple[NumaNodeRecord, ...] = ()
+    devices: t.Tuple[DeviceLocalityRecord, ...] = ()
+    smt: t.Optional[bool] = None
+    online: t.Tuple[int, ...] = ()
+
+
+class HostRecord(t.NamedTuple):
+    """
+    Hostname and, on MacOS, the marketing name of the model.
+    """
+    hostname: str
+    model: t.Optional[str] = None
+
+
+class SoftwareRecord(t.NamedTuple):
+    """
+    Path and version of a program. For python, the versions of the relevant installed packages by name as well.
+    status is ok, or timeout if the version query was killed after probe_timeout seconds (see SoftwareInfo.query_software).
+    """
+    path: t.Optional[str] = None
+    version: t.Optional[str] = None
+    packages: t.Optional[t.Dict[str, str]] = None
+    status: str = 'ok'
+
+
+def to_builtin(value: t.Any) -> t.Any:
+    """
+    Recursively convert records into dictionaries and tuples into lists.
+    """
+    if isinstance(value, tuple):
+        if hasattr(value, '_fields'):
+            return {name: to_builtin(item) for name, item in zip(value._fields, value)}
+        return [to_builtin(item) for item in value]
+    if isinstance(value, list):
+        return [to_builtin(item) for item in value]
+    if isinstance(value, dict):
+        return {key: to_builtin(item) for key, item in value.items()}
+    return value
+
+
+def _ram_from_builtin(value: t.Mapping[str, t.Any]) -> RamRecord:
+    return RamRecord(total=value['total'],
+                     banks=tuple(RamBankRecord(**bank) for bank in value['banks']),
+                     cache=tuple(RamCacheRecord(**cache) for cache in value['cache']),
+                     online=value.get('online'))
+
+
+def _hdd_from_builtin(value: t.Mapping[str, t.Any]) -> HddRecord:
+    return HddRecord(model={device: DiskRecord(**disk) for device, disk in value['model'].items()},
+                     usage={device: DiskUsageRecord(**usage) for device, usage in value['usage'].items()})
+
+
+def _topology_from_builtin(value: t.Mapping[str, t.Any]) -> TopologyRecord:
+    return TopologyRecord(packages=tuple(PackageRecord(id=package['id'],
+                                                       cpus=tuple(package['cpus']),
+                                                       cores=tuple(CoreRecord(id=core['id'], cpus=tuple(core['cpus'])) for core in package['cores']),
+                                                       caches=tuple(CpuCacheRecord(**{**cache, 'cpus': tuple(cache['cpus'])}) for cache in package['caches']))
+                                         for package in value['packages']),
+                          nodes=tuple(NumaNodeRecord(id=node['id'], cpus=tuple(node['cpus']), memory=node['memory'], distances=tuple(node['distances']))
+                                      for node in value['nodes']),
+                          devices=tuple(DeviceLocalityRecord(**{**device, 'cpus': tuple(device['cpus'])}) for device in value['devices']),
+                          smt=value['smt'],
+                          online=tuple(value['online']))
+
+
+# functions converting the builtin representation of a scope's result back into records
+_FROM_BUILTIN: t.Dict[str, t.Callable[[t.Any], t.Any]] = {
+    'cpu': lambda value: CpuRecord(**value),
+    'gpus': lambda value: [GpuRecord(**gpu) for gpu in value],
+    'ram': _ram_from_builtin,
+    'hdd': _hdd_from_builtin,
+    'diskio': lambda value: {device: DiskIoRecord(**rates) for device, rates in value.items()},
+    'network': lambda value: {nic: NicRecord(**stats) for nic, stats in value.items()},
+    'topology': _topology_from_builtin,
+    'host': lambda value: HostRecord(**value),
+    'software': lambda value: {program: SoftwareRecord(**software) for program, software in value.items()}
+}
+
+
+def from_builtin(scope: str, value: t.Any) -> t.Any:
+    """
+    Convert the result of a scope converted with to_builtin back into records.
+
+    :raise TypeError: if value does not match the records of the scope
+    """
+    if scope not in _FROM_BUILTIN:
+        return value
+    try:
+        return _FROM_BUILTIN[scope](value)
+    except (AttributeError, KeyError) as err:
+        raise TypeError(f'{value!r} is no valid result of scope {scope}') from err
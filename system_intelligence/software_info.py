@@ -1,12 +1,32 @@
+import functools
 import logging
+import pathlib
+import re
 import shutil
 import subprocess
+import sys
 import typing as t
+from rich import print
 
+from . import timing
 from .base_info import BaseInfo
+from .records import SoftwareRecord
+from .util.process_util import kill_process_tree, new_process_group_kwargs
+from .util.thread_util import run_with_deadlines
 
 _LOG = logging.getLogger(__name__)
 
+try:
+    from importlib import metadata as importlib_metadata
+except ImportError:
+    try:
+        import importlib_metadata
+    except ImportError:
+        importlib_metadata = None
+
+# seconds after which a hanging version query is killed
+DEFAULT_PROBE_TIMEOUT = 10.0
+
 
 class SoftwareInfo(BaseInfo):
     """
@@ -33,13 +53,24 @@ class SoftwareInfo(BaseInfo):
             'pandas', 'pycuda', 'pyopencl', 'scikit-learn', 'scipy', 'tensorflow', 'pytorch',
             'xgboost'
         }
+        self.timed_out_probes: t.List[str] = []
 
-    def query_software(self):
+    def query_software(self,
+                       workers: t.Optional[int] = None,
+                       probe_timeout: t.Optional[float] = DEFAULT_PROBE_TIMEOUT,
+                       python_env: t.Optional[str] = None,
+                       pip_freeze: bool = False,
+                       **_) -> t.Dict[str, SoftwareRecord]:
         """
         Get information about relevant software.
+
+        All version queries are run at the same time using at most workers threads.
+        Queries which take longer than probe_timeout seconds are killed and reported.
+        See query_python_packages for python_env and pip_freeze.
         """
         no_path_exceptions = ['mkl']
-        software_info = {}
+        paths = {}
+        probes = {}
         for program, version_tuple in self.VERSION_QUERY_FLAGS.items():
             path = shutil.which(program)
             if path is None and program not in no_path_exceptions:
@@ -51,26 +82,49 @@ class SoftwareInfo(BaseInfo):
             else:
                 cmd = [program, version_flag]
             _LOG.debug(f'running "{cmd}"')
-            version = SoftwareInfo._run_version_query(cmd, version_tuple[1])
-            software_info[program] = {'path': path, 'version': version}
+            paths[program] = path
+            probes[program] = functools.partial(SoftwareInfo._run_version_query, cmd, version_tuple[1], probe_timeout)
 
+        versions, errors, _ = run_with_deadlines(probes, workers=workers)
+        self.timed_out_probes = [program for program, error in errors.items() if isinstance(error, subprocess.TimeoutExpired)]
+        if self.timed_out_probes:
+            print(f'[bold yellow]Version queries of {", ".join(self.timed_out_probes)} did not finish within {probe_timeout} seconds and were killed.')
+        for program, error in errors.items():
+            if not isinstance(error, subprocess.TimeoutExpired):
+                raise error
+
+        software_info = {program: SoftwareRecord(path=path, version=versions.get(program),
+                                                 status='timeout' if program in self.timed_out_probes else 'ok')
+                         for program, path in paths.items()}
         # python packages
-        self.query_python_packages(software_info)
+        python = software_info.get('python', SoftwareRecord())
+        software_info['python'] = python._replace(packages=self.query_python_packages(python_env=python_env, pip_freeze=pip_freeze))
 
         return software_info
 
     @staticmethod
-    def _run_version_query(cmd, version_line=None) -> t.Optional[str]:
+    def _run_version_query(cmd, version_line=None, timeout: t.Optional[float] = None) -> t.Optional[str]:
+        """
+        Run a version query and extract the version from its output.
+
+        Raises subprocess.TimeoutExpired after killing the query (and anything it spawned) if it took longer than timeout seconds.
+        """
         # shell is currently only required to obtain the mkl version
         shell_required = True if len(cmd) < 2 or isinstance(cmd, str) else False
-        try:
-            result, error = subprocess.Popen(cmd, universal_newlines=True, shell=shell_required,
-                                             stdout=subprocess.PIPE, stderr=subprocess.PIPE).communicate()
-        except(subprocess.TimeoutExpired, subprocess.CalledProcessError):
-            return None
-        # this could be the case, for example, if a command was malformed
-        except FileNotFoundError:
-            return None
+        with timing.span('subprocess', cmd[0].split()[0], command=' '.join(cmd)) as probe_span:
+            try:
+                process = subprocess.Popen(cmd, universal_newlines=True, shell=shell_required,
+                                           stdout=subprocess.PIPE, stderr=subprocess.PIPE, **new_process_group_kwargs())
+            # this could be the case, for example, if a command was malformed
+            except FileNotFoundError:
+                return None
+            try:
+                result, error = process.communicate(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                kill_process_tree(process)
+                raise
+            finally:
+                probe_span.attributes['returncode'] = process.returncode
         version_raw = result
         # it was not possible to obtain some results from the version call
         if not version_raw:
@@ -88,41 +142,115 @@ class SoftwareInfo(BaseInfo):
             version = version_raw
         return version
 
-    def query_python_packages(self, software_info: dict) -> None:
+    def query_python_packages(self, python_env: t.Optional[str] = None, pip_freeze: bool = False) -> t.Dict[str, str]:
         """
         Query versions of the python packages (if installed)
+
+        By default, the metadata of the installed distributions is read in-process.
+        python_env may point to a virtualenv or python interpreter to query instead of the running interpreter.
+        If pip_freeze is set (or importlib.metadata is not available), 'pip freeze' of that interpreter is run instead.
+
+        :return: versions of the installed python packages important for SI by package name
+        """
+        if pip_freeze or importlib_metadata is None:
+            installed_packages = self._query_installed_packages_pip(python_env)
+        else:
+            installed_packages = self._query_installed_packages_metadata(python_env)
+        # for every package important for SI, add its version number if it is installed
+        return {package: installed_packages[canonical_name]
+                for package, canonical_name in ((package, _canonicalize_name(package)) for package in sorted(self.PYTHON_PACKAGES))
+                if canonical_name in installed_packages}
+
+    def _query_installed_packages_metadata(self, python_env: t.Optional[str] = None) -> t.Dict[str, str]:
+        """
+        Look up the versions of the python packages important for SI in the distribution metadata.
+
+        :return: versions of the installed packages by canonical package name
+        """
+        search_path = sys.path if python_env is None else [str(path) for path in _find_site_packages(python_env)]
+        if not search_path:
+            print(f'[bold yellow]Unable to find the site-packages of {python_env}. Python package information may be limited.')
+        wanted = {_canonicalize_name(package) for package in self.PYTHON_PACKAGES}
+        installed_packages: t.Dict[str, str] = {}
+        # distributions(name=...) only normalizes names since Python 3.10, so names are matched here;
+        # like the import system, the first distribution on the search path wins
+        for distribution in importlib_metadata.distributions(path=search_path):
+            name = _distribution_name(distribution)
+            if name and _canonicalize_name(name) in wanted:
+                installed_packages.setdefault(_canonicalize_name(name), distribution.version)
+
+        return installed_packages
+
+    @staticmethod
+    def _query_installed_packages_pip(python_env: t.Optional[str] = None) -> t.Dict[str, str]:
+        """
+        Get all packages installed to an environment via pip freeze.
+
+        :return: versions of the installed packages by canonical package name
         """
-        py_packages = {}
-        # get all packages installed to the current env
-        packages = subprocess.check_output(['python', '-m', 'pip', 'freeze']).decode('utf-8').split('\n')
+        interpreter = sys.executable if python_env is None else str(_find_interpreter(python_env))
+        packages = timing.check_output([interpreter, '-m', 'pip', 'freeze']).decode('utf-8').split('\n')
         # split every package into its name and version number
-        package_set = {package[0]: package[1] for package in [s.split("==") for s in packages] if len(package) == 2}
-        # for every installed package, check whether its a package important for SI
-        # if this is the case, add it's name and version number to the installed python packages displayed by SI
-        for package in package_set.keys():
-            if package in self.PYTHON_PACKAGES:
-                version = package_set[package]
-                py_packages[package] = {'version': version}
-        software_info['python']['packages'] = py_packages
-
-    def print_software_info(self, software_info: dict):
+        return {_canonicalize_name(package[0]): package[1] for package in [s.split("==") for s in packages] if len(package) == 2}
+
+    def print_software_info(self, software_info: t.Mapping[str, SoftwareRecord]):
         """
         Print info of some software available on the users system
         """
         self.init_table(title='Installed Software', column_names=['Name', 'Path', 'Version'])
 
-        for software_name, path_version in software_info.items():
-            self.table.add_row(software_name, path_version['path'], path_version['version'])
+        for software_name, software in software_info.items():
+            self.table.add_row(software_name, software.path, 'timed out' if software.status == 'timeout' else software.version)
 
         self.print_table()
 
-        self.init_table(title='Python Packages', column_names=['Name', 'Version'])
-        if software_info['python']['packages'].items():
-            for package, version in software_info['python']['packages'].items():
-                try:
-                    package_version = version['version'].split('==')[1]
-                except IndexError:
-                    package_version = version['version']
-                self.table.add_row(package, package_version)
+        packages = software_info['python'].packages if 'python' in software_info else None
+        if packages:
+            self.init_table(title='Python Packages', column_names=['Name', 'Version'])
+            for package, version in packages.items():
+                self.table.add_row(package, version)
 
             self.print_table()
+
+
+def _canonicalize_name(name: str) -> str:
+    """
+    Normalize a python package name as specified by PEP 503, e.g. 'Scikit_Learn' -> 'scikit-learn'.
+    """
+    return re.sub(r'[-_.]+', '-', name).lower()
+
+
+def _distribution_name(distribution: t.Any) -> t.Optional[str]:
+    """
+    Get the name of a distribution from the Name header of its metadata, without parsing all of it like distribution.metadata does.
+    """
+    metadata = distribution.read_text('METADATA') or distribution.read_text('PKG-INFO') or ''
+    match = re.search(r'^Name:\s*(\S+)', metadata, re.MULTILINE)
+
+    return match.group(1) if match else None
+
+
+def _find_interpreter(python_env: str) -> pathlib.Path:
+    """
+    Get the python interpreter of a virtualenv. A path to an interpreter is returned as is.
+    """
+    path = pathlib.Path(python_env)
+    if not path.is_dir():
+        return path
+    for interpreter in (path / 'bin' / 'python', path / 'Scripts' / 'python.exe'):
+        if interpreter.exists():
+            return interpreter
+    raise FileNotFoundError(f'No python interpreter found in {python_env}')
+
+
+def _find_site_packages(python_env: str) -> t.List[pathlib.Path]:
+    """
+    Get the site-packages directories of a virtualenv or of the environment a python interpreter belongs to.
+    """
+    prefix = pathlib.Path(python_env)
+    if not prefix.is_dir():
+        # <prefix>/bin/python, <prefix>\Scripts\python.exe or <prefix>\python.exe
+        prefix = prefix.parent.parent if prefix.parent.name in {'bin', 'Scripts'} else prefix.parent
+    patterns = ['lib/python*/site-packages', 'lib/python*/dist-packages', 'lib64/python*/site-packages', 'Lib/site-packages']
+
+    return [path for pattern in patterns for path in sorted(prefix.glob(pattern))]
@@ -0,0 +1,501 @@
+"""Store snapshots of many hosts in an indexed SQLite database and search them."""
+
+import json
+import os
+import pathlib
+import re
+import sqlite3
+import sys
+import time
+import typing as t
+
+from .records import to_builtin
+
+# increased whenever the tables change incompatibly
+STORE_VERSION = 1
+
+_SCHEMA = '''
+CREATE TABLE snapshots (id INTEGER PRIMARY KEY, hostname TEXT, collected REAL NOT NULL, fingerprint TEXT NOT NULL UNIQUE,
+                        source TEXT, os TEXT, swap INTEGER, gpus INTEGER, disks INTEGER);
+CREATE INDEX snapshots_hostname ON snapshots (hostname, collected);
+CREATE TABLE latest (hostname TEXT PRIMARY KEY, snapshot_id INTEGER NOT NULL, collected REAL NOT NULL) WITHOUT ROWID;
+CREATE UNIQUE INDEX latest_snapshot ON latest (snapshot_id);
+CREATE TABLE cpu (snapshot_id INTEGER PRIMARY KEY, vendor TEXT, brand TEXT, arch TEXT, cores INTEGER, physical_cores INTEGER,
+                  clock INTEGER, clock_max INTEGER);
+CREATE INDEX cpu_brand ON cpu (brand);
+CREATE TABLE ram (snapshot_id INTEGER PRIMARY KEY, total INTEGER, banks INTEGER);
+CREATE INDEX ram_total ON ram (total);
+CREATE TABLE ram_banks (snapshot_id INTEGER NOT NULL, slot TEXT, product TEXT, vendor TEXT, memory INTEGER, clock INTEGER);
+CREATE INDEX ram_banks_snapshot ON ram_banks (snapshot_id);
+CREATE TABLE disks (snapshot_id INTEGER NOT NULL, device TEXT, model TEXT, size INTEGER);
+CREATE INDEX disks_snapshot ON disks (snapshot_id);
+CREATE TABLE gpus (snapshot_id INTEGER NOT NULL, brand TEXT, architecture TEXT, memory INTEGER, compute_capability REAL);
+CREATE INDEX gpus_snapshot ON gpus (snapshot_id);
+CREATE TABLE software (snapshot_id INTEGER NOT NULL, name TEXT NOT NULL, version TEXT, version_key TEXT);
+CREATE INDEX software_snapshot ON software (snapshot_id, name, version_key);
+CREATE INDEX software_version ON software (name, version_key);
+CREATE TABLE packages (snapshot_id INTEGER NOT NULL, name TEXT NOT NULL, version TEXT, version_key TEXT);
+CREATE INDEX packages_snapshot ON packages (snapshot_id, name, version_key);
+CREATE INDEX packages_version ON packages (name, version_key);
+'''
+
+
+class Field(t.NamedTuple):
+    """
+    A searchable value: the table and column it is stored in and its kind (text, number, size, clock or version).
+    """
+    table: str
+    column: str
+    kind: str
+
+
+FIELDS = {
+    'hostname': Field('snapshots', 'hostname', 'text'),
+    'collected': Field('snapshots', 'collected', 'number'),
+    'os': Field('snapshots', 'os', 'text'),
+    'swap': Field('snapshots', 'swap', 'size'),
+    'gpus': Field('snapshots', 'gpus', 'number'),
+    'disks': Field('snapshots', 'disks', 'number'),
+    'cpu.vendor': Field('cpu', 'vendor', 'text'),
+    'cpu.brand': Field('cpu', 'brand', 'text'),
+    'cpu.arch': Field('cpu', 'arch', 'text'),
+    'cpu.cores': Field('cpu', 'cores', 'number'),
+    'cpu.physical_cores': Field('cpu', 'physical_cores', 'number'),
+    'cpu.clock': Field('cpu', 'clock', 'clock'),
+    'cpu.clock_max': Field('cpu', 'clock_max', 'clock'),
+    'ram.total': Field('ram', 'total', 'size'),
+    'ram.banks': Field('ram', 'banks', 'number'),
+    'bank.slot': Field('ram_banks', 'slot', 'text'),
+    'bank.product': Field('ram_banks', 'product', 'text'),
+    'bank.vendor': Field('ram_banks', 'vendor', 'text'),
+    'bank.memory': Field('ram_banks', 'memory', 'size'),
+    'bank.clock': Field('ram_banks', 'clock', 'clock'),
+    'disk.device': Field('disks', 'device', 'text'),
+    'disk.model': Field('disks', 'model', 'text'),
+    'disk.size': Field('disks', 'size', 'size'),
+    'gpu.brand': Field('gpus', 'brand', 'text'),
+    'gpu.architecture': Field('gpus', 'architecture', 'text'),
+    'gpu.memory': Field('gpus', 'memory', 'size'),
+    'gpu.compute_capability': Field('gpus', 'compute_capability', 'number')
+}
+
+# tables holding any number of rows per snapshot
+_MULTI_ROW_TABLES = {'ram_banks', 'disks', 'gpus', 'software', 'packages'}
+
+_FILTER = re.compile(r'^(?P<field>[^<>=!~\s]+)\s*(?:(?P<op><=|>=|!=|=|<|>|~)\s*(?P<value>.*))?$')
+_QUANTITY = re.compile(r'^\s*(?P<number>[0-9]*\.?[0-9]+)\s*(?P<prefix>[kKMGTP]?)(?P<binary>i?)(?:B|Hz)?\s*$')
+_PREFIXES = {'': 0, 'k': 1, 'K': 1, 'M': 2, 'G': 3, 'T': 4, 'P': 5}
+_VERSION = re.compile(r'\d+(?:\.\d+)*')
+
+
+class Filter(t.NamedTuple):
+    """
+    A condition like ram.total<64GiB. Without op and value, the field only has to exist (e.g. software.nvcc).
+    ~ matches text against a glob pattern, like cpu.brand~*EPYC*.
+    """
+    field: str
+    op: t.Optional[str] = None
+    value: t.Optional[str] = None
+
+
+class Aggregate(t.NamedTuple):
+    """
+    Number of snapshots and minimum, maximum and mean of a field's values, per group if grouped.
+    """
+    group: t.Any
+    count: int
+    minimum: t.Any
+    maximum: t.Any
+    mean: t.Optional[float]
+
+
+def default_store_path() -> pathlib.Path:
+    """
+    Get the path of the snapshot store. Can be overwritten with the environment variable SYSTEM_INTELLIGENCE_STORE.
+    """
+    if 'SYSTEM_INTELLIGENCE_STORE' in os.environ:
+        return pathlib.Path(os.environ['SYSTEM_INTELLIGENCE_STORE'])
+    if sys.platform == 'win32' and 'LOCALAPPDATA' in os.environ:
+        return pathlib.Path(os.environ['LOCALAPPDATA'], 'system-intelligence', 'snapshots.db')
+    return pathlib.Path(os.environ.get('XDG_DATA_HOME', pathlib.Path.home() / '.local' / 'share'), 'system-intelligence', 'snapshots.db')
+
+
+def parse_filter(text: str) -> Filter:
+    """
+    Parse a filter like software.gcc<10, ram.total>=64GiB or hostname~node0*.
+
+    :raise ValueError: if the filter is malformed or its field unknown
+    """
+    match = _FILTER.match(text.strip())
+    if not match:
+        raise ValueError(f'Malformed filter {text!r}')
+    search_filter = Filter(match['field'], match['op'], match['value'])
+    field(search_filter.field)
+    if search_filter.op and search_filter.op != '~' and field(search_filter.field).kind in {'number', 'size', 'clock'}:
+        parse_quantity(search_filter.value)
+    if search_filter.op and search_filter.op != '~' and field(search_filter.field).kind == 'version' and not version_key(search_filter.value):
+        raise ValueError(f'No version in filter {text!r}')
+
+    return search_filter
+
+
+def field(name: str) -> Field:
+    """
+    Get a field by name. software.NAME is the version of a program, package.NAME the version of a python package.
+
+    :raise ValueError: if there is no such field
+    """
+    if name in FIELDS:
+        return FIELDS[name]
+    scope, _, program = name.partition('.')
+    if scope in {'software', 'package'} and program:
+        return Field('software' if scope == 'software' else 'packages', 'version_key', 'version')
+    raise ValueError(f'Unknown field {name!r}, choose from {", ".join(FIELDS)}, software.NAME or package.NAME')
+
+
+def parse_quantity(text: t.Optional[str]) -> float:
+    """
+    Parse a number with an optional unit like 64GiB (binary prefix), 500GB or 2.5GHz (decimal prefix).
+
+    :raise ValueError: if text is no number
+    """
+    match = _QUANTITY.match(text or '')
+    if not match:
+        raise ValueError(f'{text!r} is no number')
+    number = float(match['number']) * (1024 if match['binary'] else 1000) ** _PREFIXES[match['prefix']]
+
+    return int(number) if number.is_integer() else number
+
+
+def version_key(version: t.Optional[str]) -> t.Optional[str]:
+    """
+    Get a key sorting versions by their first number like 9.3.0, e.g. 00000009.00000003.00000000, so that 9.3.0 < 10 < 10.2.
+    """
+    match = _VERSION.search(version or '')
+    if not match:
+        return None
+
+    return '.'.join(f'{int(part):08d}' for part in match.group().split('.'))
+
+
+def _version_bounds(op: str, key: str) -> t.Tuple[str, t.List[str]]:
+    """
+    Get a condition comparing the column version_key with the key of a filter, where the filter's version stands for all versions it is
+    a prefix of: software.gcc=10 matches 10.2.1 and software.gcc>10 matches 11 or newer, but not 10.2.
+    Keys of these versions are key itself and key followed by a dot, so key + '/' is the smallest key of a newer version.
+    """
+    after = key + '/'
+    return {'=': ('x.version_key >= ? AND x.version_key < ?', [key, after]),
+            '!=': ('(x.version_key < ? OR x.version_key >= ?)', [key, after]),
+            '<': ('x.version_key < ?', [key]),
+            '<=': ('x.version_key < ?', [after]),
+            '>': ('x.version_key >= ?', [after]),
+            '>=': ('x.version_key >= ?', [key])}[op]
+
+
+def _version_of_key(key: t.Optional[str]) -> t.Optional[str]:
+    return '.'.join(str(int(part)) for part in key.split('.')) if key else None
+
+
+def _number(value: t.Any) -> t.Any:
+    # sizes may be pre-formatted strings in exports of some systems
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+class SnapshotStore:
+    """
+    SQLite database holding snapshots normalised into one table per scope, indexed for searching.
+    The latest snapshot of every host is tracked, so that searches over current state never scan older snapshots.
+    """
+
+    def __init__(self, path: t.Optional[t.Union[str, os.PathLike]] = None):
+        self.path = pathlib.Path(path) if path else default_store_path()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(str(self.path))
+        self.connection.execute('PRAGMA journal_mode = WAL')
+        self.connection.execute('PRAGMA synchronous = NORMAL')
+        version = self.connection.execute('PRAGMA user_version').fetchone()[0]
+        if version == 0:
+            with self.connection:
+                self.connection.executescript(_SCHEMA + f'PRAGMA user_version = {STORE_VERSION};')
+        elif version != STORE_VERSION:
+            self.connection.close()
+            raise ValueError(f'{self.path} was created by another version of system-intelligence (store version {version})')
+
+    def close(self) -> None:
+        # keeps the statistics of the query planner up to date
+        self.connection.execute('PRAGMA optimize')
+        self.connection.close()
+
+    def __enter__(self) -> 'SnapshotStore':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def add(self, snapshot: t.Mapping[str, t.Any], collected: t.Optional[float] = None, source: t.Optional[str] = None) -> t.Optional[int]:
+        """
+        Add a snapshot (results of a query) without committing. Snapshots already stored are skipped.
+
+        :param collected: time the snapshot was taken, as seconds since the epoch, now by default
+        :return: the id of the added snapshot or None if it was already stored
+        :raise ValueError: if snapshot holds no query results, e.g. a delta
+        """
+        from .diff import fingerprint
+        from .query import SCOPES
+
+        snapshot = to_builtin(snapshot)
+        if not isinstance(snapshot, dict) or not snapshot.keys() & set(SCOPES):
+            raise ValueError('No query results found')
+        snapshot = {scope: value for scope, value in snapshot.items() if scope != 'timings'}
+        collected = time.time() if collected is None else collected
+        hostname = (snapshot.get('host') or {}).get('hostname')
+        hdd_models = (snapshot.get('hdd') or {}).get('model') or {}
+        gpus = snapshot.get('gpus') if isinstance(snapshot.get('gpus'), list) else []
+        cursor = self.connection.execute(
+            'INSERT OR IGNORE INTO snapshots (hostname, collected, fingerprint, source, os, swap, gpus, disks) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (hostname, collected, fingerprint(snapshot), source, snapshot.get('os') or None, _number(snapshot.get('swap')),
+             len(gpus) if 'gpus' in snapshot else None, len(hdd_models) if snapshot.get('hdd') else None))
+        if not cursor.rowcount:
+            return None
+        snapshot_id = cursor.lastrowid
+        if hostname is not None:
+            self.connection.execute('INSERT INTO latest (hostname, snapshot_id, collected) VALUES (?, ?, ?) '
+                                    'ON CONFLICT (hostname) DO UPDATE SET snapshot_id = excluded.snapshot_id, collected = excluded.collected '
+                                    'WHERE excluded.collected >= latest.collected', (hostname, snapshot_id, collected))
+        cpu = snapshot.get('cpu') or {}
+        if cpu:
+            self.connection.execute('INSERT INTO cpu VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                                    (snapshot_id, cpu.get('vendor_id_raw'), cpu.get('brand_raw'), cpu.get('arch'), _number(cpu.get('logical_cores')),
+                                     _number(cpu.get('physical_cores')), _number(cpu.get('clock')), _number(cpu.get('clock_max'))))
+        ram = snapshot.get('ram') or {}
+        if ram:
+            banks = ram.get('banks') or []
+            self.connection.execute('INSERT INTO ram VALUES (?, ?, ?)', (snapshot_id, _number(ram.get('total')), len(banks)))
+            self.connection.executemany('INSERT INTO ram_banks VALUES (?, ?, ?, ?, ?, ?)',
+                                        [(snapshot_id, bank.get('slot'), bank.get('product'), bank.get('vendor'), _number(bank.get('memory')),
+                                          _number(bank.get('clock'))) for bank in banks])
+        self.connection.executemany('INSERT INTO disks VALUES (?, ?, ?, ?)',
+                                    [(snapshot_id, device, disk.get('model'), _number(disk.get('size'))) for device, disk in hdd_models.items()])
+        self.connection.executemany('INSERT INTO gpus VALUES (?, ?, ?, ?, ?)',
+                                    [(snapshot_id, gpu.get('brand'), gpu.get('architecture'), _number(gpu.get('memory')),
+                                      _number(gpu.get('compute_capability'))) for gpu in gpus])
+        software = snapshot.get('software') or {}
+        self.connection.executemany('INSERT INTO software VALUES (?, ?, ?, ?)',
+                                    [(snapshot_id, name, program.get('version'), version_key(program.get('version')))
+                                     for name, program in software.items() if program])
+        self.connection.executemany('INSERT INTO packages VALUES (?, ?, ?, ?)',
+                                    [(snapshot_id, name, version, version_key(version))
+                                     for program in software.values() if program for name, version in (program.get('packages') or {}).items()])
+
+        return snapshot_id
+
+    def ingest(self, path: t.Union[str, os.PathLike], export_format: t.Optional[str] = None) -> t.Tuple[int, int]:
+        """
+        Add all snapshots of an exported file in one transaction. Their collection time is the modification time of the file.
+
+        :return: number of added snapshots and of snapshots which were already stored
+        """
+        from .export_formats import iter_snapshots
+
+        collected = os.stat(path).st_mtime
+        added = skipped = 0
+        with self.connection:
+            for snapshot in iter_snapshots(path, export_format):
+                if self.add(snapshot, collected=collected, source=str(path)) is None:
+                    skipped += 1
+                else:
+                    added += 1
+
+        return added, skipped
+
+    def search(self,
+               filters: t.Iterable[t.Union[str, Filter]] = (),
+               show: t.Iterable[str] = (),
+               latest: bool = True) -> t.List[t.Dict[str, t.Any]]:
+        """
+        Find all snapshots matching every filter, see parse_filter.
+
+        :param show: fields whose values are returned next to hostname and collection time. Fields stored in multiple rows are lists.
+        :param latest: only search the latest snapshot of every host
+        :return: a dictionary per snapshot, ordered by hostname and collection time
+        """
+        filters = [parse_filter(search_filter) if isinstance(search_filter, str) else search_filter for search_filter in filters]
+        show = [name for name in dict.fromkeys(show) if name not in {'hostname', 'collected'}]
+        columns, parameters = [], []
+        for name in show:
+            column, column_parameters = self._column(name)
+            columns.append(column)
+            parameters.extend(column_parameters)
+        where, where_parameters = self._where(filters)
+        rows = self.connection.execute(f'SELECT s.hostname, s.collected{"".join(", " + column for column in columns)} FROM snapshots s '
+                                       f'{self._latest_join(latest)} {where} ORDER BY s.hostname, s.collected',
+                                       parameters + where_parameters)
+        results = []
+        for row in rows:
+            result = {'hostname': row[0], 'collected': row[1]}
+            for name, value in zip(show, row[2:]):
+                result[name] = self._decode(name, value)
+            results.append(result)
+
+        return results
+
+    def aggregate(self,
+                  name: str,
+                  filters: t.Iterable[t.Union[str, Filter]] = (),
+                  group_by: t.Optional[str] = None,
+                  latest: bool = True) -> t.List[Aggregate]:
+        """
+        Count the snapshots matching every filter and get the minimum, maximum and mean of a field's values, per value of group_by if set.
+        Minimum and maximum of text are in alphabetical order, versions are compared like version_key.
+        """
+        filters = [parse_filter(search_filter) if isinstance(search_filter, str) else search_filter for search_filter in filters]
+        value_field = field(name)
+        value_join, value_parameters = self._join('v', name)
+        group_join, group_parameters = self._join('g', group_by) if group_by else ('', [])
+        group = f'g.{field(group_by).column}' if group_by else 'NULL'
+        value = f'v.{value_field.column}'
+        mean = f'AVG({value})' if value_field.kind in {'number', 'size', 'clock'} else 'NULL'
+        where, where_parameters = self._where(filters, extra=f'{value} IS NOT NULL')
+        rows = self.connection.execute(f'SELECT {group}, COUNT(DISTINCT s.id), MIN({value}), MAX({value}), {mean} FROM snapshots s '
+                                       f'{self._latest_join(latest)} {value_join} {group_join} {where} GROUP BY 1 ORDER BY 2 DESC, 1',
+                                       value_parameters + group_parameters + where_parameters)
+        decode_group = _version_of_key if group_by and field(group_by).kind == 'version' else (lambda key: key)
+        decode_value = _version_of_key if value_field.kind == 'version' else (lambda key: key)
+
+        return [Aggregate(decode_group(row[0]), row[1], decode_value(row[2]), decode_value(row[3]), row[4]) for row in rows]
+
+    @staticmethod
+    def _latest_join(latest: bool) -> str:
+        return 'JOIN latest l ON l.snapshot_id = s.id' if latest else ''
+
+    @staticmethod
+    def _join(alias: str, name: str) -> t.Tuple[str, t.List[t.Any]]:
+        """
+        Join the table of a field (one row per stored value) as alias.
+        """
+        name_field = field(name)
+        if name_field.table == 'snapshots':
+            return f'JOIN snapshots {alias} ON {alias}.id = s.id', []
+        if name_field.kind == 'version':
+            return f'JOIN {name_field.table} {alias} ON {alias}.snapshot_id = s.id AND {alias}.name = ?', [name.partition('.')[2]]
+        return f'JOIN {name_field.table} {alias} ON {alias}.snapshot_id = s.id', []
+
+    @staticmethod
+    def _column(name: str) -> t.Tuple[str, t.List[t.Any]]:
+        """
+        Get an expression selecting the value of a field for every snapshot s, a JSON array for fields stored in multiple rows.
+        """
+        name_field = field(name)
+        if name_field.table == 'snapshots':
+            return f's.{name_field.column}', []
+        if name_field.kind == 'version':
+            return f'(SELECT json_group_array(x.version) FROM {name_field.table} x WHERE x.snapshot_id = s.id AND x.name = ?)', [name.partition('.')[2]]
+        if name_field.table in _MULTI_ROW_TABLES:
+            return f'(SELECT json_group_array(x.{name_field.column}) FROM {name_field.table} x WHERE x.snapshot_id = s.id)', []
+        return f'(SELECT x.{name_field.column} FROM {name_field.table} x WHERE x.snapshot_id = s.id)', []
+
+    @staticmethod
+    def _decode(name: str, value: t.Any) -> t.Any:
+        name_field = field(name)
+        if name_field.kind == 'version' or name_field.table in _MULTI_ROW_TABLES:
+            values = json.loads(value)
+            return values[0] if name_field.kind == 'version' and len(values) == 1 else values or None
+        return value
+
+    @staticmethod
+    def _where(filters: t.Sequence[Filter], extra: t.Optional[str] = None) -> t.Tuple[str, t.List[t.Any]]:
+        """
+        Build a WHERE clause matching snapshots s which have a value matching every filter.
+        Filters on other tables are uncorrelated subqueries, which are evaluated once using the index of the filtered value.
+        """
+        conditions, parameters = [], []
+        for search_filter in filters:
+            filter_field = field(search_filter.field)
+            version_parameters = []
+            if search_filter.op is None:
+                condition = f'x.{filter_field.column} IS NOT NULL' if filter_field.kind != 'version' else '1'
+            elif filter_field.kind == 'version' and search_filter.op != '~':
+                condition, version_parameters = _version_bounds(search_filter.op, version_key(search_filter.value))
+            else:
+                op = 'GLOB' if search_filter.op == '~' else search_filter.op
+                column = 'version' if filter_field.kind == 'version' and op == 'GLOB' else filter_field.column
+                condition = f'x.{column} {op} ?'
+            if filter_field.table == 'snapshots':
+                conditions.append(condition.replace('x.', 's.'))
+            elif filter_field.kind == 'version':
+                conditions.append(f's.id IN (SELECT x.snapshot_id FROM {filter_field.table} x WHERE x.name = ? AND {condition})')
+                parameters.append(search_filter.field.partition('.')[2])
+            else:
+                conditions.append(f's.id IN (SELECT x.snapshot_id FROM {filter_field.table} x WHERE {condition})')
+            if search_filter.op == '~':
+                parameters.append(search_filter.value)
+            elif filter_field.kind == 'version':
+                parameters.extend(version_parameters)
+            elif search_filter.op is not None:
+                parameters.append(search_filter.value if filter_field.kind == 'text' else parse_quantity(search_filter.value))
+        if extra:
+            conditions.append(extra)
+
+        return ('WHERE ' + ' AND '.join(conditions) if conditions else ''), parameters
+
+
+def format_value(name: str, value: t.Any) -> str:
+    """
+    Format a value of a field for printing: sizes and clock rates human readable, lists joined by commas.
+    """
+    from .base_info import BaseInfo
+
+    if isinstance(value, list):
+        return ', '.join(format_value(name, item) for item in value)
+    if value is None:
+        return ''
+    kind = field(name).kind
+    if name == 'collected':
+        return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(value))
+    if kind == 'size' and isinstance(value, (int, float)):
+        return BaseInfo().format_bytes(int(value), device='ram' if name.startswith(('ram', 'bank', 'gpu', 'swap')) else '')
+    if kind == 'clock' and isinstance(value, (int, float)):
+        return BaseInfo.hz_to_hreadable_string(int(value))
+    if isinstance(value, float):
+        return f'{value:.4g}'
+    return str(value)
+
+
+def print_results(results: t.Sequence[t.Mapping[str, t.Any]], title: str = 'Snapshots') -> None:
+    """
+    Print search results as rich table.
+    """
+    from rich.console import Console
+    from rich.markup import escape
+    from .util.rich_util import create_styled_table
+
+    table = create_styled_table(title)
+    names = list(results[0]) if results else ['hostname', 'collected']
+    for name in names:
+        table.add_column(name.capitalize() if name in {'hostname', 'collected'} else name, justify='left')
+    for result in results:
+        table.add_row(*(escape(format_value(name, result[name])) for name in names))
+    table.caption = f'{len(results)} snapshots'
+    Console().print(table)
+
+
+def print_aggregates(name: str, aggregates: t.Sequence[Aggregate], group_by: t.Optional[str] = None) -> None:
+    """
+    Print aggregates of a field as rich table.
+    """
+    from rich.console import Console
+    from rich.markup import escape
+    from .util.rich_util import create_styled_table
+
+    table = create_styled_table(name)
+    columns = ([group_by] if group_by else []) + ['Snapshots', 'Min', 'Max', 'Mean']
+    for column in columns:
+        table.add_column(column, justify='left')
+    for aggregate in aggregates:
+        values = [str(aggregate.count), format_value(name, aggregate.minimum), format_value(name, aggregate.maximum),
+                  format_value(name, aggregate.mean)]
+        if group_by:
+            values.insert(0, format_value(group_by, aggregate.group))
+        table.add_row(*(escape(value) for value in values))
+    Console().print(table)
@@ -13,7 +13,7 @@ class SwapInfo(BaseInfo):
         super().__init__()
         self.SWAP = psutil is not None
 
-    def query_swap(self) -> t.Optional[int]:
+    def query_swap(self, **_) -> t.Optional[int]:
         """
         Get information about swap.
         """
@@ -0,0 +1,221 @@
+"""Query CPU and RAM information on Linux directly from procfs and sysfs, without spawning any processes."""
+
+import glob
+import os
+import platform
+import struct
+import typing as t
+
+from .records import RamBankRecord, RamCacheRecord
+
+# py-cpuinfo style architecture names by machine type
+ARCHITECTURES = {
+    'x86_64': 'X86_64', 'amd64': 'X86_64',
+    'i386': 'X86_32', 'i486': 'X86_32', 'i586': 'X86_32', 'i686': 'X86_32',
+    'aarch64': 'ARM_8', 'arm64': 'ARM_8', 'armv8l': 'ARM_8', 'armv7l': 'ARM_7',
+    'ppc64': 'PPC_64', 'ppc64le': 'PPC_64', 'ppc': 'PPC_32',
+    's390x': 'S390X', 'riscv64': 'RISCV_64', 'mips': 'MIPS_32', 'mips64': 'MIPS_64'
+}
+
+# SMBIOS memory device form factors and types (DMTF DSP0134, 7.18.1 and 7.18.2)
+MEMORY_FORM_FACTORS = {
+    0x03: 'SIMM', 0x04: 'SIP', 0x05: 'Chip', 0x06: 'DIP', 0x07: 'ZIP', 0x08: 'Proprietary Card',
+    0x09: 'DIMM', 0x0A: 'TSOP', 0x0B: 'Row of chips', 0x0C: 'RIMM', 0x0D: 'SODIMM', 0x0E: 'SRIMM', 0x0F: 'FB-DIMM', 0x10: 'Die'
+}
+MEMORY_TYPES = {
+    0x03: 'DRAM', 0x04: 'EDRAM', 0x05: 'VRAM', 0x06: 'SRAM', 0x07: 'RAM', 0x08: 'ROM', 0x09: 'Flash', 0x0A: 'EEPROM',
+    0x0F: 'SDRAM', 0x12: 'DDR', 0x13: 'DDR2', 0x14: 'DDR2 FB-DIMM', 0x18: 'DDR3', 0x1A: 'DDR4', 0x1B: 'LPDDR',
+    0x1C: 'LPDDR2', 0x1D: 'LPDDR3', 0x1E: 'LPDDR4', 0x1F: 'Logical non-volatile device', 0x20: 'HBM', 0x21: 'HBM2',
+    0x22: 'DDR5', 0x23: 'LPDDR5'
+}
+
+
+def read_file(path: str, default: t.Optional[str] = None) -> t.Optional[str]:
+    """
+    Read a (small) procfs or sysfs file and strip trailing whitespace.
+
+    :return: the file's content or default if it cannot be read
+    """
+    try:
+        with open(path) as sysfs_file:
+            return sysfs_file.read().strip()
+    except OSError:
+        return default
+
+
+def parse_size(size: str) -> int:
+    """
+    Parse sizes as written by the kernel, e.g. 48K or 2048K, into bytes.
+    """
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+    size = size.strip()
+    if size and size[-1].upper() in units:
+        return int(size[:-1]) * units[size[-1].upper()]
+    return int(size)
+
+
+def read_cpuinfo(root: str = '/') -> t.List[t.Dict[str, str]]:
+    """
+    Parse /proc/cpuinfo into one dictionary per processor. Fields listed once for all processors (as on ARM) end up in the last one.
+    """
+    content = read_file(os.path.join(root, 'proc', 'cpuinfo'), '')
+    processors = []
+    for block in content.split('\n\n'):
+        fields = {}
+        for line in block.splitlines():
+            key, separator, value = line.partition(':')
+            if separator:
+                fields[key.strip()] = value.strip()
+        if fields:
+            processors.append(fields)
+
+    return processors
+
+
+def read_cache_sizes(root: str = '/', cpu: int = 0) -> t.Dict[str, int]:
+    """
+    Get the sizes of the caches of a CPU from /sys/devices/system/cpu/cpu*/cache in bytes, named like py-cpuinfo does.
+    """
+    caches = {}
+    for index in glob.glob(os.path.join(root, 'sys', 'devices', 'system', 'cpu', f'cpu{cpu}', 'cache', 'index[0-9]*')):
+        level = read_file(os.path.join(index, 'level'))
+        cache_type = read_file(os.path.join(index, 'type'))
+        size = read_file(os.path.join(index, 'size'))
+        if not level or not size or cache_type == 'Instruction':
+            continue
+        name = f'l{level}_data_cache_size' if cache_type == 'Data' else f'l{level}_cache_size'
+        caches[name] = parse_size(size)
+
+    return caches
+
+
+def get_cpu_info(root: str = '/') -> t.Dict[str, t.Any]:
+    """
+    Drop-in replacement for the subset of cpuinfo.get_cpu_info() used by CpuInfo.
+    """
+    processors = read_cpuinfo(root)
+    merged: t.Dict[str, str] = {}
+    for processor in reversed(processors):
+        merged.update(processor)
+    machine = platform.machine()
+    cpu_info = {
+        'vendor_id_raw': merged.get('vendor_id', merged.get('CPU implementer', '')),
+        'hardware_raw': merged.get('Hardware', ''),
+        'brand_raw': merged.get('model name', merged.get('cpu model', merged.get('Processor', ''))),
+        'arch': ARCHITECTURES.get(machine.lower(), machine.upper()),
+        'count': sum(1 for processor in processors if 'processor' in processor)
+    }
+    cpu_info.update(read_cache_sizes(root))
+
+    return cpu_info
+
+
+def read_online_memory(root: str = '/') -> t.Optional[int]:
+    """
+    Get the size of all online memory blocks in bytes, which is the installed physical memory visible to the kernel.
+    """
+    memory = os.path.join(root, 'sys', 'devices', 'system', 'memory')
+    block_size = read_file(os.path.join(memory, 'block_size_bytes'))
+    if block_size is None:
+        return None
+    blocks = sum(1 for block in glob.glob(os.path.join(memory, 'memory[0-9]*')) if read_file(os.path.join(block, 'online'), '1') == '1')
+
+    return blocks * int(block_size, 16)
+
+
+def read_dmi_structures(root: str = '/') -> t.Iterator[t.Tuple[int, int, bytes, t.List[str]]]:
+    """
+    Iterate over all structures of the SMBIOS table in /sys/firmware/dmi/tables/DMI (only readable by root).
+
+    :return: type, handle, formatted area and strings of every structure
+    """
+    with open(os.path.join(root, 'sys', 'firmware', 'dmi', 'tables', 'DMI'), 'rb') as dmi_file:
+        table = dmi_file.read()
+    offset = 0
+    while offset + 4 <= len(table):
+        structure_type, length, handle = struct.unpack_from('<BBH', table, offset)
+        if length < 4:
+            break
+        formatted = table[offset:offset + length]
+        strings_end = table.find(b'\0\0', offset + length)
+        if strings_end < 0:
+            break
+        strings = [string.decode('utf-8', 'replace').strip() for string in table[offset + length:strings_end].split(b'\0') if string]
+        yield structure_type, handle, formatted, strings
+        # end of table
+        if structure_type == 127:
+            break
+        offset = strings_end + 2
+
+
+def _dmi_string(formatted: bytes, strings: t.List[str], offset: int) -> str:
+    """
+    Resolve a string reference (1-based index into the strings of a structure, 0 for none).
+    """
+    if offset >= len(formatted) or not 0 < formatted[offset] <= len(strings):
+        return ''
+    return strings[formatted[offset] - 1]
+
+
+def _dmi_word(formatted: bytes, offset: int, size: int = 2) -> t.Optional[int]:
+    if offset + size > len(formatted):
+        return None
+    return int.from_bytes(formatted[offset:offset + size], 'little')
+
+
+def parse_memory_device(formatted: bytes, strings: t.List[str]) -> RamBankRecord:
+    """
+    Convert a memory device (type 17) structure into a RAM bank like RamInfo.query_ram_bank returns it.
+    """
+    size = _dmi_word(formatted, 0x0C)
+    if size == 0x7FFF:
+        # extended size in MiB
+        memory: t.Optional[int] = (_dmi_word(formatted, 0x1C, 4) or 0) * 1024 ** 2
+    elif not size or size == 0xFFFF:
+        memory = None
+    else:
+        memory = (size & 0x7FFF) * (1024 if size & 0x8000 else 1024 ** 2)
+    speed = _dmi_word(formatted, 0x20) or _dmi_word(formatted, 0x15)
+    description = ' '.join(filter(None, [MEMORY_FORM_FACTORS.get(formatted[0x0E]) if len(formatted) > 0x0E else None,
+                                         MEMORY_TYPES.get(formatted[0x12]) if len(formatted) > 0x12 else None]))
+
+    return RamBankRecord(product=_dmi_string(formatted, strings, 0x1A),
+                         vendor=_dmi_string(formatted, strings, 0x17),
+                         serial=_dmi_string(formatted, strings, 0x18),
+                         description=description if memory else '[empty]',
+                         slot=_dmi_string(formatted, strings, 0x10),
+                         clock=speed * 10 ** 6 if speed and speed != 0xFFFF else None,
+                         memory=memory)
+
+
+def parse_cache(formatted: bytes, handle: int, strings: t.List[str]) -> RamCacheRecord:
+    """
+    Convert a cache information (type 7) structure into a cache like RamInfo.query_ram_cache returns it.
+    """
+    maximum_size = _dmi_word(formatted, 0x07) or 0
+    if maximum_size == 0xFFFF:
+        # maximum cache size 2 (SMBIOS 3.1) in units of 1 KiB or 64 KiB
+        maximum_size = _dmi_word(formatted, 0x13, 4) or 0
+        capacity = (maximum_size & 0x7FFFFFFF) * (64 * 1024 if maximum_size & 0x80000000 else 1024)
+    else:
+        capacity = (maximum_size & 0x7FFF) * (64 * 1024 if maximum_size & 0x8000 else 1024)
+
+    return RamCacheRecord(slot=_dmi_string(formatted, strings, 0x04), physid=f'{handle:x}', capacity=capacity)
+
+
+def query_ram_banks_cache(root: str = '/') -> t.Tuple[t.List[RamBankRecord], t.List[RamCacheRecord]]:
+    """
+    Read RAM banks and caches from the SMBIOS table. Both are empty if the table is not readable.
+    """
+    ram_banks = []
+    ram_cache = []
+    try:
+        for structure_type, handle, formatted, strings in read_dmi_structures(root):
+            if structure_type == 17:
+                ram_banks.append(parse_memory_device(formatted, strings))
+            elif structure_type == 7:
+                ram_cache.append(parse_cache(formatted, handle, strings))
+    except OSError:
+        return [], []
+
+    return ram_banks, ram_cache
@@ -1,33 +1,140 @@
 """Console script for system_intelligence."""
+import contextlib
 import sys
 import click
 
-from rich.traceback import install
 from rich import print
-from system_intelligence.query import query_and_export
+from system_intelligence.query import BACKENDS, query_and_export
 
+# export_formats.FORMATS, listed here to not import export_formats when the CLI starts
+OUTPUT_FORMATS = ('raw', 'json', 'yml', 'ndjson', 'msgpack', 'cbor', 'parquet')
 
-@click.command()
+
+class DefaultCommandGroup(click.Group):
+    """
+    Command group which runs its default command if the first argument is no command of the group.
+    This way 'system-intelligence all' keeps working next to 'system-intelligence serve'.
+    """
+
+    def __init__(self, *args, default_command: str, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.default_command = default_command
+
+    def parse_args(self, ctx, args):
+        if not args or (args[0] not in self.commands and args[0] not in ctx.help_option_names):
+            args.insert(0, self.default_command)
+        return super().parse_args(ctx, args)
+
+
+@click.group(cls=DefaultCommandGroup, default_command='query')
+def main():
+    """
+    Query your system for hardware and software related information.
+
+    Runs the query command if no other command is given, e.g. 'system-intelligence all'.
+    """
+
+
+def _parse_backends(ctx, param, values):
+    """
+    Parse SCOPE=BACKEND options into a dictionary.
+    """
+    backends = {}
+    for value in values:
+        scope, _, backend = value.partition('=')
+        if backend not in BACKENDS.get(scope, []):
+            choices = ', '.join(f'{scope}={backend}' for scope, scope_backends in BACKENDS.items() for backend in scope_backends)
+            raise click.BadParameter(f'{value} is not one of {choices}')
+        backends[scope] = backend
+    return backends
+
+
+def _load_timing_hooks(ctx, param, values):
+    """
+    Import module:callable options as timing hooks.
+    """
+    if not values:
+        return []
+    from system_intelligence import timing
+
+    hooks = []
+    for value in values:
+        try:
+            hooks.append(timing.load_hook(value))
+        except (ImportError, AttributeError, ValueError) as err:
+            raise click.BadParameter(f'Unable to load {value}: {err}')
+    return hooks
+
+
+@main.command('query')
 @click.argument('scope',
-                type=click.Choice(['all', 'cpu', 'gpus', 'ram', 'software', 'host', 'os', 'hdd', 'swap', 'network']),
+                type=click.Choice(['all', 'cpu', 'topology', 'gpus', 'ram', 'software', 'host', 'os', 'hdd', 'diskio', 'swap', 'network']),
                 nargs=-1)
 @click.option('-e', '--exclude', is_flag=True, help='Query all except for those who where specified in the scope.')
 @click.option('--verbose/--silent', default=True)
-@click.option('-f', '--output_format', type=click.Choice(['raw', 'json', 'yml']), default='raw',
-              help='Output file format.')
+@click.option('-f', '--output_format', type=click.Choice(OUTPUT_FORMATS), default='raw',
+              help='Output file format. raw, ndjson, msgpack and cbor append to existing files. msgpack, cbor and parquet require optional packages.')
 @click.option('-g', '--generate_html_table', is_flag=True,
               help='Specify to create a html output table. Requires output_format and output to be set.')
 @click.option('-o', '--output', type=str,
-              help='Output file path.')
-def main(scope, exclude, verbose, output_format, generate_html_table, output):
+              help='Output file path. - writes to the standard output and prints everything else to the standard error.')
+@click.option('-p', '--parallel', is_flag=True, help='Query all scopes at the same time.')
+@click.option('-w', '--workers', type=click.IntRange(min=1),
+              help='Maximum number of scopes queried at the same time. Requires parallel to be set. Defaults to one per scope.')
+@click.option('-t', '--timeout', type=click.FloatRange(min=0),
+              help='Skip scopes which take longer than the given number of seconds. Requires parallel to be set.')
+@click.option('--python_env', type=click.Path(exists=True),
+              help='Virtualenv or python interpreter to query python packages of. Defaults to the running interpreter.')
+@click.option('--pip_freeze', is_flag=True, help='Query python packages via pip freeze instead of reading their metadata.')
+@click.option('--refresh', is_flag=True, help='Ignore cached results and query all scopes again.')
+@click.option('--no-cache', 'no_cache', is_flag=True, help='Neither use nor store cached results.')
+@click.option('--profile-startup', 'profile_startup', is_flag=True, help='Print how much time importing each module takes.')
+@click.option('-b', '--backend', 'backends', multiple=True, callback=_parse_backends, metavar='SCOPE=BACKEND',
+              help='Select the backend of a scope, e.g. cpu=sysfs or ram=sysfs to read procfs and sysfs directly on Linux. Can be repeated.')
+@click.option('--timings', is_flag=True, help='Print wall and CPU time of every scope, subprocess and export step and add them to the output.')
+@click.option('--timing_hook', 'timing_hooks', multiple=True, callback=_load_timing_hooks, metavar='MODULE:CALLABLE',
+              help='Call the given function with every finished timing span, e.g. to forward it to a tracing system. Can be repeated.')
+@click.option('--delta_baseline', type=click.Path(exists=True, dir_okay=False),
+              help='Previously exported result (json, yml, ndjson, msgpack, cbor or raw). Only export the changes relative to it.')
+@click.option('--mount_timeout', type=click.FloatRange(min=0), default=5.0, show_default=True,
+              help='Seconds after which querying the usage of a mounted partition (e.g. a hung network file system) is given up.')
+@click.option('--probe_timeout', type=click.FloatRange(min=0), default=10.0, show_default=True,
+              help='Seconds after which a version query of the software scope (e.g. a hanging module system) is killed.')
+@click.option('--include_fstype', 'include_fstypes', multiple=True, metavar='FSTYPE',
+              help='Only query the usage of partitions of this file system type. Can be repeated.')
+@click.option('--exclude_fstype', 'exclude_fstypes', multiple=True, metavar='FSTYPE',
+              help='Do not query the usage of partitions of this file system type, e.g. nfs. Can be repeated.')
+@click.option('--include_mount', 'include_mounts', multiple=True, metavar='GLOB',
+              help='Only query the usage of partitions mounted at paths matching this pattern. Can be repeated.')
+@click.option('--exclude_mount', 'exclude_mounts', multiple=True, metavar='GLOB',
+              help='Do not query the usage of partitions mounted at paths matching this pattern, e.g. /scratch/*. Can be repeated.')
+@click.option('--sample_interval', type=click.FloatRange(min=0, min_open=True), default=1.0, show_default=True,
+              help='Seconds over which the I/O rates of the diskio scope and the traffic of network interfaces (see --network_rates) are averaged.')
+@click.option('--network_rates', is_flag=True, help='Sample bytes, packets, errors and drops per second and the utilisation of every network interface.')
+@click.option('--include_nic', 'include_nics', multiple=True, metavar='GLOB',
+              help='Only query network interfaces whose name matches this pattern. Can be repeated.')
+@click.option('--exclude_nic', 'exclude_nics', multiple=True, metavar='GLOB',
+              help='Do not query network interfaces whose name matches this pattern, e.g. veth*. Can be repeated.')
+@click.option('--exclude_virtual_nics', is_flag=True, help='Do not query virtual network interfaces like loopback, veth and bridges (only on Linux).')
+def query_command(scope, exclude, verbose, output_format, generate_html_table, output, parallel, workers, timeout, python_env, pip_freeze, refresh,
+                  no_cache, profile_startup, backends, timings, timing_hooks, delta_baseline, mount_timeout, probe_timeout, include_fstypes, exclude_fstypes,
+                  include_mounts, exclude_mounts, sample_interval, network_rates, include_nics, exclude_nics, exclude_virtual_nics):
     """
     Query your system for hardware and software related information.
 
     Currently supported arguments are
 
-    'all' or 'cpu', 'gpus', 'ram', 'host', 'os', 'hdd', 'swap', 'network', 'software'
+    'all' or 'cpu', 'topology', 'gpus', 'ram', 'host', 'os', 'hdd', 'diskio', 'swap', 'network', 'software'
+
+    diskio samples the I/O rates of all disks and is not part of 'all'.
     """
-    print(r"""[bold blue]
+    if profile_startup:
+        from system_intelligence.util.profile_util import profile_startup as run_profiled
+
+        sys.exit(run_profiled([arg for arg in sys.argv[1:] if arg != '--profile-startup']))
+
+    if verbose and output != '-':
+        print(r"""[bold blue]
                    _                       _       _       _ _ _
      ___ _   _ ___| |_ ___ _ __ ___       (_)_ __ | |_ ___| | (_) __ _  ___ _ __   ___ ___
     / __| | | / __| __/ _ \ '_ ` _ \ _____| | '_ \| __/ _ \ | | |/ _` |/ _ \ '_ \ / __/ _ \
@@ -46,21 +153,356 @@ def main(scope, exclude, verbose, output_format, generate_html_table, output):
 
     if not output and generate_html_table:
         print('[bold yellow]Specified --generate_output_table without --output. Will not create a html table.')
+    elif output == '-' and generate_html_table:
+        print('[bold yellow]Specified --generate_output_table with the standard output as output. Will not create a html table.', file=sys.stderr)
+
+    if output:
+        from system_intelligence.export_formats import require
+
+        try:
+            require(output_format)
+        except ImportError as err:
+            print(f'[bold red]{err}', file=sys.stderr)
+            sys.exit(1)
+    elif delta_baseline:
+        print('[bold yellow]Specified --delta_baseline without --output. Will not compute changes.')
+
+    if not parallel and (workers or timeout is not None):
+        print('[bold yellow]Specified --workers or --timeout without --parallel. Will query all scopes one after another.')
 
     scope = set(scope)
     if exclude:
         if 'all' in scope:
             print('[bold red]Cannot run scope [bold green]"all"[bold red] with exclude option!')
             sys.exit(1)
-        scope = {'cpu', 'gpus', 'ram', 'software', 'host', 'os', 'hdd', 'swap', 'network'}.difference(scope)
+        scope = {'cpu', 'topology', 'gpus', 'ram', 'software', 'host', 'os', 'hdd', 'swap', 'network'}.difference(scope)
+
+    if timing_hooks:
+        from system_intelligence import timing
 
+        for hook in timing_hooks:
+            timing.add_hook(hook)
+
+    cache = None
+    if not no_cache:
+        from system_intelligence.cache import ResultCache
+
+        cache = ResultCache()
     query_and_export(query_scope=scope,
                      verbose=verbose,
                      export_format=output_format,
                      generate_html_table=generate_html_table,
-                     output=output)
+                     output=output,
+                     parallel=parallel,
+                     workers=workers,
+                     timeout=timeout,
+                     python_env=python_env,
+                     pip_freeze=pip_freeze,
+                     cache=cache,
+                     refresh=refresh,
+                     backends=backends,
+                     timings=timings,
+                     delta_baseline=delta_baseline,
+                     options={'hdd': {'mount_timeout': mount_timeout,
+                                      'include_fstypes': include_fstypes,
+                                      'exclude_fstypes': exclude_fstypes,
+                                      'include_mounts': include_mounts,
+                                      'exclude_mounts': exclude_mounts},
+                              'diskio': {'sample_interval': sample_interval},
+                              'software': {'probe_timeout': probe_timeout},
+                              'network': {'sample_interval': sample_interval if network_rates else None,
+                                          'include_nics': include_nics,
+                                          'exclude_nics': exclude_nics,
+                                          'exclude_virtual': exclude_virtual_nics}})
+
+
+@main.command('serve')
+@click.option('-s', '--socket', 'socket_path', type=click.Path(dir_okay=False),
+              help='Unix socket to listen on. Defaults to $XDG_RUNTIME_DIR/system-intelligence.sock.')
+@click.option('--host', default='127.0.0.1', show_default=True, help='Address to listen on. Requires port to be set.')
+@click.option('--port', type=click.IntRange(min=0, max=65535), help='Listen via HTTP on the given port instead of a Unix socket.')
+@click.option('--python_env', type=click.Path(exists=True),
+              help='Virtualenv or python interpreter to query python packages of. Defaults to the running interpreter.')
+def serve_command(socket_path, host, port, python_env):
+    """
+    Run a daemon which keeps all queriers alive and answers queries as JSON.
+
+    Results of static scopes are reused within their cache TTL.
+    Query the daemon with 'system-intelligence client' or via GET /query?scope=cpu&scope=ram.
+    """
+    from system_intelligence.daemon import serve
+
+    serve(socket_path=socket_path, host=host, port=port, python_env=python_env)
+
+
+@main.command('exporter')
+@click.argument('scope', type=click.Choice(['all', 'cpu', 'gpus', 'ram', 'software', 'host', 'os', 'hdd', 'swap', 'network']), nargs=-1)
+@click.option('--host', default='0.0.0.0', show_default=True, help='Address to listen on.')
+@click.option('--port', type=click.IntRange(min=0, max=65535), default=9101, show_default=True, help='Port to serve /metrics on.')
+@click.option('--static_ttl', type=click.FloatRange(min=0), default=3600, show_default=True,
+              help='Seconds after which static metadata like models and versions is queried again.')
+@click.option('--python_env', type=click.Path(exists=True),
+              help='Query the python packages of the given virtualenv or python interpreter instead of the current one.')
+def exporter_command(scope, host, port, static_ttl, python_env):
+    """
+    Serve the results of the given scopes (all by default) as Prometheus metrics at /metrics.
+
+    Static metadata is exported as info metrics, which are queried once and refreshed in the background.
+    Usage of memory, swap and disks and the state of network interfaces are sampled on every scrape.
+    """
+    from system_intelligence.prometheus import serve
+
+    scopes = None if not scope or 'all' in scope else scope
+    print(f'[bold blue]Serving metrics on http://{host}:{port}/metrics', file=sys.stderr)
+    serve(host=host, port=port, scopes=scopes, static_ttl=static_ttl, python_env=python_env)
+
+
+@main.command('client')
+@click.argument('scope', type=click.Choice(['all', 'cpu', 'topology', 'gpus', 'ram', 'software', 'host', 'os', 'hdd', 'diskio', 'swap', 'network']), nargs=-1)
+@click.option('-s', '--socket', 'socket_path', type=click.Path(dir_okay=False),
+              help='Unix socket of the daemon. Defaults to $XDG_RUNTIME_DIR/system-intelligence.sock.')
+@click.option('--host', default='127.0.0.1', show_default=True, help='Address of the daemon. Requires port to be set.')
+@click.option('--port', type=click.IntRange(min=0, max=65535), help='Connect via HTTP on the given port instead of a Unix socket.')
+@click.option('--refresh', is_flag=True, help='Ignore results cached by the daemon.')
+def client_command(scope, socket_path, host, port, refresh):
+    """
+    Query a running daemon and print the results as JSON.
+    """
+    import json
+    from system_intelligence.daemon import request
+
+    scopes = None if not scope or 'all' in scope else scope
+    try:
+        info = request(scopes, refresh=refresh, socket_path=socket_path, host=host, port=port)
+    except (OSError, RuntimeError) as err:
+        print(f'[bold red]Unable to query the daemon: {err}')
+        sys.exit(1)
+    click.echo(json.dumps(info, indent=2, ensure_ascii=False))
+
+
+@main.command('fleet')
+@click.argument('inventory', type=click.Path(exists=True, dir_okay=False))
+@click.argument('scope', type=click.Choice(['all', 'cpu', 'topology', 'gpus', 'ram', 'software', 'host', 'os', 'hdd', 'swap', 'network']), nargs=-1)
+@click.option('--transport', type=click.Choice(['ssh', 'local']), default='ssh', show_default=True,
+              help='How to reach the hosts. local runs the query as local subprocess for every host, e.g. for testing.')
+@click.option('-c', '--concurrency', type=click.IntRange(min=1), default=32, show_default=True, help='Maximum number of hosts queried at the same time.')
+@click.option('--retries', type=click.IntRange(min=0), default=2, show_default=True, help='Number of times a failed query of a host is retried.')
+@click.option('-t', '--timeout', type=click.FloatRange(min=0), default=120, show_default=True,
+              help='Seconds after which a query of a host is killed (and retried).')
+@click.option('--deadline', type=click.FloatRange(min=0), help='Seconds after which a host is given up, including all retries.')
+@click.option('--remote_command', default='system-intelligence', show_default=True, help='Command running system-intelligence on the hosts.')
+@click.option('--ssh_option', 'ssh_options', multiple=True, help='Argument passed on to ssh, e.g. --ssh_option=-i --ssh_option=~/.ssh/fleet. Can be repeated.')
+@click.option('-f', '--output_format', type=click.Choice(OUTPUT_FORMATS), default='json', show_default=True,
+              help='Output file format. ndjson and parquet get one snapshot per host, all other formats one mapping of hostnames to snapshots.')
+@click.option('-o', '--output', type=str, required=True, help='Output file path. - writes to the standard output.')
+@click.option('--html', 'html_report', type=click.Path(dir_okay=False), help='Also write a sortable HTML report with a row per host to the given file.')
+@click.option('--verbose/--silent', default=True, help='Print the status of every host.')
+def fleet_command(inventory, scope, transport, concurrency, retries, timeout, deadline, remote_command, ssh_options, output_format, output, html_report,
+                  verbose):
+    """
+    Query all hosts of an inventory file (one host per line) and merge their results by hostname.
+
+    Hosts are queried via ssh by default, which requires system-intelligence to be installed on them.
+    """
+    from system_intelligence import fleet
+    from system_intelligence.export_formats import require
+    from system_intelligence.query import export, export_batch
+
+    try:
+        require(output_format)
+    except ImportError as err:
+        print(f'[bold red]{err}', file=sys.stderr)
+        sys.exit(1)
+    hosts = fleet.read_inventory(inventory)
+    if not hosts:
+        print(f'[bold red]No hosts found in {inventory}!', file=sys.stderr)
+        sys.exit(1)
+    fleet_transport = fleet.SSHTransport(remote_command, options=ssh_options) if transport == 'ssh' else fleet.LocalTransport()
+    dataset, outcomes = fleet.collect(hosts, scopes=scope or ('all',), transport=fleet_transport, concurrency=concurrency,
+                                      retries=retries, timeout=timeout, deadline=deadline)
+    if output_format in {'ndjson', 'parquet'}:
+        export_batch(dataset.values(), output_format, output)
+    else:
+        export(dataset, output_format, False, output)
+    if html_report:
+        from system_intelligence.html_report import write_fleet_report
+
+        with open(html_report, 'w', encoding='utf-8') as html_file:
+            write_fleet_report(dataset.values(), html_file, details=True)
+    if verbose:
+        with contextlib.redirect_stdout(sys.stderr) if output == '-' else contextlib.nullcontext():
+            fleet.print_outcomes(outcomes)
+    if not dataset:
+        sys.exit(1)
+
+
+@main.command('diff')
+@click.argument('baseline', type=click.Path(exists=True, dir_okay=False))
+@click.argument('snapshot', type=click.Path(exists=True, dir_okay=False))
+@click.option('-f', '--output_format', type=click.Choice(OUTPUT_FORMATS), default='json', show_default=True, help='Output file format of the delta.')
+@click.option('-o', '--output', type=str, help='Write the changes as delta to the given file instead of printing them. - writes to the standard output.')
+@click.option('--ignore', multiple=True, default=('/timings',), show_default=True, metavar='PATH',
+              help='JSON Pointer of a value which is not compared, e.g. /hdd/usage. Can be repeated.')
+def diff_command(baseline, snapshot, output_format, output, ignore):
+    """
+    Compare an exported result with a baseline and print all changed values.
+
+    Both files may be json, yml, ndjson, msgpack, cbor or raw exports, as given by their extension. Exits with 1 if anything changed.
+    """
+    from system_intelligence import diff, export_formats
+
+    try:
+        old, new = export_formats.load(baseline), export_formats.load(snapshot)
+    except (ImportError, ValueError, SyntaxError) as err:
+        print(f'[bold red]Unable to read results: {err}', file=sys.stderr)
+        sys.exit(2)
+    changes = diff.diff(old, new, ignore=ignore)
+    if output:
+        from system_intelligence.query import export
+
+        export({'baseline': diff.fingerprint(old), 'changes': diff.to_patch(changes)}, output_format, False, output)
+    else:
+        diff.print_changes(changes)
+    sys.exit(1 if changes else 0)
+
+
+@main.command('report')
+@click.argument('files', type=click.Path(exists=True, dir_okay=False), nargs=-1, required=True)
+@click.option('-o', '--output', type=click.Path(dir_okay=False), required=True, help='Path of the HTML report.')
+@click.option('--title', default='system-intelligence fleet report', show_default=True, help='Title of the report.')
+@click.option('--page_size', type=click.IntRange(min=1), default=100, show_default=True, help='Number of hosts shown per page.')
+@click.option('--details/--no-details', default=True, show_default=True, help='Include the full results of every host, expandable below its hostname.')
+def report_command(files, output, title, page_size, details):
+    """
+    Write one sortable HTML report with a row per snapshot of all given exports.
+
+    Files may be json, yml, ndjson, msgpack, cbor or raw exports of the query or the fleet command, as given by their extension.
+    Sequences of snapshots are read one at a time, so that reports over thousands of hosts are written with bounded memory.
+    """
+    import itertools
+    from system_intelligence import export_formats
+    from system_intelligence.html_report import write_fleet_report
+
+    try:
+        with open(output, 'w', encoding='utf-8') as html_file:
+            write_fleet_report(itertools.chain.from_iterable(export_formats.iter_snapshots(path) for path in files), html_file,
+                               title=title, page_size=page_size, details=details)
+    except (ImportError, NotImplementedError, ValueError, SyntaxError) as err:
+        print(f'[bold red]Unable to read results: {err}', file=sys.stderr)
+        sys.exit(2)
+
+
+@main.command('ingest')
+@click.argument('files', type=click.Path(exists=True, dir_okay=False), nargs=-1, required=True)
+@click.option('--store', 'store_path', type=click.Path(dir_okay=False),
+              help='Path of the snapshot store. Defaults to snapshots.db in the data directory of the user.')
+def ingest_command(files, store_path):
+    """
+    Add the snapshots of exported results to the snapshot store, e.g. to search them with the search command.
+
+    Files may be json, yml, ndjson, msgpack, cbor or raw exports of the query or the fleet command, as given by their extension.
+    Snapshots which are already stored are skipped.
+    """
+    from system_intelligence.store import SnapshotStore
+
+    failed = False
+    with SnapshotStore(store_path) as store:
+        for path in files:
+            try:
+                added, skipped = store.ingest(path)
+            except (ImportError, NotImplementedError, ValueError, SyntaxError) as err:
+                print(f'[bold red]Unable to ingest {path}: {err}', file=sys.stderr)
+                failed = True
+                continue
+            print(f'[green]{path}: {added} snapshots added, {skipped} already stored')
+    if failed:
+        sys.exit(2)
+
+
+@main.command('search')
+@click.argument('filters', nargs=-1)
+@click.option('--store', 'store_path', type=click.Path(exists=True, dir_okay=False),
+              help='Path of the snapshot store. Defaults to snapshots.db in the data directory of the user.')
+@click.option('-s', '--show', multiple=True, metavar='FIELD', help='Show the values of a field next to the hostname. Can be repeated.')
+@click.option('--stats', 'stats_field', metavar='FIELD', help='Print count, minimum, maximum and mean of a field instead of the snapshots.')
+@click.option('--group_by', metavar='FIELD', help='Print the count of snapshots (and --stats) per value of a field.')
+@click.option('--history', is_flag=True, help='Search all snapshots instead of the latest one of every host.')
+@click.option('--json', 'as_json', is_flag=True, help='Print the results as JSON.')
+def search_command(filters, store_path, show, stats_field, group_by, history, as_json):
+    """
+    Search the latest snapshots of all hosts in the snapshot store.
+
+    Filters compare a field with a value, like 'software.gcc<10', 'ram.total<64GiB', 'cpu.brand~*EPYC*' (glob pattern) or
+    'hostname~gpu*'. A field without comparison, like software.nvcc, has to exist. Supported operators are = != < <= > >= and ~.
+    Fields are hostname, os, swap, gpus, disks, cpu.brand, cpu.cores, cpu.clock, ram.total, bank.memory, disk.model, disk.size,
+    gpu.brand, gpu.memory and more, software.NAME (version of a program) and package.NAME (version of a python package).
+    """
+    import json
+    from system_intelligence.store import SnapshotStore, parse_filter, field, print_aggregates, print_results
+
+    try:
+        parsed_filters = [parse_filter(search_filter) for search_filter in filters]
+        for name in [*show, stats_field, group_by]:
+            if name:
+                field(name)
+    except ValueError as err:
+        print(f'[bold red]{err}', file=sys.stderr)
+        sys.exit(2)
+    with SnapshotStore(store_path) as store:
+        if stats_field or group_by:
+            aggregates = store.aggregate(stats_field or group_by, parsed_filters, group_by=group_by, latest=not history)
+            if as_json:
+                click.echo(json.dumps([aggregate._asdict() for aggregate in aggregates], indent=2))
+            else:
+                print_aggregates(stats_field or group_by, aggregates, group_by=group_by)
+            found = any(aggregate.count for aggregate in aggregates)
+        else:
+            shown = list(show) or [search_filter.field for search_filter in parsed_filters]
+            results = store.search(parsed_filters, show=shown, latest=not history)
+            if as_json:
+                click.echo(json.dumps(results, indent=2))
+            else:
+                print_results(results)
+            found = bool(results)
+    sys.exit(0 if found else 1)
+
+
+@main.command('watch')
+@click.argument('scope', type=click.Choice(['all', 'cpu', 'ram', 'swap', 'hdd', 'diskio', 'network']), nargs=-1)
+@click.option('-i', '--interval', type=click.FloatRange(min=0), default=1.0, show_default=True, help='Seconds between two samples.')
+@click.option('-n', '--count', type=click.IntRange(min=1), help='Stop after the given number of samples. Defaults to run until interrupted.')
+@click.option('--buffer_size', type=click.IntRange(min=1), default=3600, show_default=True,
+              help='Number of samples kept for the min, max and mean values.')
+@click.option('--max_overhead', type=click.FloatRange(min=0), default=0.01, show_default=True,
+              help='Maximal fraction of one CPU spent on sampling. The interval is stretched if sampling is more expensive. 0 to disable.')
+@click.option('--ndjson', type=click.Path(dir_okay=False), help='Append every sample as JSON line to the given file.')
+@click.option('--per_core', is_flag=True, help='Sample frequency and utilisation of every CPU core. Requires numpy.')
+@click.option('--include_nic', 'include_nics', multiple=True, metavar='GLOB',
+              help='Only sample network interfaces whose name matches this pattern. Can be repeated.')
+@click.option('--exclude_nic', 'exclude_nics', multiple=True, metavar='GLOB',
+              help='Do not sample network interfaces whose name matches this pattern, e.g. veth*. Can be repeated.')
+@click.option('--exclude_virtual_nics', is_flag=True, help='Do not sample virtual network interfaces like loopback, veth and bridges (only on Linux).')
+@click.option('--verbose/--silent', default=True, help='Show a live updating table of all metrics.')
+def watch_command(scope, interval, count, buffer_size, max_overhead, ndjson, per_core, include_nics, exclude_nics, exclude_virtual_nics, verbose):
+    """
+    Sample dynamic metrics of the system continuously.
+
+    Currently supported arguments are
+
+    'all' or 'cpu', 'ram', 'swap', 'hdd', 'diskio', 'network'
+    """
+    from system_intelligence.watch import METRICS, watch
+
+    if not verbose and not ndjson:
+        print('[bold yellow]Please specify an ndjson output path or run watch without the silent option!')
+        sys.exit(1)
+    scopes = set(METRICS) if not scope or 'all' in scope else set(scope)
+    watch(scopes, interval=interval, count=count, buffer_size=buffer_size, max_overhead=max_overhead, ndjson=ndjson, live=verbose, per_core=per_core,
+          options={'network': {'include_nics': include_nics, 'exclude_nics': exclude_nics, 'exclude_virtual': exclude_virtual_nics}})
 
 
 if __name__ == "__main__":
+    from rich.traceback import install
+
     install()  # Install rich traceback
     sys.exit(main())  # pragma: no cover
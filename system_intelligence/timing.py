@@ -0,0 +1,205 @@
+"""Measure where the time of a query goes: wall and CPU time of every scope, subprocess and export step."""
+
+import contextlib
+import importlib
+import itertools
+import subprocess
+import threading
+import time
+import typing as t
+
+from rich import print
+
+_ids = itertools.count(1)
+_hooks: t.List[t.Callable[['Span'], t.Any]] = []
+_lock = threading.Lock()
+_local = threading.local()
+# spans finished since start_recording or None if not recording
+_recorded: t.Optional[t.List['Span']] = None
+
+
+class Span:
+    """
+    A timed operation of a given kind, e.g. the query of a scope, a subprocess or an export step.
+
+    wall and cpu are the elapsed wall clock and CPU time of the thread running the operation in seconds.
+    parent is the id of the span the operation was started in (by the same thread), if any.
+    """
+
+    def __init__(self, kind: str, name: str, attributes: t.Optional[t.Mapping[str, t.Any]] = None, parent: t.Optional[int] = None):
+        self.id = next(_ids)
+        self.parent = parent
+        self.kind = kind
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.thread = threading.current_thread().name
+        self.start = time.time()
+        self.wall: t.Optional[float] = None
+        self.cpu: t.Optional[float] = None
+        self.error: t.Optional[str] = None
+
+    def to_dict(self) -> t.Dict[str, t.Any]:
+        """
+        Get the span as JSON serializable dictionary.
+        """
+        return {'id': self.id, 'parent': self.parent, 'kind': self.kind, 'name': self.name, 'start': self.start,
+                'wall': self.wall, 'cpu': self.cpu, 'error': self.error, 'thread': self.thread, 'attributes': self.attributes}
+
+    def __repr__(self) -> str:
+        return f'Span({self.kind}:{self.name}, wall={self.wall}, cpu={self.cpu})'
+
+
+def add_hook(hook: t.Callable[[Span], t.Any]) -> None:
+    """
+    Call hook with every finished span, e.g. to forward it to a tracing system.
+    Hooks are called in the thread which ran the operation and should return quickly.
+    """
+    _hooks.append(hook)
+
+
+def remove_hook(hook: t.Callable[[Span], t.Any]) -> None:
+    """
+    Stop calling a hook added with add_hook.
+    """
+    _hooks.remove(hook)
+
+
+def load_hook(path: str) -> t.Callable[[Span], t.Any]:
+    """
+    Import a hook given as 'module:callable', e.g. 'my_tracing:forward_span'.
+    """
+    module_name, separator, attribute = path.partition(':')
+    if not separator or not module_name or not attribute:
+        raise ValueError(f'{path} is not of the form module:callable')
+    hook = importlib.import_module(module_name)
+    for name in attribute.split('.'):
+        hook = getattr(hook, name)
+    if not callable(hook):
+        raise ValueError(f'{path} is not callable')
+
+    return hook
+
+
+def start_recording() -> None:
+    """
+    Keep all spans finished from now on until stop_recording is called.
+    """
+    global _recorded
+    with _lock:
+        _recorded = []
+
+
+def recorded() -> t.List[Span]:
+    """
+    Get all spans finished since start_recording, ordered by their end.
+    """
+    with _lock:
+        return list(_recorded or [])
+
+
+def stop_recording() -> t.List[Span]:
+    """
+    Stop keeping spans.
+
+    :return: all spans finished since start_recording
+    """
+    global _recorded
+    with _lock:
+        spans, _recorded = _recorded or [], None
+
+    return spans
+
+
+def current_span() -> t.Optional[Span]:
+    """
+    Get the innermost span currently running in this thread, if any.
+    """
+    return getattr(_local, 'current', None)
+
+
+@contextlib.contextmanager
+def activate(parent: t.Optional[Span]) -> t.Iterator[None]:
+    """
+    Nest spans started by this thread within the with block below parent, e.g. a span of the thread which started this one.
+    """
+    previous = current_span()
+    _local.current = parent
+    try:
+        yield
+    finally:
+        _local.current = previous
+
+
+@contextlib.contextmanager
+def span(kind: str, name: str, **attributes) -> t.Iterator[Span]:
+    """
+    Time the operation run in the with block. Attributes of the yielded span may be set within the block.
+    """
+    parent = current_span()
+    current = Span(kind, name, attributes, parent.id if parent is not None else None)
+    _local.current = current
+    wall_started, cpu_started = time.perf_counter(), time.thread_time()
+    try:
+        yield current
+    except BaseException as err:
+        current.error = type(err).__name__
+        raise
+    finally:
+        current.wall = time.perf_counter() - wall_started
+        current.cpu = time.thread_time() - cpu_started
+        _local.current = parent
+        _finish(current)
+
+
+def _finish(finished: Span) -> None:
+    with _lock:
+        if _recorded is not None:
+            _recorded.append(finished)
+    for hook in list(_hooks):
+        try:
+            hook(finished)
+        except Exception as err:
+            print(f'[bold yellow]Timing hook {getattr(hook, "__name__", hook)} failed: {err!r}')
+
+
+def check_output(cmd: t.Sequence[str], **kwargs) -> t.Any:
+    """
+    subprocess.check_output recording a subprocess span with the command and its exit code.
+    """
+    with span('subprocess', cmd[0], command=' '.join(cmd)) as current:
+        try:
+            output = subprocess.check_output(cmd, **kwargs)
+        except subprocess.CalledProcessError as err:
+            current.attributes['returncode'] = err.returncode
+            raise
+        current.attributes['returncode'] = 0
+
+    return output
+
+
+def print_timings(spans: t.Sequence[Span]) -> None:
+    """
+    Print all spans as rich table in the order they were started, nested spans indented below their parent.
+    """
+    from rich.console import Console
+    from .util.rich_util import create_styled_table
+
+    children: t.Dict[t.Optional[int], t.List[Span]] = {}
+    ids = {current.id for current in spans}
+    for current in sorted(spans, key=lambda current: current.start):
+        # spans whose parent was not recorded are shown at the top level
+        children.setdefault(current.parent if current.parent in ids else None, []).append(current)
+    table = create_styled_table('Timings')
+    for column in ['Kind', 'Name', 'Wall (ms)', 'CPU (ms)', 'Details']:
+        table.add_column(column, justify='left')
+
+    def add_rows(parent: t.Optional[int], depth: int) -> None:
+        for current in children.get(parent, []):
+            details = ', '.join(f'{key}={value}' for key, value in current.attributes.items())
+            if current.error:
+                details = f'[red]{current.error}[/red] {details}'.rstrip()
+            table.add_row(current.kind, '  ' * depth + current.name, f'{current.wall * 1000:.1f}', f'{current.cpu * 1000:.1f}', details)
+            add_rows(current.id, depth + 1)
+
+    add_rows(None, 0)
+    Console().print(table)
@@ -0,0 +1,201 @@
+import glob
+import os
+import re
+import typing as t
+
+from .base_info import BaseInfo
+from .records import CoreRecord, CpuCacheRecord, DeviceLocalityRecord, NumaNodeRecord, PackageRecord, TopologyRecord
+from .sysfs_backend import parse_size, read_file
+
+# a PCI device directory in sysfs is named by its address, domain:bus:device.function
+PCI_ADDRESS = re.compile(r'^[0-9a-f]{4,}:[0-9a-f]{2}:[0-9a-f]{2}\.[0-7]$')
+
+# PCI base class of bridges, which are left out of the PCI devices
+PCI_CLASS_BRIDGE = '0x06'
+
+
+def parse_cpu_list(cpu_list: t.Optional[str]) -> t.Tuple[int, ...]:
+    """
+    Parse a CPU list as written by the kernel, e.g. 0-3,8-11, into CPU numbers.
+    """
+    cpus: t.List[int] = []
+    for part in (cpu_list or '').split(','):
+        first, _, last = part.strip().partition('-')
+        if first:
+            cpus.extend(range(int(first), int(last or first) + 1))
+
+    return tuple(cpus)
+
+
+def format_cpu_list(cpus: t.Iterable[int]) -> str:
+    """
+    Format CPU numbers as CPU list like the kernel does, e.g. 0-3,8-11, which is accepted by taskset and numactl.
+    """
+    ranges: t.List[t.List[int]] = []
+    for cpu in sorted(cpus):
+        if ranges and cpu == ranges[-1][1] + 1:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+
+    return ','.join(str(first) if first == last else f'{first}-{last}' for first, last in ranges)
+
+
+def _read_int(path: str) -> t.Optional[int]:
+    value = read_file(path)
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def read_packages(root: str = '/', online: t.Sequence[int] = ()) -> t.Tuple[PackageRecord, ...]:
+    """
+    Group the online CPUs into packages and cores from /sys/devices/system/cpu/cpu*/topology
+    and collect the caches of every package, each cache once with all CPUs sharing it.
+    """
+    cpu_dir = os.path.join(root, 'sys', 'devices', 'system', 'cpu')
+    cpus_by_package: t.Dict[int, t.List[int]] = {}
+    cpus_by_core: t.Dict[t.Tuple[int, int], t.List[int]] = {}
+    caches: t.Dict[int, t.Dict[t.Tuple[int, str, t.Tuple[int, ...]], CpuCacheRecord]] = {}
+    for cpu in online:
+        topology = os.path.join(cpu_dir, f'cpu{cpu}', 'topology')
+        package = _read_int(os.path.join(topology, 'physical_package_id'))
+        package = package if package is not None and package >= 0 else 0
+        core = _read_int(os.path.join(topology, 'core_id'))
+        cpus_by_package.setdefault(package, []).append(cpu)
+        cpus_by_core.setdefault((package, core if core is not None else cpu), []).append(cpu)
+        package_caches = caches.setdefault(package, {})
+        for index in glob.glob(os.path.join(cpu_dir, f'cpu{cpu}', 'cache', 'index[0-9]*')):
+            level = _read_int(os.path.join(index, 'level'))
+            cache_type = read_file(os.path.join(index, 'type'), '')
+            shared = parse_cpu_list(read_file(os.path.join(index, 'shared_cpu_list'))) or (cpu,)
+            if level is None or (level, cache_type, shared) in package_caches:
+                continue
+            size = read_file(os.path.join(index, 'size'))
+            package_caches[(level, cache_type, shared)] = CpuCacheRecord(level=level,
+                                                                         type=cache_type,
+                                                                         size=parse_size(size) if size else None,
+                                                                         cpus=shared)
+
+    return tuple(PackageRecord(id=package,
+                               cpus=tuple(cpus),
+                               cores=tuple(CoreRecord(id=core, cpus=tuple(core_cpus))
+                                           for (core_package, core), core_cpus in sorted(cpus_by_core.items()) if core_package == package),
+                               caches=tuple(sorted(caches[package].values(), key=lambda cache: (cache.level, cache.cpus, cache.type))))
+                 for package, cpus in sorted(cpus_by_package.items()))
+
+
+def read_nodes(root: str = '/') -> t.Tuple[NumaNodeRecord, ...]:
+    """
+    Read the CPUs, memory and distances of all NUMA nodes from /sys/devices/system/node.
+    """
+    node_dir = os.path.join(root, 'sys', 'devices', 'system', 'node')
+    node_ids = sorted(int(os.path.basename(path)[4:]) for path in glob.glob(os.path.join(node_dir, 'node[0-9]*')))
+    nodes = []
+    for node in node_ids:
+        path = os.path.join(node_dir, f'node{node}')
+        memory = None
+        for line in read_file(os.path.join(path, 'meminfo'), '').splitlines():
+            # Node 0 MemTotal:       16384 kB
+            fields = line.split()
+            if len(fields) >= 4 and fields[2] == 'MemTotal:':
+                memory = int(fields[3]) * 1024
+        nodes.append(NumaNodeRecord(id=node,
+                                    cpus=parse_cpu_list(read_file(os.path.join(path, 'cpulist'))),
+                                    memory=memory,
+                                    # listed in the order of the node ids, like numactl --hardware
+                                    distances=tuple(int(distance) for distance in read_file(os.path.join(path, 'distance'), '').split())))
+
+    return tuple(nodes)
+
+
+def _pci_locality(kind: str, name: str, device_path: str) -> DeviceLocalityRecord:
+    """
+    Get the locality of a device from the nearest PCI device among the device and its parents in sysfs.
+    """
+    path = os.path.realpath(device_path)
+    while path != os.path.dirname(path) and not PCI_ADDRESS.match(os.path.basename(path)):
+        path = os.path.dirname(path)
+    if not PCI_ADDRESS.match(os.path.basename(path)):
+        return DeviceLocalityRecord(kind=kind, name=name)
+    numa_node = _read_int(os.path.join(path, 'numa_node'))
+
+    return DeviceLocalityRecord(kind=kind,
+                                name=name,
+                                pci_address=os.path.basename(path),
+                                pci_class=read_file(os.path.join(path, 'class')),
+                                numa_node=numa_node if numa_node is not None and numa_node >= 0 else None,
+                                cpus=parse_cpu_list(read_file(os.path.join(path, 'local_cpulist'))))
+
+
+def read_devices(root: str = '/') -> t.Tuple[DeviceLocalityRecord, ...]:
+    """
+    Get the NUMA locality of all network interfaces and disks backed by a device and of all PCI devices except bridges.
+    """
+    devices = []
+    for kind, pattern in [('net', os.path.join(root, 'sys', 'class', 'net', '*', 'device')), ('block', os.path.join(root, 'sys', 'block', '*', 'device'))]:
+        for device_path in sorted(glob.glob(pattern)):
+            devices.append(_pci_locality(kind, os.path.basename(os.path.dirname(device_path)), device_path))
+    for device_path in sorted(glob.glob(os.path.join(root, 'sys', 'bus', 'pci', 'devices', '*'))):
+        if read_file(os.path.join(device_path, 'class'), '').startswith(PCI_CLASS_BRIDGE):
+            continue
+        devices.append(_pci_locality('pci', os.path.basename(device_path), device_path))
+
+    return tuple(devices)
+
+
+class TopologyInfo(BaseInfo):
+    """
+    Query the topology of CPUs, caches, NUMA nodes and devices
+    """
+
+    def query_topology(self, root: str = '/', **_) -> TopologyRecord:
+        """
+        Get the packages with their cores and caches, the NUMA nodes with their distances and the NUMA locality of devices from sysfs.
+        Only available on Linux; root may point to a copy of /sys.
+        """
+        if self.OS != 'linux':
+            return TopologyRecord()
+        cpu_dir = os.path.join(root, 'sys', 'devices', 'system', 'cpu')
+        online = parse_cpu_list(read_file(os.path.join(cpu_dir, 'online'))) \
+            or tuple(sorted(int(os.path.basename(path)[3:]) for path in glob.glob(os.path.join(cpu_dir, 'cpu[0-9]*'))))
+        smt = read_file(os.path.join(cpu_dir, 'smt', 'active'))
+
+        return TopologyRecord(packages=read_packages(root, online),
+                              nodes=read_nodes(root),
+                              devices=read_devices(root),
+                              smt=smt == '1' if smt is not None else None,
+                              online=online)
+
+    def print_topology_info(self, topology: TopologyRecord) -> None:
+        """
+        Print the packages, NUMA nodes and the locality of devices
+        """
+        self.init_table(title='CPU Topology', column_names=['Package', 'Cores', 'CPUs', 'Caches'])
+        for package in topology.packages:
+            # caches of the same level and type, e.g. the L2 caches of all cores, are summarised in one line
+            summary: t.Dict[t.Tuple[int, str], t.List[CpuCacheRecord]] = {}
+            for cache in package.caches:
+                summary.setdefault((cache.level, cache.type), []).append(cache)
+            caches = [f'L{level} {cache_type}: {len(same)} x {self.format_bytes(same[0].size)} per {len(same[0].cpus)} CPUs'
+                      for (level, cache_type), same in summary.items()]
+            self.table.add_row(str(package.id), str(len(package.cores)), format_cpu_list(package.cpus), '\n'.join(caches))
+        self.table.caption = f'SMT {"active" if topology.smt else "inactive"}' if topology.smt is not None else None
+        self.print_table()
+
+        if topology.nodes:
+            node_ids = [node.id for node in topology.nodes]
+            self.init_table(title='NUMA Nodes', column_names=['Node', 'CPUs', 'Memory', *(f'Distance {node}' for node in node_ids)])
+            for node in topology.nodes:
+                self.table.add_row(str(node.id), format_cpu_list(node.cpus), self.format_bytes(node.memory),
+                                   *(str(distance) for distance in node.distances))
+            self.print_table()
+
+        local_devices = [device for device in topology.devices if device.kind != 'pci' or device.numa_node is not None]
+        if local_devices:
+            self.init_table(title='Device Locality', column_names=['Device', 'Kind', 'PCI Address', 'NUMA Node', 'Local CPUs'])
+            for device in local_devices:
+                self.table.add_row(device.name, device.kind, device.pci_address or '', str(device.numa_node) if device.numa_node is not None else '',
+                                   format_cpu_list(device.cpus))
+            self.print_table()
@@ -0,0 +1,130 @@
+"""Inventory of block devices kept up to date from udev events."""
+
+import itertools
+import logging
+import threading
+import types
+import typing as t
+
+from .records import DiskRecord
+
+_LOG = logging.getLogger(__name__)
+
+# udev reports disk sizes in sectors of 512 bytes, regardless of the logical block size of the disk
+SECTOR_SIZE = 512
+
+# device mapper, loop and software RAID devices are not physical disks
+IGNORED_DEVICE_PATHS = frozenset({'/dm', '/loop', '/md'})
+
+
+def is_ignored(device: t.Any) -> bool:
+    """
+    Check if a udev block device is not a physical disk.
+    """
+    return any(path in device.device_path for path in IGNORED_DEVICE_PATHS)
+
+
+def disk_record(device: t.Any) -> DiskRecord:
+    """
+    Create the record of a udev block device. The model is taken from the device itself or its nearest ancestor which has one.
+    """
+    model = ''
+    for device_ in itertools.chain([device], device.ancestors):
+        try:
+            model = device_.attributes.asstring('model')
+            break
+        except KeyError:
+            pass
+
+    return DiskRecord(size=device.attributes.asint('size') * SECTOR_SIZE, model=model)
+
+
+def list_disks(context: t.Any) -> t.Dict[str, DiskRecord]:
+    """
+    Enumerate all physical disks known to udev.
+    """
+    return {device.device_node: disk_record(device) for device in context.list_devices(subsystem='block', DEVTYPE='disk')
+            if not is_ignored(device)}
+
+
+class DiskInventory:
+    """
+    Keep the records of all physical disks up to date from udev add, change and remove events.
+
+    Disks are enumerated once when the monitor starts, afterwards only the records of disks which were hotplugged,
+    removed or changed (e.g. resized) are updated on a background thread. Every update publishes a new mapping,
+    so that reading the current disks takes constant time and never sees a partial update.
+    """
+
+    def __init__(self, context: t.Any):
+        self.context = context
+        self._devices: t.Mapping[str, DiskRecord] = types.MappingProxyType({})
+        self._lock = threading.Lock()
+        self._observer: t.Optional[t.Any] = None
+
+    @property
+    def devices(self) -> t.Mapping[str, DiskRecord]:
+        """
+        Read-only mapping of the device nodes of all disks to their records.
+        """
+        return self._devices
+
+    @property
+    def running(self) -> bool:
+        """
+        Whether udev events are applied.
+        """
+        return self._observer is not None
+
+    def start(self) -> None:
+        """
+        Enumerate all disks and start applying udev events in a background thread.
+        """
+        import pyudev
+
+        monitor = pyudev.Monitor.from_netlink(self.context)
+        monitor.filter_by('block', device_type='disk')
+        # listen before enumerating, so that no event between both is lost; events of already known disks are applied again
+        monitor.start()
+        self.refresh()
+        self._observer = pyudev.MonitorObserver(monitor, callback=self.handle_event, name='system-intelligence-udev')
+        self._observer.daemon = True
+        self._observer.start()
+
+    def stop(self) -> None:
+        """
+        Stop applying udev events. The last known disks are kept.
+        """
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer = None
+
+    def refresh(self) -> None:
+        """
+        Enumerate all disks again.
+        """
+        with self._lock:
+            self._devices = types.MappingProxyType(list_disks(self.context))
+
+    def handle_event(self, device: t.Any) -> None:
+        """
+        Apply a udev event of a block device.
+        """
+        if device.device_node is None or is_ignored(device):
+            return
+        if device.action == 'remove':
+            record = None
+        else:
+            try:
+                record = disk_record(device)
+            except (KeyError, ValueError):
+                # attributes of a disk which is being removed may be gone already
+                _LOG.debug(f'Unable to read attributes of {device.device_node}')
+                return
+        with self._lock:
+            devices = dict(self._devices)
+            if record is None:
+                devices.pop(device.device_node, None)
+            else:
+                devices[device.device_node] = record
+            self._devices = types.MappingProxyType(devices)
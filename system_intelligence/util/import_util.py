@@ -0,0 +1,24 @@
+import functools
+import importlib
+import types
+import typing as t
+from rich import print
+
+
+@functools.lru_cache(maxsize=None)
+def import_optional(name: str, warning: str = '') -> t.Optional[types.ModuleType]:
+    """
+    Import an optional dependency on first use, so that it is only loaded if a scope actually needs it.
+    Prints the given warning once if the dependency is not installed.
+
+    :return: the imported module or None if it is not available
+    """
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        if warning:
+            print(f'[bold yellow]{warning}')
+    except Exception:
+        # e.g. py-cpuinfo currently only works on X86 and some ARM CPUs
+        print(f'[bold red]Package {name} does not support this system!')
+    return None
@@ -1,5 +1,10 @@
+import os
+import signal
+import typing as t
 from subprocess import Popen, PIPE
 
+from .. import timing
+
 
 def is_process_accessible(shell_command: list) -> bool:
     """
@@ -7,8 +12,10 @@ def is_process_accessible(shell_command: list) -> bool:
     :return: True if accessible, false if not
     """
     try:
-        is_command_installed = Popen(shell_command, stdout=PIPE, stderr=PIPE, universal_newlines=True)
-        (git_installed_stdout, git_installed_stderr) = is_command_installed.communicate()
+        with timing.span('subprocess', shell_command[0], command=' '.join(shell_command)) as command_span:
+            is_command_installed = Popen(shell_command, stdout=PIPE, stderr=PIPE, universal_newlines=True)
+            (git_installed_stdout, git_installed_stderr) = is_command_installed.communicate()
+            command_span.attributes['returncode'] = is_command_installed.returncode
         if is_command_installed.returncode != 0:
             print(f'[bold red]Could not find \'{shell_command[0]}\' in the PATH. Is it installed?')
             print(f'Run command was: \'{"".join(shell_command)} \'')
@@ -19,3 +26,28 @@ def is_process_accessible(shell_command: list) -> bool:
         return False
 
     return True
+
+
+def new_process_group_kwargs() -> t.Dict[str, t.Any]:
+    """
+    Popen keyword arguments to start a process in its own process group, so that it can be killed with all its children.
+    """
+    if os.name == 'nt':
+        return {}
+    return {'start_new_session': True}
+
+
+def kill_process_tree(process: Popen, reap: bool = True) -> None:
+    """
+    Kill a process started with new_process_group_kwargs together with all processes it spawned and reap it.
+    Pass reap=False if another thread still reads from the process' pipes.
+    """
+    try:
+        if os.name == 'nt':
+            process.kill()
+        else:
+            os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+    if reap:
+        process.communicate()
@@ -0,0 +1,71 @@
+import subprocess
+import sys
+import time
+import typing as t
+
+# runs the CLI without the rich traceback handler of __main__, which would distort the profile
+_CLI_MODULE = 'system_intelligence.system_intelligence_cli'
+_CLI_SNIPPET = f'import sys; from {_CLI_MODULE} import main; sys.exit(main(prog_name="system-intelligence"))'
+
+
+def parse_import_times(stderr: str) -> t.Tuple[t.List[t.Tuple[str, int, int, int]], t.List[str]]:
+    """
+    Parse the output of python -X importtime.
+
+    :return: a (module, nesting level, self time in us, cumulative time in us) tuple per import and all other lines
+    """
+    imports = []
+    other_lines = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or line.endswith('| imported package'):
+            if not line.startswith('import time:'):
+                other_lines.append(line)
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split('|')
+        level = (len(module) - len(module.lstrip())) // 2
+        imports.append((module.strip(), level, int(self_us), int(cumulative_us)))
+
+    return imports, other_lines
+
+
+def outermost_imports(imports: t.Sequence[t.Tuple[str, int, int, int]], module: str = _CLI_MODULE) -> t.List[t.Tuple[str, int, int, int]]:
+    """
+    Select the imports at nesting level 0 from the import of module on, i.e. module itself and everything imported lazily
+    while running it, leaving out the imports of the interpreter's own startup before. Their cumulative times include all nested imports.
+    If module was not imported, all imports at level 0 are selected.
+    """
+    # imports are listed once they finished, so the nested imports of module come right before it
+    start = next((index for index, entry in enumerate(imports) if entry[0] == module and entry[1] == 0), 0)
+
+    return [entry for entry in imports[start:] if entry[1] == 0]
+
+
+def profile_startup(args: t.Sequence[str], top: int = 20) -> int:
+    """
+    Run the CLI with the given arguments in a new interpreter and print how much time importing each module took.
+
+    :return: return code of the profiled run
+    """
+    cmd = [sys.executable, '-X', 'importtime', '-c', _CLI_SNIPPET, *args]
+    started = time.perf_counter()
+    process = subprocess.run(cmd, stderr=subprocess.PIPE, universal_newlines=True)
+    wall_time = time.perf_counter() - started
+    imports, other_lines = parse_import_times(process.stderr)
+    for line in other_lines:
+        sys.stderr.write(f'{line}\n')
+
+    from rich.console import Console
+    from .rich_util import create_styled_table
+
+    top_level = sorted(outermost_imports(imports), key=lambda entry: entry[3], reverse=True)
+    import_time = sum(entry[3] for entry in top_level)
+    table = create_styled_table('Startup Profile')
+    for column in ['Module', 'Self (ms)', 'Cumulative (ms)', 'Share']:
+        table.add_column(column, justify='left')
+    for module, _, self_us, cumulative_us in top_level[:top]:
+        table.add_row(module, f'{self_us / 1000:.1f}', f'{cumulative_us / 1000:.1f}', f'{cumulative_us / max(import_time, 1):.0%}')
+    console = Console(stderr=True)
+    console.print(table)
+    console.print(f'[bold blue]Imports: {import_time / 1000:.1f} ms of {wall_time * 1000:.1f} ms total run time')
+
+    return process.returncode
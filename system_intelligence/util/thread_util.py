@@ -0,0 +1,70 @@
+import collections
+import queue
+import threading
+import time
+import typing as t
+
+from .. import timing
+
+
+def run_with_deadlines(tasks: t.Mapping[str, t.Callable[[], t.Any]],
+                       workers: t.Optional[int] = None,
+                       timeout: t.Optional[float] = None,
+                       max_abandoned: t.Optional[int] = None) -> t.Tuple[t.Dict[str, t.Any], t.Dict[str, BaseException], t.List[str]]:
+    """
+    Run the given named callables concurrently on daemon threads, at most workers at a time.
+
+    A task which does not finish within timeout seconds after it was started is abandoned: its thread keeps running
+    in the background (daemon threads never block the interpreter from exiting) and its worker slot is freed.
+    Once max_abandoned tasks were abandoned, no further tasks are started.
+    Timing spans started by the tasks are nested below the span of the calling thread.
+
+    :return: results by task name, raised exceptions by task name and the names of all tasks that timed out or were never started
+    """
+    pending = collections.deque(tasks.items())
+    workers = workers if workers else max(len(pending), 1)
+    finished: queue.Queue = queue.Queue()
+    running: t.Dict[str, float] = {}
+    results: t.Dict[str, t.Any] = {}
+    errors: t.Dict[str, BaseException] = {}
+    expired: t.List[str] = []
+    abandoned = 0
+    parent_span = timing.current_span()
+
+    def work(name: str, func: t.Callable[[], t.Any]) -> None:
+        try:
+            with timing.activate(parent_span):
+                finished.put((name, func(), None))
+        except Exception as err:
+            finished.put((name, None, err))
+
+    while pending or running:
+        while pending and len(running) < workers and (max_abandoned is None or abandoned < max_abandoned):
+            name, func = pending.popleft()
+            running[name] = time.monotonic()
+            threading.Thread(target=work, args=(name, func), name=f'system-intelligence-{name}', daemon=True).start()
+        if not running:
+            # too many tasks hang, do not start any new ones
+            expired.extend(name for name, _ in pending)
+            break
+        wait = None if timeout is None else max(0., min(running.values()) + timeout - time.monotonic())
+        try:
+            name, result, error = finished.get(timeout=wait)
+        except queue.Empty:
+            now = time.monotonic()
+            for name, started in list(running.items()):
+                if now - started >= timeout:
+                    del running[name]
+                    expired.append(name)
+                    abandoned += 1
+            continue
+        # late result of an already abandoned task
+        if name not in running:
+            continue
+        del running[name]
+        if error is None:
+            results[name] = result
+        else:
+            errors[name] = error
+
+    return results, errors, expired
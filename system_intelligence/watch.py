@@ -0,0 +1,348 @@
+"""Continuously sample dynamic metrics of the system."""
+
+import array
+import functools
+import json
+import math
+import time
+import typing as t
+
+import psutil
+
+
+def _sample_cpu() -> t.Dict[str, float]:
+    values = {'cpu.percent': psutil.cpu_percent()}
+    try:
+        clock = psutil.cpu_freq()
+    except FileNotFoundError:
+        clock = None
+    if clock is not None:
+        values['cpu.clock_mhz'] = clock.current
+
+    return values
+
+
+def _sample_ram() -> t.Dict[str, float]:
+    memory = psutil.virtual_memory()
+
+    return {'ram.used': memory.used, 'ram.available': memory.available, 'ram.percent': memory.percent}
+
+
+def _sample_swap() -> t.Dict[str, float]:
+    swap = psutil.swap_memory()
+
+    return {'swap.used': swap.used, 'swap.percent': swap.percent}
+
+
+@functools.lru_cache(maxsize=None)
+def _hdd_querier() -> t.Any:
+    from .hdd_info import HddInfo
+
+    return HddInfo()
+
+
+def _sample_hdd() -> t.Dict[str, float]:
+    values = {}
+    # hung mounts are skipped after a short deadline instead of blocking all samples
+    for usage in _hdd_querier().query_hdd_usage(mount_timeout=0.5).values():
+        if usage.status == 'ok':
+            values[f'hdd.{usage.mountpoint}.used'] = usage.used
+            values[f'hdd.{usage.mountpoint}.percent'] = usage.percent
+
+    return values
+
+
+@functools.lru_cache(maxsize=None)
+def _diskio_querier() -> t.Any:
+    from .diskio_info import DiskioInfo
+
+    querier = DiskioInfo()
+    querier.monitor_devices()
+    return querier
+
+
+def _sample_diskio() -> t.Dict[str, float]:
+    values = {}
+    # rates since the previous sample, so the first sample has none
+    for device, rates in _diskio_querier().sample().items():
+        values[f'diskio.{device}.read_bytes_per_second'] = rates.read_bytes_per_second
+        values[f'diskio.{device}.write_bytes_per_second'] = rates.write_bytes_per_second
+        values[f'diskio.{device}.iops'] = rates.reads_per_second + rates.writes_per_second
+        values[f'diskio.{device}.utilisation'] = rates.utilisation
+
+    return values
+
+
+@functools.lru_cache(maxsize=None)
+def _network_querier() -> t.Any:
+    from .network_info import NetworkInfo
+
+    return NetworkInfo()
+
+
+@functools.lru_cache(maxsize=4096)
+def _select_nic(nic: str, include_nics: t.Tuple[str, ...], exclude_nics: t.Tuple[str, ...], exclude_virtual: bool) -> bool:
+    from .network_info import select_nic
+
+    return select_nic(nic, include_nics=include_nics, exclude_nics=exclude_nics, exclude_virtual=exclude_virtual)
+
+
+def _sample_network(include_nics: t.Collection[str] = (), exclude_nics: t.Collection[str] = (), exclude_virtual: bool = False) -> t.Dict[str, float]:
+    values = {}
+    # the selection of every interface is only determined once, so that many veth interfaces do not cost a lookup on every sample
+    nics = {nic: stats for nic, stats in psutil.net_if_stats().items() if _select_nic(nic, tuple(include_nics), tuple(exclude_nics), exclude_virtual)}
+    for nic, stats in nics.items():
+        values[f'network.{nic}.isup'] = float(stats.isup)
+        values[f'network.{nic}.speed'] = stats.speed
+    for nic, rates in _network_querier().sample(nics).items():
+        values[f'network.{nic}.rx_bytes_per_second'] = rates['rx_bytes_per_second']
+        values[f'network.{nic}.tx_bytes_per_second'] = rates['tx_bytes_per_second']
+        values[f'network.{nic}.packets_per_second'] = rates['rx_packets_per_second'] + rates['tx_packets_per_second']
+        values[f'network.{nic}.errors_per_second'] = rates['rx_errors_per_second'] + rates['tx_errors_per_second']
+        values[f'network.{nic}.drops_per_second'] = rates['rx_drops_per_second'] + rates['tx_drops_per_second']
+        values[f'network.{nic}.utilisation'] = rates['utilisation']
+
+    return values
+
+
+# functions sampling the current values of the metrics of a scope
+METRICS: t.Dict[str, t.Callable[..., t.Dict[str, float]]] = {
+    'cpu': _sample_cpu,
+    'ram': _sample_ram,
+    'swap': _sample_swap,
+    'hdd': _sample_hdd,
+    'diskio': _sample_diskio,
+    'network': _sample_network
+}
+
+
+class RingBuffer:
+    """
+    Keep the last capacity samples of a set of metrics.
+    Every sample is stored as one array of doubles with a column per metric, missing values are NaN.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.columns: t.Dict[str, int] = {}
+        self.times = array.array('d', [math.nan] * capacity)
+        self._rows: t.List[t.Optional[array.array]] = [None] * capacity
+        self._next = 0
+        self.size = 0
+
+    def append(self, timestamp: float, values: t.Mapping[str, float]) -> None:
+        """
+        Store a sample, overwriting the oldest one if the buffer is full.
+        """
+        for name in values:
+            if name not in self.columns:
+                self.columns[name] = len(self.columns)
+        row = array.array('d', [math.nan] * len(self.columns))
+        for name, value in values.items():
+            row[self.columns[name]] = value if value is not None else math.nan
+        self.times[self._next] = timestamp
+        self._rows[self._next] = row
+        self._next = (self._next + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def column(self, name: str) -> t.List[float]:
+        """
+        Get all stored values of a metric from oldest to newest, skipping samples without it.
+        """
+        index = self.columns[name]
+        start = (self._next - self.size) % self.capacity
+        rows = (self._rows[(start + i) % self.capacity] for i in range(self.size))
+
+        return [row[index] for row in rows if index < len(row) and not math.isnan(row[index])]
+
+    def summary(self) -> t.Dict[str, t.Tuple[float, float, float, float]]:
+        """
+        Get the latest, minimal, maximal and mean value of every metric.
+        """
+        summary = {}
+        for name in self.columns:
+            values = self.column(name)
+            if values:
+                summary[name] = (values[-1], min(values), max(values), sum(values) / len(values))
+
+        return summary
+
+
+class MetricSampler:
+    """
+    Sample metrics of the given scopes every interval seconds.
+    options holds keyword arguments of the sampling function of a single scope, e.g. {'network': {'exclude_virtual': True}}.
+    If per_core is set, the frequency and utilisation of every core are sampled into a CpuSeries as well.
+
+    The CPU time spent on sampling is measured. If it exceeds max_overhead (as a fraction of one CPU),
+    the interval is stretched, so that watching never takes more than its budget from other jobs.
+    """
+
+    def __init__(self,
+                 scopes: t.Iterable[str],
+                 interval: float = 1.0,
+                 buffer_size: int = 3600,
+                 max_overhead: float = 0.01,
+                 per_core: bool = False,
+                 options: t.Optional[t.Mapping[str, t.Mapping[str, t.Any]]] = None):
+        options = options or {}
+        self.samplers = [functools.partial(METRICS[scope], **options.get(scope, {})) for scope in METRICS if scope in set(scopes)]
+        self.series = None
+        if per_core:
+            from .cpu_series import CpuSeries
+
+            self.series = CpuSeries(window=buffer_size)
+        self.interval = interval
+        self.max_overhead = max_overhead
+        self.buffer = RingBuffer(buffer_size)
+        self.samples = 0
+        self.sampling_cpu_time = 0.
+        self.sampling_wall_time = 0.
+
+    def sample(self) -> t.Tuple[float, t.Dict[str, float]]:
+        """
+        Sample all metrics once and store them in the ring buffer.
+
+        :return: timestamp and values of the sample
+        """
+        wall_started, cpu_started = time.perf_counter(), time.process_time()
+        timestamp = time.time()
+        values: t.Dict[str, float] = {}
+        for sampler in self.samplers:
+            values.update(sampler())
+        self.buffer.append(timestamp, values)
+        if self.series is not None:
+            self.series.sample()
+        self.samples += 1
+        self.sampling_cpu_time += time.process_time() - cpu_started
+        self.sampling_wall_time += time.perf_counter() - wall_started
+
+        return timestamp, values
+
+    @property
+    def cost(self) -> float:
+        """
+        Average CPU time of a sample in seconds.
+        """
+        return self.sampling_cpu_time / self.samples if self.samples else 0.
+
+    @property
+    def effective_interval(self) -> float:
+        """
+        The interval stretched to keep the sampling overhead within max_overhead.
+        """
+        if not self.max_overhead:
+            return self.interval
+        return max(self.interval, self.cost / self.max_overhead)
+
+    @property
+    def overhead(self) -> float:
+        """
+        Fraction of one CPU spent on sampling at the effective interval.
+        """
+        return self.cost / self.effective_interval if self.effective_interval else 0.
+
+    def run(self, count: t.Optional[int] = None, on_sample: t.Optional[t.Callable[[float, t.Dict[str, float]], None]] = None) -> None:
+        """
+        Sample count times (or until interrupted) and call on_sample with every sample.
+        """
+        next_sample = time.monotonic()
+        while count is None or self.samples < count:
+            timestamp, values = self.sample()
+            if on_sample is not None:
+                on_sample(timestamp, values)
+            if count is not None and self.samples >= count:
+                break
+            next_sample += self.effective_interval
+            time.sleep(max(0., next_sample - time.monotonic()))
+
+
+def render_table(sampler: MetricSampler) -> t.Any:
+    """
+    Render the summary of all sampled metrics as rich table.
+    """
+    from .base_info import BaseInfo
+
+    base_info = BaseInfo()
+    base_info.init_table(title='System Metrics', column_names=['Metric', 'Latest', 'Min', 'Max', 'Mean'])
+    for name, values in sampler.buffer.summary().items():
+        base_info.table.add_row(name, *(_format_value(base_info, name, value) for value in values))
+    base_info.table.caption = (f'{sampler.samples} samples every {sampler.effective_interval:.2f} s, '
+                               f'sampling overhead {sampler.overhead:.2%} of one CPU')
+    if sampler.series is None:
+        return base_info.table
+
+    from rich.table import Table
+
+    metrics_table = base_info.table
+    base_info.init_table(title='CPU Cores', column_names=['Core', 'Clock p50', 'Clock p95', 'Clock Max', 'Load p50', 'Load p95', 'Load Max', 'Throttled'])
+    summary = sampler.series.summary()
+    for core in range(sampler.series.cores if summary else 0):
+        base_info.table.add_row(str(core),
+                                *(base_info.hz_to_hreadable_string(_hz(summary[name][core])) for name in ('frequency_p50', 'frequency_p95', 'frequency_max')),
+                                *(f'{summary[name][core]:.1f} %' for name in ('utilisation_p50', 'utilisation_p95', 'utilisation_max')),
+                                f'{summary["throttled"][core]:.0%}')
+    grid = Table.grid()
+    grid.add_row(metrics_table)
+    grid.add_row(base_info.table)
+
+    return grid
+
+
+def _hz(mhz: float) -> t.Union[int, str]:
+    return 'NA' if math.isnan(mhz) else int(mhz * 1e6)
+
+
+def _format_value(base_info: t.Any, name: str, value: float) -> str:
+    if name.endswith(('.used', '.available')):
+        return base_info.format_bytes(int(value))
+    if name.endswith('bytes_per_second'):
+        return f'{base_info.format_bytes(int(value)) or "0 B"}/s'
+    return ('%.2f' % value).rstrip('0').rstrip('.')
+
+
+def watch(scopes: t.Iterable[str],
+          interval: float = 1.0,
+          count: t.Optional[int] = None,
+          buffer_size: int = 3600,
+          max_overhead: float = 0.01,
+          ndjson: t.Optional[str] = None,
+          live: bool = True,
+          per_core: bool = False,
+          options: t.Optional[t.Mapping[str, t.Mapping[str, t.Any]]] = None) -> MetricSampler:
+    """
+    Sample the metrics of the given scopes, optionally showing a live updating table and appending every sample as JSON line to a file.
+    """
+    sampler = MetricSampler(scopes, interval=interval, buffer_size=buffer_size, max_overhead=max_overhead, per_core=per_core, options=options)
+    ndjson_file = open(ndjson, 'a', encoding='utf-8') if ndjson else None
+    live_display = None
+    if live:
+        from rich.live import Live
+
+        live_display = Live(render_table(sampler), auto_refresh=False)
+        live_display.start()
+
+    def on_sample(timestamp: float, values: t.Dict[str, float]) -> None:
+        if ndjson_file is not None:
+            sample: t.Dict[str, t.Any] = {'time': timestamp, 'metrics': values}
+            if sampler.series is not None:
+                frequencies, utilisation = sampler.series.latest()
+                sample['cores'] = {'clock_mhz': frequencies.tolist(), 'percent': utilisation.tolist()}
+            ndjson_file.write(json.dumps(sample, separators=(',', ':')) + '\n')
+            ndjson_file.flush()
+        if live_display is not None:
+            live_display.update(render_table(sampler), refresh=True)
+
+    try:
+        sampler.run(count=count, on_sample=on_sample)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if live_display is not None:
+            live_display.stop()
+        if ndjson_file is not None:
+            ndjson_file.close()
+        if sampler.series is not None:
+            sampler.series.close()
+
+    return sampler
@@ -0,0 +1,199 @@
+"""
+Benchmarks of all queriers, query() and all export formats.
+
+Only run if SI_BENCHMARKS=1 is set, e.g. via make benchmark. Every benchmark is timed as the best of several repetitions
+and fails if it takes more than SI_BENCHMARKS_THRESHOLD (0.5 by default, i.e. 50%) longer than its baseline in baselines.json.
+Differences below 50 µs are ignored as noise.
+
+Baselines are not stored in seconds, but as multiples of a fixed pure Python workload, which is timed on the same host
+alternately with every benchmark. This way, they carry over to faster or slower machines and to load changing during the run.
+Regenerate them after changing a benchmark or adding a new one with make benchmark-update (SI_BENCHMARKS_UPDATE=1),
+on an otherwise idle machine.
+
+lshw, pip freeze, software version queries, cpuinfo, GPUs, the psutil queries of disks, network interfaces, swap and CPU clock
+and /proc and /sys are replaced by recorded fixtures, so that the benchmarks run offline and do not depend on the hardware.
+Sampled scopes are benchmarked without waiting between their two samples.
+"""
+
+import collections
+import contextlib
+import functools
+import importlib.util
+import io
+import json
+import os
+import pathlib
+import subprocess
+import sys
+import tempfile
+import timeit
+import typing as t
+import unittest
+from unittest import mock
+
+from system_intelligence import diskio_info, export_formats, sysfs_backend
+from system_intelligence.base_info import BaseInfo
+from system_intelligence.query import SAMPLED_SCOPES, SCOPES, create_querier, export, query
+from system_intelligence.ram_info import RamInfo, iter_lshw_nodes
+from system_intelligence.records import from_builtin
+from system_intelligence.software_info import SoftwareInfo
+from system_intelligence.topology_info import TopologyInfo
+
+FIXTURES = pathlib.Path(__file__).parent / 'fixtures'
+BASELINES = pathlib.Path(__file__).parent / 'baselines.json'
+THRESHOLD = float(os.environ.get('SI_BENCHMARKS_THRESHOLD', '0.5'))
+UPDATE = os.environ.get('SI_BENCHMARKS_UPDATE') == '1'
+# seconds below which differences are noise
+RESOLUTION = 50e-6
+# sampled scopes are benchmarked without waiting between their two samples
+OPTIONS = {scope: {'sample_interval': 0} for scope in SAMPLED_SCOPES}
+
+# the fields of the psutil results used by the queriers, in the order of psutil.json
+sdiskpart = collections.namedtuple('sdiskpart', ['device', 'mountpoint', 'fstype', 'opts', 'maxfile', 'maxpath'])
+sdiskusage = collections.namedtuple('sdiskusage', ['total', 'used', 'free', 'percent'])
+snicstats = collections.namedtuple('snicstats', ['isup', 'duplex', 'speed', 'mtu'])
+scpufreq = collections.namedtuple('scpufreq', ['current', 'min', 'max'])
+sswap = collections.namedtuple('sswap', ['total', 'used', 'free', 'percent', 'sin', 'sout'])
+
+
+def _parse_lshw(self, sudo: bool = False, timeout: float = 5) -> t.Iterator[t.Any]:
+    with open(FIXTURES / 'lshw_memory.xml', 'rb') as lshw_output:
+        yield from iter_lshw_nodes(lshw_output)
+
+
+def _calibration_workload() -> t.Any:
+    """
+    A fixed pure Python workload, the unit of the baselines.
+    """
+    return sorted({str(number): number * number for number in range(2000)}.items())
+
+
+@contextlib.contextmanager
+def offline() -> t.Iterator[None]:
+    """
+    Replace everything depending on the hardware or installed software with recorded fixtures.
+    """
+    version_queries = json.loads((FIXTURES / 'version_queries.json').read_text())
+    pip_freeze = (FIXTURES / 'pip_freeze.txt').read_bytes()
+    recorded = json.loads((FIXTURES / 'psutil.json').read_text())
+    disks = from_builtin('hdd', json.loads((FIXTURES / 'query_all.json').read_text())['hdd']).model
+    with contextlib.ExitStack() as stack:
+        stack.enter_context(mock.patch('psutil.cpu_freq', return_value=scpufreq(*recorded['cpu_freq'])))
+        stack.enter_context(mock.patch('psutil.cpu_count', side_effect=lambda logical=True: recorded['cpu_count'][0 if logical else 1]))
+        stack.enter_context(mock.patch('psutil.swap_memory', return_value=sswap(*recorded['swap_memory'])))
+        stack.enter_context(mock.patch('psutil.disk_partitions', return_value=[sdiskpart(*part) for part in recorded['disk_partitions']]))
+        stack.enter_context(mock.patch('psutil.disk_usage', side_effect=lambda mountpoint: sdiskusage(*recorded['disk_usage'][mountpoint])))
+        stack.enter_context(mock.patch('psutil.net_if_stats', return_value={nic: snicstats(*stats) for nic, stats in recorded['net_if_stats'].items()}))
+        stack.enter_context(mock.patch('system_intelligence.udev_inventory.list_disks', return_value=disks))
+        if importlib.util.find_spec('cpuinfo') is not None:
+            stack.enter_context(mock.patch('cpuinfo.get_cpu_info', return_value=json.loads((FIXTURES / 'cpuinfo.json').read_text())))
+        stack.enter_context(mock.patch.object(RamInfo, 'parse_lshw', _parse_lshw))
+        stack.enter_context(mock.patch('system_intelligence.ram_info.is_process_accessible', return_value=True))
+        stack.enter_context(mock.patch('system_intelligence.ram_info.os.geteuid', return_value=0))
+        stack.enter_context(mock.patch('system_intelligence.gpus_info._cuda', return_value=None))
+        stack.enter_context(mock.patch.object(sysfs_backend, 'get_cpu_info', functools.partial(sysfs_backend.get_cpu_info, root=str(FIXTURES / 'root'))))
+        stack.enter_context(mock.patch.object(sysfs_backend, 'read_online_memory',
+                                              functools.partial(sysfs_backend.read_online_memory, root=str(FIXTURES / 'root'))))
+        stack.enter_context(mock.patch.object(diskio_info, 'read_counters', functools.partial(diskio_info.read_counters, root=str(FIXTURES / 'root'))))
+        stack.enter_context(mock.patch.object(TopologyInfo, 'query_topology',
+                                              functools.partialmethod(TopologyInfo.query_topology, root=str(FIXTURES / 'root'))))
+        stack.enter_context(mock.patch('system_intelligence.software_info.shutil.which',
+                                       side_effect=lambda program: version_queries.get(program, [None])[0]))
+        stack.enter_context(mock.patch.object(SoftwareInfo, '_run_version_query',
+                                              staticmethod(lambda cmd, *_: version_queries[pathlib.Path(cmd[0]).name if len(cmd) > 1 else 'mkl'][1])))
+        check_output = subprocess.check_output
+
+        def pip_freeze_output(cmd, *args, **kwargs):
+            return pip_freeze if cmd[1:] == ['-m', 'pip', 'freeze'] else check_output(cmd, *args, **kwargs)
+        stack.enter_context(mock.patch('subprocess.check_output', side_effect=pip_freeze_output))
+        stack.enter_context(contextlib.redirect_stdout(io.StringIO()))
+        yield
+
+
+@unittest.skipUnless(os.environ.get('SI_BENCHMARKS') == '1', 'set SI_BENCHMARKS=1 to run benchmarks')
+class Benchmarks(unittest.TestCase):
+
+    baselines: t.Dict[str, float] = {}
+    # seconds of every benchmark and of the calibration workload timed alongside it
+    results: t.Dict[str, t.Tuple[float, float]] = {}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.baselines = json.loads(BASELINES.read_text()) if BASELINES.exists() else {}
+        cls.results = {}
+
+    @classmethod
+    def tearDownClass(cls):
+        if UPDATE:
+            baselines = {**cls.baselines, **{name: float(f'{seconds / calibration:.4g}') for name, (seconds, calibration) in cls.results.items()}}
+            BASELINES.write_text(json.dumps(dict(sorted(baselines.items())), indent=2) + '\n')
+        for name, (seconds, calibration) in sorted(cls.results.items()):
+            baseline = cls.baselines.get(name)
+            change = f'{seconds / calibration / baseline - 1:+.0%}' if baseline else 'new'
+            sys.stderr.write(f'\n{name:40} {seconds * 1e3:10.3f} ms  {change}')
+
+    def benchmark(self, name: str, function: t.Callable[[], t.Any], repeat: int = 5) -> None:
+        """
+        Time function and the calibration workload alternately, each as the best of repeat runs,
+        and compare the time per call relative to the calibration workload to its baseline.
+        Every run calls function as often as needed to take at least 0.2 seconds.
+        """
+        calibration_timer = timeit.Timer(_calibration_workload)
+        calibration_number, _ = calibration_timer.autorange()
+        with offline():
+            timer = timeit.Timer(function)
+            number, _ = timer.autorange()
+            runs = []
+            for _ in range(repeat):
+                runs.append((timer.timeit(number) / number, calibration_timer.timeit(calibration_number) / calibration_number))
+        seconds, calibration = (min(times) for times in zip(*runs))
+        self.results[name] = seconds, calibration
+        baseline = self.baselines.get(name)
+        if baseline and not UPDATE:
+            self.assertLessEqual(seconds, (baseline * (1 + THRESHOLD)) * calibration + RESOLUTION,
+                                 f'{name} took {seconds * 1e3:.3f} ms, {seconds / calibration / baseline - 1:.0%} longer than its baseline '
+                                 f'of {baseline * calibration * 1e3:.3f} ms on this host')
+
+    def test_queriers(self):
+        for scope in SCOPES:
+            with self.subTest(scope=scope), offline():
+                querier = create_querier(scope)
+                self.benchmark(f'query_{scope}', functools.partial(getattr(querier, f'query_{scope}'), **OPTIONS.get(scope, {})))
+
+    def test_backends(self):
+        with offline():
+            cpu_info = create_querier('cpu')
+            ram_info = create_querier('ram')
+        self.benchmark('query_cpu[sysfs]', functools.partial(cpu_info.query_cpu, backend='sysfs'))
+        self.benchmark('query_ram[sysfs]', functools.partial(ram_info.query_ram, backend='sysfs'))
+
+    def test_python_packages(self):
+        with offline():
+            software_info = SoftwareInfo()
+        self.benchmark('query_python_packages[metadata]', software_info.query_python_packages)
+        self.benchmark('query_python_packages[pip_freeze]', functools.partial(software_info.query_python_packages, pip_freeze=True))
+
+    def test_query_all(self):
+        self.benchmark('query[all]', functools.partial(query, {'all'}, verbose=False))
+        self.benchmark('query[all,verbose]', functools.partial(query, {'all'}, verbose=True))
+
+    def test_export(self):
+        info = json.loads((FIXTURES / 'query_all.json').read_text())
+        with tempfile.TemporaryDirectory() as directory:
+            for export_format in export_formats.FORMATS:
+                try:
+                    export_formats.require(export_format)
+                except ImportError:
+                    continue
+                target = pathlib.Path(directory, f'result.{export_format}')
+                self.benchmark(f'export[{export_format}]', functools.partial(export, info, export_format, False, target))
+            self.benchmark('export[html]', functools.partial(export, info, 'json', True, pathlib.Path(directory, 'result.json')))
+
+    def test_formatting(self):
+        base_info = BaseInfo()
+        sizes = [0, 512, 123456, '128 KiB', 17179869184, 412316860416] * 100
+        clocks = [0, 1000, 2933000000, 2100000] * 100
+        self.benchmark('format_bytes', lambda: [base_info.format_bytes(size, device='ram') for size in sizes])
+        self.benchmark('format_bytes[storage]', lambda: [base_info.format_bytes(size) for size in sizes])
+        self.benchmark('format_bytes_bulk[storage]', lambda: base_info.format_bytes_bulk(sizes))
+        self.benchmark('hz_to_hreadable_string', lambda: [BaseInfo.hz_to_hreadable_string(clock) for clock in clocks])
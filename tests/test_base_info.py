@@ -0,0 +1,40 @@
+"""Tests for base_info module."""
+
+import pathlib
+import tempfile
+import unittest
+
+from system_intelligence.base_info import BaseInfo, parse_bytes, platform_profile
+
+
+class Tests(unittest.TestCase):
+
+    def test_platform_profile(self):
+        with tempfile.TemporaryDirectory() as directory:
+            ubuntu = pathlib.Path(directory, 'ubuntu')
+            ubuntu.write_text('NAME="Ubuntu"\nVERSION="20.04.1 LTS (Focal Fossa)"\n\nID=ubuntu\n')
+            fedora = pathlib.Path(directory, 'fedora')
+            fedora.write_text('NAME=Fedora\nVERSION="33 (Workstation Edition)"\n')
+            profile = platform_profile('linux', str(ubuntu))
+            self.assertEqual(profile, ('linux', 'ubuntu', 1000))
+            self.assertEqual((profile.unit_base(), profile.unit_base('ram')), (1000, 1024))
+            # the file is read only once
+            ubuntu.unlink()
+            self.assertIs(platform_profile('linux', str(ubuntu)), profile)
+            self.assertEqual(platform_profile('linux', str(fedora)).unit_base(), 1024)
+        self.assertEqual(platform_profile('darwin').unit_base('ram'), 1000)
+        self.assertEqual(platform_profile('win32').unit_base(), 1024)
+
+    def test_parse_bytes(self):
+        self.assertEqual(parse_bytes('48 KiB (1 instance)'), 48 * 1024)
+        self.assertEqual(parse_bytes('8 GB'), 8 * 1024 ** 3)
+        self.assertEqual(parse_bytes('512'), 512)
+        self.assertEqual(parse_bytes(314572800), 314572800)
+        self.assertIsNone(parse_bytes('NA'))
+
+    def test_format_bytes_bulk(self):
+        base_info = BaseInfo()
+        sizes = [0, 512, '128 KiB', '512000', 17179869184, 'NA']
+        for device in ('', 'ram'):
+            self.assertEqual(base_info.format_bytes_bulk(sizes, device=device), [base_info.format_bytes(size, device=device) for size in sizes])
+        self.assertEqual(base_info.format_bytes_bulk(iter([512, 1024 ** 3]), device='ram'), ['512 B', '1 GiB'])
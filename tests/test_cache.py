@@ -0,0 +1,68 @@
+"""Tests for cache module."""
+
+import os
+import tempfile
+import time
+import unittest
+import unittest.mock
+
+from system_intelligence.cache import ResultCache
+from system_intelligence.query import query
+from system_intelligence.records import CpuRecord, SoftwareRecord
+
+
+class Tests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = ResultCache(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_set_get(self):
+        self.cache.set('cpu', CpuRecord(brand_raw='CPU', clock_max=3500000000))
+        self.assertEqual(self.cache.get('cpu')._replace(clock=None), CpuRecord(brand_raw='CPU', clock_max=3500000000))
+        # results are stored per query arguments
+        with self.assertRaises(KeyError):
+            self.cache.get('cpu', backend='sysfs')
+        # dynamic scopes are never cached
+        self.cache.set('swap', 1024)
+        with self.assertRaises(KeyError):
+            self.cache.get('swap')
+
+    def test_schema_mismatch(self):
+        self.cache.set('cpu', CpuRecord(brand_raw='CPU'))
+        with unittest.mock.patch('system_intelligence.cache.SCHEMA_VERSION', 0), self.assertRaises(KeyError):
+            self.cache.get('cpu')
+        # results which do not match the records of their scope are ignored
+        self.cache.set('cpu', {'brand': 'CPU'})
+        with self.assertRaises(KeyError):
+            self.cache.get('cpu')
+
+    def test_cpu_clock_refreshed(self):
+        self.cache.set('cpu', CpuRecord(brand_raw='CPU', clock=2933000000))
+        with unittest.mock.patch('system_intelligence.cpu_info.CpuInfo.query_cpu_clock', return_value=(1200.0, 800.0, 3500.0)):
+            self.assertEqual(self.cache.get('cpu'), CpuRecord(brand_raw='CPU', clock=1200000000))
+            self.assertEqual(query({'cpu'}, verbose=False, cache=self.cache)['cpu'].clock, 1200000000)
+
+    def test_ttl(self):
+        cache = ResultCache(self.directory.name, ttls={'os': 0.1})
+        cache.set('os', 'Linux')
+        self.assertEqual(cache.get('os'), 'Linux')
+        time.sleep(0.2)
+        with self.assertRaises(KeyError):
+            cache.get('os')
+
+    def test_software_invalidated_on_path_change(self):
+        self.cache.set('software', {'gcc': SoftwareRecord()})
+        self.assertIn('gcc', self.cache.get('software'))
+        with unittest.mock.patch.dict(os.environ, {'PATH': f'{self.directory.name}{os.pathsep}{os.environ["PATH"]}'}):
+            with self.assertRaises(KeyError):
+                self.cache.get('software')
+
+    def test_query_uses_cache(self):
+        self.cache.set('os', 'cached')
+        self.assertEqual(query({'os'}, verbose=False, cache=self.cache)['os'], 'cached')
+        self.assertNotEqual(query({'os'}, verbose=False, cache=self.cache, refresh=True)['os'], 'cached')
+        self.assertNotEqual(self.cache.get('os'), 'cached')
@@ -1,7 +1,9 @@
 """Tests for cpu_info module."""
 
 import unittest
+from unittest import mock
 
+from system_intelligence import cpu_info as cpu_info_module
 from system_intelligence.cpu_info import CpuInfo
 
 
@@ -32,3 +34,23 @@ class Tests(unittest.TestCase):
             info = cpu_info._get_cache_size(1, {'l1_cache_size': '4000000000000'})
             self.assertIsInstance(info, str)
             self.assertEqual(info, '3.64 TiB')
+
+    def test_sysfs_backend_without_cpuinfo(self):
+        cpu_info = CpuInfo()
+        if cpu_info.OS != 'linux':
+            self.skipTest('The sysfs backend is only available on Linux')
+        with mock.patch.object(cpu_info_module, '_cpuinfo') as cpuinfo:
+            cpu = cpu_info.query_cpu(backend='sysfs')
+        cpuinfo.assert_not_called()
+        self.assertIsNotNone(cpu.brand_raw)
+
+    def test_cpuinfo_7_cache_sizes(self):
+        cpu_info = CpuInfo()
+        if cpu_info.OS == 'darwin':
+            self.skipTest('Cache sizes are read from sysctl on MacOS')
+        # as reported by py-cpuinfo 7.0.0 from lscpu
+        cpuinfo_data = {'brand_raw': 'Intel(R) Xeon(R) Processor', 'l1_data_cache_size': '48 KiB (1 instance)',
+                        'l1_instruction_cache_size': '32 KiB (1 instance)', 'l2_cache_size': '1.5 MiB (32 instances)', 'l3_cache_size': 314572800}
+        with mock.patch.object(cpu_info_module, '_cpuinfo', return_value=mock.Mock(get_cpu_info=lambda: cpuinfo_data)):
+            cpu = cpu_info.query_cpu()
+        self.assertEqual((cpu.l1_cache, cpu.l2_cache, cpu.l3_cache), (48 * 1024, 1536 * 1024, 314572800))
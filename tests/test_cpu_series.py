@@ -0,0 +1,42 @@
+"""Tests for cpu_series module."""
+
+import os
+import tempfile
+import unittest
+
+import pytest
+
+from system_intelligence.cpu_series import CpuSeries
+
+np = pytest.importorskip('numpy')
+
+
+class Tests(unittest.TestCase):
+
+    def test_summary(self):
+        series = CpuSeries(window=4)
+        series.reference_frequencies = np.full(series.cores, 2000, dtype=np.float32)
+        for i in range(6):
+            series.record(i, np.full(series.cores, 1000 + 100 * i), np.full(series.cores, 95.))
+        summary = series.summary()
+        self.assertEqual(series.size, 4)
+        self.assertEqual(summary['frequency_max'][0], 1500)
+        self.assertEqual(summary['frequency_p50'][0], 1350)
+        self.assertEqual(summary['utilisation_p95'][0], 95)
+        # busy but below 90% of the nominal frequency
+        self.assertEqual(summary['throttled'][0], 1)
+        self.assertEqual(series.latest()[0][0], 1500)
+
+    def test_sysfs_frequencies(self):
+        with tempfile.TemporaryDirectory() as sysfs_root:
+            cores = CpuSeries(window=1).cores
+            for core in range(cores):
+                os.makedirs(os.path.join(sysfs_root, f'cpu{core}', 'cpufreq'))
+                for name, frequency in (('scaling_cur_freq', 1800000 + core), ('base_frequency', 2000000)):
+                    with open(os.path.join(sysfs_root, f'cpu{core}', 'cpufreq', name), 'w') as frequency_file:
+                        frequency_file.write(f'{frequency}\n')
+            series = CpuSeries(window=2, sysfs_root=sysfs_root)
+            series.sample()
+            series.close()
+        self.assertAlmostEqual(float(series.frequencies[0][-1]), 1800 + (cores - 1) / 1000, places=2)
+        self.assertEqual(series.reference_frequencies[0], 2000)
@@ -0,0 +1,60 @@
+"""Tests for daemon module."""
+
+import os
+import pathlib
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from system_intelligence.daemon import QueryService, create_server, request
+from system_intelligence.records import CpuRecord
+
+
+class Tests(unittest.TestCase):
+
+    def test_service_reuses_static_results(self):
+        service = QueryService()
+        first = service.query(['os', 'swap'])
+        self.assertEqual(list(first), ['os', 'swap'])
+        self.assertIs(service.query_scope('os'), first['os'])
+        with self.assertRaises(ValueError):
+            service.query(['unknown'])
+
+    def test_service_refreshes_cpu_clock(self):
+        service = QueryService()
+        with mock.patch('system_intelligence.cpu_info.CpuInfo.query_cpu', return_value=CpuRecord(brand_raw='CPU', clock=2933000000)):
+            service.query_scope('cpu')
+        with mock.patch('system_intelligence.cpu_info.CpuInfo.query_cpu_clock', return_value=(1200.0, 800.0, 3500.0)):
+            self.assertEqual(service.query_scope('cpu'), CpuRecord(brand_raw='CPU', clock=1200000000))
+
+    def _serve(self, server):
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+    @unittest.skipIf(os.name == 'nt', 'requires Unix sockets')
+    def test_unix_socket(self):
+        with tempfile.TemporaryDirectory() as directory:
+            socket_path = pathlib.Path(directory, 'system-intelligence.sock')
+            self._serve(create_server(QueryService(), socket_path=socket_path))
+            info = request(['os', 'host'], socket_path=socket_path)
+            self.assertEqual(list(info), ['host', 'os'])
+            with self.assertRaises(RuntimeError):
+                request(['unknown'], socket_path=socket_path)
+
+    def test_http(self):
+        server = create_server(QueryService(), port=0)
+        self._serve(server)
+        info = request(['os'], refresh=True, port=server.server_address[1])
+        self.assertIsInstance(info['os'], str)
+
+    def test_querier_error(self):
+        server = create_server(QueryService(), port=0)
+        self._serve(server)
+        with mock.patch('system_intelligence.os_info.OsInfo.query_os', side_effect=OSError('lshw crashed')), \
+                self.assertLogs('system_intelligence.daemon', 'ERROR'), self.assertRaisesRegex(RuntimeError, 'OSError: lshw crashed'):
+            request(['os'], port=server.server_address[1])
+        # the server keeps answering
+        self.assertIsInstance(request(['os'], port=server.server_address[1])['os'], str)
@@ -0,0 +1,82 @@
+"""Tests for diff module."""
+
+import copy
+import importlib.util
+import io
+import json
+import pathlib
+import tempfile
+import unittest
+
+from system_intelligence import diff, export_formats
+from system_intelligence.query import query_and_export
+
+BASELINE = {
+    'host': {'hostname': 'node001', 'model': None},
+    'hdd': {'model': {'/dev/sda': {'size': 512110190592, 'model': 'Samsung SSD'}}},
+    'network': {'eth0': {'isup': True, 'duplex': 2, 'speed': 10000, 'mtu': 1500}},
+    'ram': {'total': 17179869184, 'banks': [{'slot': 'DIMM_A1'}, {'slot': 'DIMM_A2'}, {'slot': 'DIMM_B1'}]},
+    'software': {'python': {'path': '/usr/bin/python', 'version': 'Python 3.8.5', 'packages': {'numpy': '1.19.5'}}},
+    'timings': [{'name': 'cpu', 'wall': 0.1}]
+}
+
+
+class Tests(unittest.TestCase):
+
+    def setUp(self):
+        self.snapshot = copy.deepcopy(BASELINE)
+        self.snapshot['hdd']['model']['/dev/sdb'] = {'size': 4000787030016, 'model': 'WDC'}
+        self.snapshot['network']['eth0']['isup'] = False
+        self.snapshot['ram']['banks'] = [{'slot': 'DIMM_A1'}]
+        self.snapshot['software']['python']['packages'] = {'numpy': '1.20.0', 'scipy': '1.6.0'}
+        self.snapshot['timings'] = [{'name': 'cpu', 'wall': 0.2}]
+
+    def test_diff(self):
+        changes = diff.diff(BASELINE, self.snapshot)
+        self.assertEqual([(change.op, change.path) for change in changes], [
+            ('add', '/hdd/model/~1dev~1sdb'),
+            ('replace', '/network/eth0/isup'),
+            ('remove', '/ram/banks/2'),
+            ('remove', '/ram/banks/1'),
+            ('replace', '/software/python/packages/numpy'),
+            ('add', '/software/python/packages/scipy')
+        ])
+        self.assertEqual(changes[1], diff.Change('replace', '/network/eth0/isup', True, False))
+        self.assertEqual(diff.diff(BASELINE, copy.deepcopy(BASELINE), ignore=()), [])
+        # 1 == True, but a boolean is no number
+        self.assertEqual(len(diff.diff({'value': 1}, {'value': True})), 1)
+
+    def test_apply_delta(self):
+        delta = json.loads(json.dumps(diff.delta(BASELINE, self.snapshot)))
+        expected = dict(self.snapshot, timings=BASELINE['timings'])
+        self.assertEqual(diff.apply_delta(BASELINE, delta), expected)
+        self.assertEqual(diff.apply_patch({'a': [1]}, [{'op': 'add', 'path': '/a/1', 'value': 2}, {'op': 'replace', 'path': '', 'value': 3}]), 3)
+        with self.assertRaises(ValueError):
+            diff.apply_delta(self.snapshot, delta)
+        with self.assertRaises(ValueError):
+            diff.apply_patch(BASELINE, [{'op': 'replace', 'path': '/cpu/clock', 'value': 1}])
+
+    def test_delta_export(self):
+        with tempfile.TemporaryDirectory() as directory:
+            baseline = pathlib.Path(directory, 'baseline.json')
+            output = pathlib.Path(directory, 'delta.json')
+            query_and_export({'os', 'host'}, verbose=False, export_format='json', generate_html_table=False, output=baseline)
+            query_and_export({'os', 'host'}, verbose=False, export_format='json', generate_html_table=False, output=output, delta_baseline=str(baseline))
+            delta = json.loads(output.read_text())
+            self.assertEqual(delta['changes'], [])
+            self.assertEqual(diff.apply_delta(export_formats.load(baseline), delta), export_formats.load(baseline))
+
+    def test_read_formats(self):
+        formats = ['json', 'yml', 'ndjson', 'raw']
+        formats += [export_format for export_format, package in (('msgpack', 'msgpack'), ('cbor', 'cbor2')) if importlib.util.find_spec(package)]
+        for export_format in formats:
+            with self.subTest(export_format=export_format):
+                stream = io.BytesIO()
+                if export_format in {'ndjson', 'msgpack', 'cbor'}:
+                    # the last snapshot of a sequence is read
+                    export_formats.write_batch([BASELINE, self.snapshot], export_format, stream)
+                else:
+                    export_formats.write(self.snapshot, export_format, stream)
+                stream.seek(0)
+                self.assertEqual(export_formats.read(stream, export_format), self.snapshot)
+        self.assertEqual(export_formats.format_of('fleet/node001.YAML'), 'yml')
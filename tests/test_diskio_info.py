@@ -0,0 +1,59 @@
+"""Tests for diskio_info module."""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from system_intelligence import diskio_info
+from system_intelligence.diskio_info import DiskCounters, DiskioInfo
+from system_intelligence.records import DiskRecord
+
+DISKSTATS = """   8       0 sda 1000 20 80000 4000 500 10 16000 10000 0 3000 14000 0 0 0 0 0 0
+   8       1 sda1 900 20 70000 3500 500 10 16000 10000 0 2900 13500 0 0 0 0 0 0
+   7       0 loop0 0 0 0 0 0 0 0 0 0 0 0
+ 104       0 cciss!c0d0 10 0 80 5 0 0 0 0 0 5 5
+"""
+
+
+class Tests(unittest.TestCase):
+
+    def test_read_diskstats(self):
+        with tempfile.TemporaryDirectory() as root:
+            os.makedirs(os.path.join(root, 'proc'))
+            with open(os.path.join(root, 'proc', 'diskstats'), 'w') as diskstats:
+                diskstats.write(DISKSTATS)
+            counters = diskio_info.read_diskstats(root)
+        self.assertEqual(list(counters), ['sda', 'sda1', 'loop0', 'cciss!c0d0'])
+        self.assertEqual(counters['sda'], DiskCounters(reads=1000, read_bytes=80000 * 512, read_time=4000, writes=500, write_bytes=16000 * 512,
+                                                       write_time=10000, busy_time=3000, weighted_time=14000))
+
+    def test_compute_rates(self):
+        before = DiskCounters(reads=1000, read_bytes=2 ** 20, read_time=4000, writes=500, write_bytes=0, write_time=10000, busy_time=3000,
+                              weighted_time=14000)
+        after = DiskCounters(reads=1200, read_bytes=3 * 2 ** 20, read_time=4400, writes=500, write_bytes=0, write_time=10000, busy_time=4500,
+                             weighted_time=17000)
+        rates = diskio_info.compute_rates(before, after, 2.0)
+        self.assertEqual(rates.reads_per_second, 100)
+        self.assertEqual(rates.read_bytes_per_second, 2 ** 20)
+        self.assertAlmostEqual(rates.read_await, 0.002)
+        self.assertIsNone(rates.write_await)
+        self.assertEqual(rates.queue_size, 1.5)
+        self.assertEqual(rates.utilisation, 75)
+        # counters which were reset do not produce negative rates
+        self.assertEqual(diskio_info.compute_rates(after, before, 1.0).reads_per_second, 0)
+
+    def test_sample(self):
+        querier = DiskioInfo()
+        if querier.hdd_info is None:
+            self.skipTest('Disks are only mapped to device nodes on Linux')
+        counters = [{'sda': DiskCounters(10, 0, 0, 0, 0, 0, 0, 0), 'sda1': DiskCounters(10, 0, 0, 0, 0, 0, 0, 0)},
+                    {'sda': DiskCounters(20, 0, 0, 0, 0, 0, 0, 0), 'sda1': DiskCounters(20, 0, 0, 0, 0, 0, 0, 0),
+                     'sdb': DiskCounters(5, 0, 0, 0, 0, 0, 0, 0)}]
+        with mock.patch.object(diskio_info, 'read_counters', side_effect=counters), \
+                mock.patch.object(querier.hdd_info, 'query_hdd_model', return_value={'/dev/sda': DiskRecord(), '/dev/sdb': DiskRecord()}):
+            self.assertEqual(querier.sample(), {})
+            rates = querier.sample()
+        # partitions are left out and disks without an earlier reading have no rates yet
+        self.assertEqual(list(rates), ['/dev/sda'])
+        self.assertGreater(rates['/dev/sda'].reads_per_second, 0)
@@ -0,0 +1,85 @@
+"""Tests for export_formats module."""
+
+import contextlib
+import importlib.util
+import io
+import json
+import pathlib
+import tempfile
+import unittest
+
+from system_intelligence import export_formats, system_intelligence_cli
+from system_intelligence.query import export, export_batch
+from system_intelligence.records import CpuRecord, RamBankRecord, RamRecord
+
+SNAPSHOTS = [
+    {'host': {'hostname': 'node1', 'model': None}, 'cpu': CpuRecord(logical_cores=32, clock=2933000000, l1_cache=32768),
+     'ram': RamRecord(total=17179869184, banks=(RamBankRecord(slot='DIMM_A1', memory=17179869184),))},
+    # as exported by older versions, which kept pre-formatted cache sizes
+    {'host': {'hostname': 'node2', 'model': None}, 'cpu': {'logical_cores': 8, 'l1_cache': '32 KiB'}, 'gpus': []}
+]
+
+
+class Tests(unittest.TestCase):
+
+    def test_flatten(self):
+        flat = export_formats.flatten({'cpu': {'clock': 1, 'flags': []}, 'ram': {'banks': [{'slot': 'A'}]}, 'gpus': {}, 'os': 'Linux'})
+        self.assertEqual(flat, {'cpu.clock': 1, 'cpu.flags': None, 'ram.banks': '[{"slot":"A"}]', 'gpus': None, 'os': 'Linux'})
+
+    def test_cli_formats(self):
+        # the CLI lists the formats itself to start without importing export_formats
+        self.assertEqual(system_intelligence_cli.OUTPUT_FORMATS, tuple(export_formats.FORMATS))
+
+    def test_ndjson_appends(self):
+        with tempfile.TemporaryDirectory() as directory:
+            target = pathlib.Path(directory, 'fleet.ndjson')
+            for snapshot in SNAPSHOTS:
+                export(snapshot, 'ndjson', False, target)
+            lines = target.read_text().splitlines()
+        self.assertEqual([json.loads(line)['host']['hostname'] for line in lines], ['node1', 'node2'])
+        self.assertEqual(json.loads(lines[0])['cpu']['clock'], 2933000000)
+
+    def test_raw_appends(self):
+        with tempfile.TemporaryDirectory() as directory:
+            target = pathlib.Path(directory, 'fleet.raw')
+            for snapshot in SNAPSHOTS:
+                export(snapshot, 'raw', False, target)
+            self.assertEqual([snapshot['host']['hostname'] for snapshot in export_formats.iter_snapshots(target)], ['node1', 'node2'])
+            self.assertEqual(export_formats.load(target)['host']['hostname'], 'node2')
+
+    def test_stdout(self):
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            export_batch(SNAPSHOTS, 'json', '-')
+        self.assertEqual([snapshot['cpu']['logical_cores'] for snapshot in json.loads(stdout.getvalue())], [32, 8])
+
+    @unittest.skipIf(importlib.util.find_spec('msgpack') is None or importlib.util.find_spec('cbor2') is None, 'requires msgpack and cbor2')
+    def test_binary_sequences(self):
+        import cbor2
+        import msgpack
+
+        with tempfile.TemporaryDirectory() as directory:
+            for export_format in ('msgpack', 'cbor'):
+                target = pathlib.Path(directory, f'fleet.{export_format}')
+                export_batch(SNAPSHOTS, export_format, target)
+                with open(target, 'rb') as stream:
+                    if export_format == 'msgpack':
+                        snapshots = list(msgpack.Unpacker(stream))
+                    else:
+                        snapshots = [cbor2.load(stream), cbor2.load(stream)]
+                self.assertEqual(snapshots[0]['ram']['banks'][0]['memory'], 17179869184)
+                self.assertEqual(snapshots[1]['cpu']['l1_cache'], '32 KiB')
+
+    @unittest.skipIf(importlib.util.find_spec('pyarrow') is None, 'requires pyarrow')
+    def test_parquet(self):
+        import pyarrow.parquet
+
+        with tempfile.TemporaryDirectory() as directory:
+            target = pathlib.Path(directory, 'fleet.parquet')
+            export_batch(SNAPSHOTS, 'parquet', target)
+            table = pyarrow.parquet.read_table(target).to_pydict()
+        self.assertEqual(table['host.hostname'], ['node1', 'node2'])
+        self.assertEqual(table['cpu.logical_cores'], [32, 8])
+        # columns of mixed types are stored as strings
+        self.assertEqual(table['cpu.l1_cache'], ['32768', '32 KiB'])
+        self.assertEqual(table['ram.total'], [17179869184, None])
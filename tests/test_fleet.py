@@ -0,0 +1,71 @@
+"""Tests for fleet module."""
+
+import json
+import pathlib
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+from system_intelligence import fleet
+
+
+class FlakyTransport(fleet.Transport):
+    """
+    Report hostnames without running anything. Hosts fail as often as given by failures first.
+    """
+
+    def __init__(self, failures):
+        self.failures = dict(failures)
+
+    def command(self, host, arguments):
+        return ['ssh', host, 'system-intelligence', *arguments]
+
+    def run(self, host, arguments, timeout=None):
+        if self.failures.get(host, 0):
+            self.failures[host] -= 1
+            raise subprocess.CalledProcessError(255, ['ssh', host], b'', b'ssh: connect to host ' + host.encode() + b' port 22: Connection refused\n')
+        return json.dumps({'host': {'hostname': host.split('@')[-1], 'model': None}, 'os': 'Linux'}).encode()
+
+
+class SleepingTransport(fleet.Transport):
+
+    def command(self, host, arguments):
+        return [sys.executable, '-c', 'import time; time.sleep(10)']
+
+
+class Tests(unittest.TestCase):
+
+    def test_read_inventory(self):
+        with tempfile.TemporaryDirectory() as directory:
+            inventory = pathlib.Path(directory, 'hosts')
+            inventory.write_text('# compute nodes\nnode001\n\nadmin@node002  # gpu node\nnode001\n')
+            self.assertEqual(fleet.read_inventory(str(inventory)), ['node001', 'admin@node002'])
+
+    def test_transport_is_abstract(self):
+        with self.assertRaises(TypeError):
+            fleet.Transport()
+
+    def test_retries_and_merge(self):
+        transport = FlakyTransport({'node001': 1, 'node002': 5})
+        dataset, outcomes = fleet.collect(['node001', 'node002', 'admin@node001'], scopes=['os'], transport=transport,
+                                          concurrency=2, retries=2, retry_delay=0.01)
+        self.assertEqual(list(dataset), ['node001'])
+        self.assertEqual([(outcome.attempts, outcome.error is None) for outcome in outcomes], [(2, True), (3, False), (1, False)])
+        self.assertIn('Connection refused', outcomes[1].error)
+        self.assertIn('already reported by node001', outcomes[2].error)
+
+    def test_deadline(self):
+        started = time.monotonic()
+        outcome = fleet.query_host('node001', SleepingTransport(), [], retries=5, timeout=0.5, deadline=0.8, retry_delay=0.01)
+        self.assertLess(time.monotonic() - started, 3)
+        self.assertEqual(outcome.attempts, 2)
+        self.assertIn('deadline of 0.8 s exceeded', outcome.error)
+
+    def test_local_transport(self):
+        dataset, outcomes = fleet.collect(['localhost'], scopes=['os'], transport=fleet.LocalTransport(), retries=0)
+        self.assertIsNone(outcomes[0].error)
+        info = next(iter(dataset.values()))
+        self.assertEqual(set(info['host']), {'hostname', 'model'})
+        self.assertTrue(info['os'])
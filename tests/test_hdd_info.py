@@ -0,0 +1,81 @@
+"""Tests for hdd_info module."""
+
+import collections
+import threading
+import time
+import unittest
+from unittest import mock
+
+from system_intelligence.hdd_info import HddInfo
+
+Partition = collections.namedtuple('Partition', ['device', 'mountpoint', 'fstype', 'opts'])
+Usage = collections.namedtuple('Usage', ['total', 'used', 'free', 'percent'])
+
+PARTITIONS = [
+    Partition('/dev/sda1', '/', 'ext4', 'rw'),
+    Partition('/dev/sda1', '/var/lib/docker', 'ext4', 'rw,bind'),
+    Partition('/dev/sdb1', '/scratch', 'xfs', 'rw'),
+    Partition('filer:/home', '/home', 'nfs4', 'rw'),
+    Partition('filer:/projects', '/projects', 'nfs4', 'rw'),
+    Partition('proc', '/proc', 'proc', 'rw'),
+    Partition('tmpfs', '/dev/shm', 'tmpfs', 'rw'),
+    Partition('overlay', '/var/lib/docker/overlay2/merged', 'overlay', 'rw')
+]
+
+
+class Tests(unittest.TestCase):
+
+    def setUp(self):
+        self.release = threading.Event()
+        self.queried = []
+        self.querier = HddInfo()
+
+    def tearDown(self):
+        # let hung queries return
+        self.release.set()
+
+    def disk_usage(self, mountpoint):
+        self.queried.append(mountpoint)
+        if mountpoint.startswith(('/home', '/projects')):
+            # a dead file server
+            self.release.wait(10)
+        if mountpoint == '/scratch':
+            raise PermissionError(mountpoint)
+        return Usage(total=1000, used=250, free=750, percent=25.0)
+
+    def query(self, **kwargs):
+        with mock.patch('psutil.disk_partitions', return_value=PARTITIONS) as disk_partitions, \
+                mock.patch('psutil.disk_usage', side_effect=self.disk_usage):
+            usage = self.querier.query_hdd_usage(**kwargs)
+        # network file systems are only listed with all=True
+        disk_partitions.assert_called_once_with(all=True)
+        return usage
+
+    def test_deadlines(self):
+        started = time.monotonic()
+        usage = self.query(mount_timeout=0.2, max_abandoned=1, workers=1)
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual({device: record.status for device, record in usage.items()},
+                         {'/dev/sda1': 'ok', '/dev/sdb1': 'error', 'filer:/home': 'timeout', 'filer:/projects': 'skipped'})
+        self.assertEqual(usage['/dev/sda1'].mountpoint, '/')
+        self.assertIsNone(usage['filer:/home'].total)
+        # the hung query is not started again while it is still running
+        usage = self.query(mount_timeout=0.2)
+        self.assertEqual(usage['filer:/home'].status, 'stalled')
+        self.assertEqual(usage['filer:/projects'].status, 'timeout')
+        self.assertEqual(self.queried.count('/home'), 1)
+
+    def test_filters(self):
+        usage = self.query(exclude_fstypes=['nfs4'], exclude_mounts=['/scr*'])
+        self.assertEqual(list(usage), ['/dev/sda1'])
+        usage = self.query(include_fstypes=['ext4', 'xfs'], include_mounts=['/var/*', '/scratch'])
+        self.assertEqual([record.mountpoint for record in usage.values()], ['/var/lib/docker', '/scratch'])
+        self.assertFalse(self.querier._stalled_mounts)
+
+    def test_pseudo_filesystems(self):
+        usage = self.query(exclude_fstypes=['nfs4'])
+        self.assertEqual(list(usage), ['/dev/sda1', '/dev/sdb1'])
+        self.assertNotIn('/proc', self.queried)
+        # pseudo file systems are only queried if they are included explicitly
+        usage = self.query(include_fstypes=['tmpfs'])
+        self.assertEqual([record.mountpoint for record in usage.values()], ['/dev/shm'])
@@ -0,0 +1,88 @@
+"""Tests for html_report module."""
+
+import copy
+import html.parser
+import io
+import json
+import pathlib
+import tempfile
+import time
+import unittest
+
+from click.testing import CliRunner
+
+from system_intelligence import html_report, system_intelligence_cli
+
+SNAPSHOT = json.loads(pathlib.Path(__file__).parent.joinpath('benchmarks', 'fixtures', 'query_all.json').read_text())
+
+
+class TagChecker(html.parser.HTMLParser):
+    """
+    Count the tables of a document and check that all sections and tables are closed.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.open = []
+        self.tables = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in {'section', 'table', 'details'}:
+            self.open.append(tag)
+            self.tables += tag == 'table'
+
+    def handle_endtag(self, tag):
+        if tag in {'section', 'table', 'details'}:
+            assert self.open.pop() == tag, tag
+
+
+class Tests(unittest.TestCase):
+
+    def check(self, document):
+        checker = TagChecker()
+        checker.feed(document)
+        self.assertEqual(checker.open, [])
+        self.assertNotIn('http', document.split('<body>')[0])
+
+        return checker
+
+    def test_write_report(self):
+        stream = io.StringIO()
+        snapshot = dict(SNAPSHOT, host={'hostname': '<node001>', 'model': None})
+        html_report.write_report(snapshot, stream)
+        document = stream.getvalue()
+        self.assertGreater(self.check(document).tables, 5)
+        self.assertIn('<h2>software</h2>', document)
+        self.assertIn('&lt;node001&gt;', document)
+        # empty scopes get no section
+        self.assertNotIn('<h2>gpus</h2>', document)
+
+    def test_fleet_report(self):
+        def snapshots():
+            for index in range(2000):
+                snapshot = copy.deepcopy(SNAPSHOT)
+                snapshot['host'] = {'hostname': f'node{index:04}', 'model': None}
+                yield snapshot
+
+        stream = io.StringIO()
+        started = time.monotonic()
+        html_report.write_fleet_report(snapshots(), stream, page_size=50)
+        self.assertLess(time.monotonic() - started, 10)
+        document = stream.getvalue()
+        self.check(document)
+        self.assertEqual(document.count('<tr>'), 2001)
+        self.assertIn('data-page-size="50"', document)
+        self.assertIn(f'<td class="number" data-sort="{SNAPSHOT["ram"]["total"]}">', document)
+
+    def test_report_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            fleet_file = pathlib.Path(directory, 'fleet.json')
+            fleet_file.write_text(json.dumps({'node001': SNAPSHOT, 'node002': SNAPSHOT}))
+            ndjson_file = pathlib.Path(directory, 'nodes.ndjson')
+            ndjson_file.write_text(json.dumps(SNAPSHOT) + '\n' + json.dumps(SNAPSHOT) + '\n')
+            output = pathlib.Path(directory, 'report.html')
+            result = CliRunner().invoke(system_intelligence_cli.main, ['report', str(fleet_file), str(ndjson_file), '-o', str(output)])
+            self.assertEqual(result.exit_code, 0, result.output)
+            document = output.read_text()
+            self.check(document)
+            self.assertEqual(document.count('<details><summary>vm</summary>'), 4)
@@ -0,0 +1,68 @@
+"""Tests for network_info module."""
+
+import collections
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from system_intelligence import network_info
+from system_intelligence.network_info import NetworkInfo, NicCounters
+
+NET_DEV = """Inter-|   Receive                                                |  Transmit
+ face |bytes    packets errs drop fifo frame compressed multicast|bytes    packets errs drop fifo colls carrier compressed
+    lo: 93749468    9104    0    0    0     0          0         0 93749468    9104    0    0    0     0       0          0
+  eth0: 8384107     654    1    2    0     0          0         0    74029     637    3    4    0     0       0          0
+veth1a2b3c:     100       1    0    0    0     0          0         0      200       2    0    0    0     0       0          0
+"""
+
+Stats = collections.namedtuple('Stats', ['isup', 'duplex', 'speed', 'mtu'])
+
+
+class Tests(unittest.TestCase):
+
+    def test_read_net_dev(self):
+        with tempfile.TemporaryDirectory() as root:
+            os.makedirs(os.path.join(root, 'proc', 'net'))
+            with open(os.path.join(root, 'proc', 'net', 'dev'), 'w') as net_dev:
+                net_dev.write(NET_DEV)
+            counters = network_info.read_net_dev(root)
+        self.assertEqual(list(counters), ['lo', 'eth0', 'veth1a2b3c'])
+        self.assertEqual(counters['eth0'], NicCounters(8384107, 654, 1, 2, 74029, 637, 3, 4))
+
+    def test_compute_rates(self):
+        before = NicCounters(0, 0, 0, 0, 0, 0, 0, 0)
+        after = NicCounters(250000000, 200000, 2, 4, 125000000, 100000, 0, 0)
+        rates = network_info.compute_rates(before, after, 2.0, speed=10000)
+        self.assertEqual(rates['rx_bytes_per_second'], 125000000)
+        self.assertEqual(rates['tx_packets_per_second'], 50000)
+        self.assertEqual(rates['rx_drops_per_second'], 2)
+        # 1 Gbit/s received on a 10 Gbit/s link
+        self.assertAlmostEqual(rates['utilisation'], 10)
+        self.assertIsNone(network_info.compute_rates(before, after, 2.0)['utilisation'])
+
+    def test_select_nic(self):
+        self.assertTrue(network_info.select_nic('eth0', exclude_nics=['veth*']))
+        self.assertFalse(network_info.select_nic('veth1a2b3c', exclude_nics=['veth*']))
+        self.assertFalse(network_info.select_nic('eth0', include_nics=['ib*']))
+        if not sys.platform.startswith('linux'):
+            return
+        with tempfile.TemporaryDirectory() as root:
+            os.makedirs(os.path.join(root, 'sys', 'class', 'net', 'eth0', 'device'))
+            os.makedirs(os.path.join(root, 'sys', 'class', 'net', 'br0'))
+            self.assertFalse(network_info.is_virtual('eth0', root))
+            self.assertTrue(network_info.is_virtual('br0', root))
+
+    def test_query_network_rates(self):
+        stats = {'eth0': Stats(True, 2, 1000, 1500), 'veth1a2b3c': Stats(True, 2, 10000, 1500)}
+        counters = [{'eth0': NicCounters(0, 0, 0, 0, 0, 0, 0, 0), 'veth1a2b3c': NicCounters(0, 0, 0, 0, 0, 0, 0, 0)},
+                    {'eth0': NicCounters(1000, 10, 0, 0, 0, 0, 0, 0), 'veth1a2b3c': NicCounters(1000, 10, 0, 0, 0, 0, 0, 0)}]
+        with mock.patch('psutil.net_if_stats', return_value=stats), mock.patch.object(network_info, 'read_counters', side_effect=counters):
+            nics = NetworkInfo().query_network(sample_interval=0.01, exclude_nics=['veth*'])
+        self.assertEqual(list(nics), ['eth0'])
+        self.assertEqual(nics['eth0'].speed, 1000)
+        self.assertGreater(nics['eth0'].rx_bytes_per_second, 0)
+        self.assertEqual(nics['eth0'].tx_bytes_per_second, 0)
+        self.assertIsNotNone(nics['eth0'].utilisation)
+        self.assertTrue(all(nic.rx_bytes_per_second is None for nic in NetworkInfo().query_network().values()))
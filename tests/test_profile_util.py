@@ -0,0 +1,44 @@
+"""Tests for profile_util module."""
+
+import contextlib
+import io
+import os
+import pathlib
+import tempfile
+import unittest
+from unittest import mock
+
+from system_intelligence.util.profile_util import outermost_imports, parse_import_times, profile_startup
+
+
+class Tests(unittest.TestCase):
+
+    def test_parse_import_times(self):
+        stderr = ('import time: self [us] | cumulative | imported package\n'
+                  'import time:       213 |        213 |   _io\n'
+                  'import time:        38 |        251 |     marshal\n'
+                  'Traceback (most recent call last):\n')
+        imports, other_lines = parse_import_times(stderr)
+        self.assertEqual(imports, [('_io', 1, 213, 213), ('marshal', 2, 38, 251)])
+        self.assertEqual(other_lines, ['Traceback (most recent call last):'])
+
+    def test_outermost_imports(self):
+        stderr = ('import time:      2236 |      13734 | site\n'
+                  'import time:      3311 |       3311 |   system_intelligence\n'
+                  'import time:     11842 |      96007 | system_intelligence.system_intelligence_cli\n'
+                  'import time:       420 |        420 |   ruamel.yaml.main\n'
+                  'import time:       543 |      19744 | ruamel.yaml\n')
+        imports, _ = parse_import_times(stderr)
+        # lazy imports while running the CLI are at level 0 as well, the interpreter's startup imports are left out
+        self.assertEqual([entry[0] for entry in outermost_imports(imports)], ['system_intelligence.system_intelligence_cli', 'ruamel.yaml'])
+
+    def test_profile_startup(self):
+        stderr = io.StringIO()
+        with tempfile.TemporaryDirectory() as directory, mock.patch.dict(os.environ, {'COLUMNS': '200'}), contextlib.redirect_stderr(stderr):
+            returncode = profile_startup(['os', '--no-cache', '-f', 'yml', '-o', str(pathlib.Path(directory, 'os.yml'))])
+        self.assertEqual(returncode, 0)
+        modules = [line.split()[1] for line in stderr.getvalue().splitlines() if line.startswith('┃') or line.startswith('│')]
+        # the CLI itself and the modules it imports lazily are listed, not their nested imports
+        self.assertIn('system_intelligence.system_intelligence_cli', modules)
+        self.assertIn('ruamel.yaml', modules)
+        self.assertNotIn('ruamel.yaml.main', modules)
@@ -0,0 +1,64 @@
+"""Tests for prometheus module."""
+
+import threading
+import unittest
+import urllib.request
+
+from system_intelligence import prometheus
+from system_intelligence.records import CpuRecord, HostRecord
+
+
+class Tests(unittest.TestCase):
+
+    def test_render(self):
+        metrics = [prometheus.Metric('cpu', 'info', 'Model of the CPU.', [({'brand': 'Xeon "Gold"\\6248', 'arch': None}, 1)]),
+                   prometheus.Metric('ram_total_bytes', 'gauge', 'Total memory.', [({}, 2 ** 30)], unit='bytes'),
+                   prometheus.Metric('gpu', 'info', 'Model of a GPU.', [])]
+        self.assertEqual(prometheus.render(metrics).splitlines(), [
+            '# HELP system_intelligence_cpu Model of the CPU.',
+            '# TYPE system_intelligence_cpu info',
+            'system_intelligence_cpu_info{brand="Xeon \\"Gold\\"\\\\6248"} 1',
+            '# HELP system_intelligence_ram_total_bytes Total memory.',
+            '# TYPE system_intelligence_ram_total_bytes gauge',
+            '# UNIT system_intelligence_ram_total_bytes bytes',
+            'system_intelligence_ram_total_bytes 1073741824'
+        ])
+        self.assertIn('# TYPE system_intelligence_cpu_info gauge', prometheus.render(metrics, openmetrics=False))
+
+    def test_static_metrics_are_cached(self):
+        collector = prometheus.MetricsCollector(['host', 'cpu', 'swap'])
+        calls = []
+
+        def query_host(**_):
+            calls.append('host')
+            return HostRecord('node001')
+        collector._querier('host').query_host = query_host
+        collector._querier('cpu').query_cpu = lambda **_: CpuRecord(brand_raw='Xeon', logical_cores=8, clock=2100000000, clock_max=3500000000)
+        clocks = iter([(2100.0, 800.0, 3500.0), (1200.0, 800.0, 3500.0)])
+        collector._querier('cpu').query_cpu_clock = lambda: next(clocks)
+        first, second = collector.collect(), collector.collect(openmetrics=False)
+        self.assertEqual(calls, ['host'])
+        self.assertTrue(first.endswith('# EOF\n'))
+        self.assertIn('system_intelligence_host_info{hostname="node001"} 1', first)
+        self.assertIn('system_intelligence_cpu_clock_max_hertz 3500000000', second)
+        # the current clock is sampled on every scrape
+        self.assertIn('system_intelligence_cpu_clock_hertz 2100000000', first)
+        self.assertIn('system_intelligence_cpu_clock_hertz 1200000000', second)
+        self.assertIn('system_intelligence_swap_used_bytes ', second)
+        self.assertNotIn('# EOF', second)
+
+    def test_server(self):
+        collector = prometheus.MetricsCollector(['os', 'network'])
+        server = prometheus.create_server(collector, host='127.0.0.1', port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            request = urllib.request.Request(f'http://127.0.0.1:{server.server_address[1]}/metrics',
+                                             headers={'Accept': 'application/openmetrics-text; version=1.0.0'})
+            with urllib.request.urlopen(request, timeout=10) as response:
+                self.assertTrue(response.headers['Content-Type'].startswith('application/openmetrics-text'))
+                body = response.read().decode()
+            self.assertIn('system_intelligence_os_info{platform=', body)
+            self.assertIn('system_intelligence_network_mtu_bytes{interface="lo"}', body)
+        finally:
+            server.shutdown()
+            server.server_close()
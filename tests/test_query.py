@@ -0,0 +1,31 @@
+"""Tests for query module."""
+
+import time
+import unittest
+
+from system_intelligence.query import query
+from system_intelligence.util.thread_util import run_with_deadlines
+
+
+class Tests(unittest.TestCase):
+
+    def test_parallel_query(self):
+        serial = query({'os', 'host'}, verbose=False)
+        parallel = query({'os', 'host'}, verbose=False, parallel=True, workers=2, timeout=30)
+        self.assertEqual(serial['os'], parallel['os'])
+        self.assertEqual(serial['host'], parallel['host'])
+
+    def test_run_with_deadlines(self):
+        tasks = {'fast': lambda: 1, 'slow': lambda: time.sleep(5), 'broken': lambda: 1 / 0}
+        started = time.monotonic()
+        results, errors, expired = run_with_deadlines(tasks, workers=3, timeout=0.2)
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual(results, {'fast': 1})
+        self.assertIsInstance(errors['broken'], ZeroDivisionError)
+        self.assertEqual(expired, ['slow'])
+
+    def test_run_with_deadlines_max_abandoned(self):
+        tasks = {'hang': lambda: time.sleep(5), 'never_started': lambda: 1}
+        results, errors, expired = run_with_deadlines(tasks, workers=1, timeout=0.1, max_abandoned=1)
+        self.assertEqual(results, {})
+        self.assertEqual(expired, ['hang', 'never_started'])
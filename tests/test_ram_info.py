@@ -0,0 +1,75 @@
+"""Tests for ram_info module."""
+
+import io
+import unittest
+
+from system_intelligence.ram_info import RamInfo, iter_lshw_nodes
+from system_intelligence.records import RamBankRecord, RamCacheRecord
+
+LSHW_XML = b"""<?xml version="1.0" standalone="yes" ?>
+<!-- generated by lshw-B.02.18 -->
+<list>
+<node id="firmware" claimed="true" class="memory">
+  <description>BIOS</description>
+  <size units="bytes">65536</size>
+</node>
+<node id="cache:0" claimed="true" class="memory" handle="DMI:0700">
+  <description>L1 cache</description>
+  <physid>700</physid>
+  <slot>L1 Cache</slot>
+  <size units="bytes">1048576</size>
+  <capacity units="bytes">1048576</capacity>
+</node>
+<node id="memory" claimed="true" class="memory" handle="DMI:1000">
+  <description>System Memory</description>
+  <physid>1000</physid>
+  <size units="bytes">34359738368</size>
+  <node id="bank:0" claimed="true" class="memory" handle="DMI:1100">
+    <description>DIMM DDR4 Synchronous 2666 MHz (0.4 ns)</description>
+    <product>M393A2K43BB1-CTD</product>
+    <vendor>Samsung</vendor>
+    <physid>0</physid>
+    <serial>12345678</serial>
+    <slot>DIMM_A1</slot>
+    <size units="bytes">17179869184</size>
+    <width units="bits">64</width>
+    <clock units="Hz">2666000000</clock>
+  </node>
+  <node id="bank:1" claimed="true" class="memory" handle="DMI:1101">
+    <description>DIMM DDR4 Synchronous 2666 MHz (0.4 ns)</description>
+    <product>M393A2K43BB1-CTD</product>
+    <vendor>Samsung</vendor>
+    <physid>1</physid>
+    <serial>87654321</serial>
+    <slot>DIMM_A2</slot>
+    <size units="bytes">17179869184</size>
+    <width units="bits">64</width>
+    <clock units="Hz">2666000000</clock>
+  </node>
+</node>
+</list>
+"""
+
+
+class Tests(unittest.TestCase):
+
+    def test_iter_lshw_nodes(self):
+        ram_info = RamInfo()
+        ids = []
+        ram_banks = []
+        ram_cache = []
+        for node in iter_lshw_nodes(io.BytesIO(LSHW_XML)):
+            ids.append(node.attrib['id'])
+            if node.attrib['id'].startswith('bank'):
+                ram_banks.append(ram_info.query_ram_bank(node))
+            else:
+                ram_cache.append(ram_info.query_ram_cache(node))
+        self.assertEqual(ids, ['cache:0', 'bank:0', 'bank:1'])
+        self.assertEqual(ram_banks[1], (RamBankRecord(product='M393A2K43BB1-CTD', vendor='Samsung', serial='87654321',
+                                                      description='DIMM DDR4 Synchronous 2666 MHz (0.4 ns)', slot='DIMM_A2',
+                                                      clock=2666000000, memory=17179869184), True))
+        self.assertEqual(ram_cache, [RamCacheRecord(slot='L1 Cache', physid='700', capacity=1048576)])
+
+    def test_iter_lshw_nodes_frees_handled_nodes(self):
+        nodes = list(iter_lshw_nodes(io.BytesIO(LSHW_XML)))
+        self.assertTrue(all(len(node) == 0 and not node.attrib for node in nodes))
@@ -0,0 +1,27 @@
+"""Tests for records module."""
+
+import json
+import unittest
+
+from system_intelligence.query import query
+from system_intelligence.records import DiskRecord, DiskUsageRecord, HddRecord, RamBankRecord, RamRecord, from_builtin, to_builtin
+
+
+class Tests(unittest.TestCase):
+
+    def test_round_trip(self):
+        ram = RamRecord(total=17179869184, banks=(RamBankRecord(slot='DIMM_A1', memory=17179869184, clock=2666000000),))
+        hdd = HddRecord(model={'/dev/sda': DiskRecord(size=512110190592, model='Samsung SSD')},
+                        usage={'/dev/sda1': DiskUsageRecord(total=1024, used=256, free=768, percent=25.0, fstype='ext4', mountpoint='/')})
+        builtin = json.loads(json.dumps(to_builtin({'ram': ram, 'hdd': hdd})))
+        self.assertEqual(builtin['ram']['banks'][0]['clock'], 2666000000)
+        self.assertEqual(from_builtin('ram', builtin['ram']), ram)
+        self.assertEqual(from_builtin('hdd', builtin['hdd']), hdd)
+        with self.assertRaises(TypeError):
+            from_builtin('ram', {'total': 1})
+
+    def test_query_round_trip(self):
+        scopes = {'host', 'os', 'cpu', 'ram', 'network', 'swap'}
+        info = {scope: value for scope, value in query(scopes, verbose=False).items() if scope in scopes}
+        builtin = json.loads(json.dumps(to_builtin(info)))
+        self.assertEqual({scope: from_builtin(scope, value) for scope, value in builtin.items()}, info)
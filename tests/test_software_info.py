@@ -1,7 +1,13 @@
 """Tests for software_info module."""
 
 import collections.abc
+import os
+import pathlib
+import subprocess
+import tempfile
+import time
 import unittest
+import unittest.mock
 
 from system_intelligence.software_info import SoftwareInfo
 
@@ -12,3 +18,54 @@ class Tests(unittest.TestCase):
         sw_info = SoftwareInfo()
         info = sw_info.query_software()
         self.assertIsInstance(info, collections.abc.Mapping)
+
+    @unittest.skipIf(os.name == 'nt', 'requires a POSIX shell')
+    def test_version_query_timeout(self):
+        started = time.monotonic()
+        with self.assertRaises(subprocess.TimeoutExpired):
+            SoftwareInfo._run_version_query(['sh', '-c', 'sleep 5 & sleep 5'], 0, timeout=0.2)
+        self.assertLess(time.monotonic() - started, 2)
+
+    @unittest.skipIf(os.name == 'nt', 'requires a POSIX shell')
+    def test_timed_out_probes(self):
+        with tempfile.TemporaryDirectory() as bin_dir:
+            spack = pathlib.Path(bin_dir, 'spack')
+            spack.write_text('#!/bin/sh\nsleep 5\n')
+            spack.chmod(0o755)
+            sw_info = SoftwareInfo()
+            sw_info.VERSION_QUERY_FLAGS = {'spack': (None, 0), 'python': (None, 0)}
+            with unittest.mock.patch.dict(os.environ, {'PATH': f'{bin_dir}{os.pathsep}{os.environ["PATH"]}'}):
+                started = time.monotonic()
+                info = sw_info.query_software(probe_timeout=0.5)
+            self.assertLess(time.monotonic() - started, 4)
+        self.assertEqual(sw_info.timed_out_probes, ['spack'])
+        self.assertIsNone(info['spack'].version)
+        self.assertEqual(info['spack'].status, 'timeout')
+        self.assertEqual(info['python'].status, 'ok')
+        self.assertIsNotNone(info['python'].version)
+
+    def test_python_packages_of_virtualenv(self):
+        with tempfile.TemporaryDirectory() as venv:
+            dist_info = pathlib.Path(venv, 'lib', 'python3.8', 'site-packages', 'numpy-1.19.5.dist-info')
+            dist_info.mkdir(parents=True)
+            dist_info.joinpath('METADATA').write_text('Metadata-Version: 2.1\nName: numpy\nVersion: 1.19.5\n')
+            self.assertEqual(SoftwareInfo().query_python_packages(python_env=venv), {'numpy': '1.19.5'})
+            # interpreters are resolved to their environment
+            self.assertEqual(SoftwareInfo().query_python_packages(python_env=str(pathlib.Path(venv, 'bin', 'python'))), {'numpy': '1.19.5'})
+
+    def test_python_packages_normalized_names(self):
+        with tempfile.TemporaryDirectory() as venv:
+            site_packages = pathlib.Path(venv, 'lib', 'python3.7', 'site-packages')
+            for name, version in [('Scikit_Learn', '0.24.2'), ('cython', '0.29.21')]:
+                dist_info = site_packages.joinpath(f'{name}-{version}.dist-info')
+                dist_info.mkdir(parents=True)
+                dist_info.joinpath('METADATA').write_text(f'Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n')
+            # names are compared as normalized by PEP 503 on both sides
+            self.assertEqual(SoftwareInfo().query_python_packages(python_env=venv), {'Cython': '0.29.21', 'scikit-learn': '0.24.2'})
+
+    def test_python_packages_backends_agree(self):
+        sw_info = SoftwareInfo()
+        sw_info.PYTHON_PACKAGES = {'pytest', 'rich', 'Pint', 'ruamel.yaml'}
+        from_metadata = sw_info.query_python_packages()
+        self.assertEqual(from_metadata, sw_info.query_python_packages(pip_freeze=True))
+        self.assertIn('rich', from_metadata)
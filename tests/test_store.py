@@ -0,0 +1,99 @@
+"""Tests for store module."""
+
+import copy
+import json
+import os
+import pathlib
+import tempfile
+import unittest
+
+from click.testing import CliRunner
+
+from system_intelligence import store, system_intelligence_cli
+
+SNAPSHOT = json.loads(pathlib.Path(__file__).parent.joinpath('benchmarks', 'fixtures', 'query_all.json').read_text())
+
+
+def snapshot(hostname, gcc, ram_gib):
+    node = copy.deepcopy(SNAPSHOT)
+    node['host'] = {'hostname': hostname, 'model': None}
+    node['software']['gcc']['version'] = f'gcc (GCC) {gcc}'
+    node['ram']['total'] = ram_gib * 2 ** 30
+    return node
+
+
+class Tests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = store.SnapshotStore(pathlib.Path(self.directory.name, 'snapshots.db'))
+        with self.store.connection:
+            self.store.add(snapshot('node001', '9.3.0', 32), collected=1)
+            self.store.add(snapshot('node002', '10.2.1', 128), collected=1)
+            self.store.add(snapshot('node001', '11.1.0', 32), collected=2)
+            self.store.add(snapshot('node003', '8.4.0', 256), collected=3)
+
+    def tearDown(self):
+        self.store.close()
+        self.directory.cleanup()
+
+    def hostnames(self, *filters, **kwargs):
+        return [result['hostname'] for result in self.store.search(filters, **kwargs)]
+
+    def test_version_key(self):
+        self.assertLess(store.version_key('gcc (Ubuntu 9.3.0-17ubuntu1~20.04) 9.3.0'), store.version_key('10'))
+        self.assertLess(store.version_key('10'), store.version_key('Python 10.2'))
+        self.assertIsNone(store.version_key('unknown'))
+        self.assertEqual(store.parse_quantity('64GiB'), 64 * 2 ** 30)
+        self.assertEqual(store.parse_quantity('2.5 GHz'), 2500000000)
+        with self.assertRaises(ValueError):
+            store.parse_filter('ram.total<lots')
+        with self.assertRaises(ValueError):
+            store.parse_filter('cpu.colour=red')
+        with self.assertRaises(ValueError):
+            store.parse_filter('software.gcc>=latest')
+        self.assertEqual(store.parse_filter('software.gcc~*ubuntu*').value, '*ubuntu*')
+
+    def test_search(self):
+        self.assertEqual(self.hostnames('software.gcc<10'), ['node003'])
+        self.assertEqual(self.hostnames('software.gcc<10', latest=False), ['node001', 'node003'])
+        self.assertEqual(self.hostnames('software.gcc>=10', 'ram.total<64GiB'), ['node001'])
+        self.assertEqual(self.hostnames('hostname~node00[12]', 'cpu.brand~*Xeon*', 'software.gcc'), ['node001', 'node002'])
+        self.assertEqual(self.hostnames('software.rustc'), [])
+        self.assertEqual(self.hostnames('software.gcc=10.2'), ['node002'])
+        self.assertEqual(self.hostnames('software.gcc=10.2.0'), [])
+        self.assertEqual(self.hostnames('software.gcc!=10'), ['node001', 'node003'])
+        self.assertEqual(self.hostnames('software.gcc<=10'), ['node002', 'node003'])
+        self.assertEqual(self.hostnames('software.gcc>10'), ['node001'])
+        results = self.store.search(['ram.total>100G'], show=['ram.total', 'software.gcc', 'disk.device'])
+        self.assertEqual(results[0], {'hostname': 'node002', 'collected': 1, 'ram.total': 128 * 2 ** 30, 'software.gcc': 'gcc (GCC) 10.2.1',
+                                      'disk.device': list(SNAPSHOT['hdd']['model'])})
+
+    def test_aggregate(self):
+        self.assertEqual(self.store.aggregate('software.gcc'), [store.Aggregate(None, 3, '8.4.0', '11.1.0', None)])
+        aggregates = self.store.aggregate('ram.total', ['software.gcc>=9'], group_by='software.gcc', latest=False)
+        self.assertEqual([(aggregate.group, aggregate.count, aggregate.mean) for aggregate in aggregates],
+                         [('9.3.0', 1, 32 * 2 ** 30), ('10.2.1', 1, 128 * 2 ** 30), ('11.1.0', 1, 32 * 2 ** 30)])
+
+    def test_ingest(self):
+        path = pathlib.Path(self.directory.name, 'fleet.ndjson')
+        path.write_text('\n'.join(json.dumps(node) for node in [snapshot('node004', '12.1.0', 64), snapshot('node001', '9.3.0', 32)]))
+        os.utime(path, (10, 10))
+        self.assertEqual(self.store.ingest(path), (1, 1))
+        # an identical snapshot does not make an older one the latest
+        self.assertEqual(self.hostnames('software.gcc>=11'), ['node001', 'node004'])
+        with self.assertRaises(ValueError):
+            self.store.add({'baseline': '0' * 64, 'changes': []})
+
+    def test_cli(self):
+        path = pathlib.Path(self.directory.name, 'node005.json')
+        path.write_text(json.dumps(snapshot('node005', '7.5.0', 16)))
+        store_path = str(self.store.path)
+        runner = CliRunner()
+        result = runner.invoke(system_intelligence_cli.main, ['ingest', str(path), '--store', store_path])
+        self.assertEqual(result.exit_code, 0, result.output)
+        result = runner.invoke(system_intelligence_cli.main, ['search', 'software.gcc<10', '--store', store_path, '--json'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual([found['hostname'] for found in json.loads(result.output)], ['node003', 'node005'])
+        result = runner.invoke(system_intelligence_cli.main, ['search', 'ram.total>1TiB', '--store', store_path, '--stats', 'ram.total'])
+        self.assertEqual(result.exit_code, 1, result.output)
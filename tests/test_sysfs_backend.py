@@ -0,0 +1,95 @@
+"""Tests for sysfs_backend module."""
+
+import os
+import struct
+import tempfile
+import typing as t
+import unittest
+
+from system_intelligence import sysfs_backend
+from system_intelligence.records import RamBankRecord, RamCacheRecord
+
+CPUINFO = """processor\t: 0
+vendor_id\t: GenuineIntel
+model name\t: Intel(R) Xeon(R) Gold 6148 CPU @ 2.40GHz
+
+processor\t: 1
+vendor_id\t: GenuineIntel
+model name\t: Intel(R) Xeon(R) Gold 6148 CPU @ 2.40GHz
+"""
+
+
+def _write(root: str, path: str, content: t.Union[str, bytes]) -> None:
+    path = os.path.join(root, path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb' if isinstance(content, bytes) else 'w') as sysfs_file:
+        sysfs_file.write(content)
+
+
+def _dmi_structure(structure_type: int, handle: int, formatted: bytes, strings: t.List[str]) -> bytes:
+    header = struct.pack('<BBH', structure_type, 4 + len(formatted), handle)
+    string_area = b''.join(string.encode() + b'\0' for string in strings) + b'\0' if strings else b'\0\0'
+    return header + formatted + string_area
+
+
+def _memory_device(size: int, locator: int, vendor: int, serial: int, part: int, speed: int) -> bytes:
+    formatted = bytearray(0x22 - 4)
+    struct.pack_into('<H', formatted, 0x0C - 4, size)
+    formatted[0x0E - 4] = 0x09  # DIMM
+    formatted[0x10 - 4] = locator
+    formatted[0x12 - 4] = 0x1A  # DDR4
+    struct.pack_into('<H', formatted, 0x15 - 4, speed)
+    formatted[0x17 - 4] = vendor
+    formatted[0x18 - 4] = serial
+    formatted[0x1A - 4] = part
+    struct.pack_into('<H', formatted, 0x20 - 4, speed)
+    return bytes(formatted)
+
+
+class Tests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = self.directory.name
+        _write(self.root, 'proc/cpuinfo', CPUINFO)
+        for index, (level, cache_type, size) in enumerate([(1, 'Data', '32K'), (1, 'Instruction', '32K'), (2, 'Unified', '1024K'),
+                                                           (3, 'Unified', '28160K')]):
+            for name, value in (('level', level), ('type', cache_type), ('size', size)):
+                _write(self.root, f'sys/devices/system/cpu/cpu0/cache/index{index}/{name}', f'{value}\n')
+        _write(self.root, 'sys/devices/system/memory/block_size_bytes', '8000000\n')
+        for block, online in enumerate([1, 1, 0]):
+            _write(self.root, f'sys/devices/system/memory/memory{block}/online', f'{online}\n')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_get_cpu_info(self):
+        cpu_info = sysfs_backend.get_cpu_info(self.root)
+        self.assertEqual(cpu_info['brand_raw'], 'Intel(R) Xeon(R) Gold 6148 CPU @ 2.40GHz')
+        self.assertEqual(cpu_info['vendor_id_raw'], 'GenuineIntel')
+        self.assertEqual(cpu_info['count'], 2)
+        self.assertEqual(cpu_info['l1_data_cache_size'], 32 * 1024)
+        self.assertEqual(cpu_info['l2_cache_size'], 1024 * 1024)
+        self.assertEqual(cpu_info['l3_cache_size'], 28160 * 1024)
+
+    def test_read_online_memory(self):
+        self.assertEqual(sysfs_backend.read_online_memory(self.root), 2 * 0x8000000)
+
+    def test_query_ram_banks_cache(self):
+        # no SMBIOS table -> no banks
+        self.assertEqual(sysfs_backend.query_ram_banks_cache(self.root), ([], []))
+        cache = bytearray(0x13 - 4)
+        cache[0] = 1
+        struct.pack_into('<H', cache, 0x07 - 4, 0x8000 | 440)
+        table = (_dmi_structure(17, 0x1100, _memory_device(16384, 1, 2, 3, 4, 2666), ['DIMM_A1', 'Samsung', '1234', 'M393A2K43BB1'])
+                 + _dmi_structure(17, 0x1101, _memory_device(0, 1, 0, 0, 0, 0), ['DIMM_A2'])
+                 + _dmi_structure(7, 0x700, bytes(cache), ['L3 Cache'])
+                 + _dmi_structure(127, 0xFFFF, b'', []))
+        _write(self.root, 'sys/firmware/dmi/tables/DMI', table)
+        ram_banks, ram_cache = sysfs_backend.query_ram_banks_cache(self.root)
+        self.assertEqual(ram_banks[0], RamBankRecord(product='M393A2K43BB1', vendor='Samsung', serial='1234', description='DIMM DDR4',
+                                                     slot='DIMM_A1', clock=2666000000, memory=16 * 1024 ** 3))
+        self.assertEqual(ram_banks[1].description, '[empty]')
+        self.assertEqual(ram_banks[1].slot, 'DIMM_A2')
+        self.assertIsNone(ram_banks[1].memory)
+        self.assertEqual(ram_cache, [RamCacheRecord(slot='L3 Cache', physid='700', capacity=440 * 64 * 1024)])
@@ -0,0 +1,60 @@
+"""Tests for timing module."""
+
+import json
+import pathlib
+import sys
+import tempfile
+import unittest
+
+from system_intelligence import timing
+from system_intelligence.query import query_and_export
+from system_intelligence.util.thread_util import run_with_deadlines
+
+
+class Tests(unittest.TestCase):
+
+    def setUp(self):
+        timing.start_recording()
+        self.addCleanup(timing.stop_recording)
+
+    def test_nested_spans(self):
+        with timing.span('scope', 'outer') as outer:
+            with timing.span('subprocess', 'inner', command='inner --version') as inner:
+                inner.attributes['returncode'] = 0
+            run_with_deadlines({'probe': lambda: timing.check_output([sys.executable, '--version'])})
+        with self.assertRaises(ZeroDivisionError), timing.span('export', 'failing'):
+            1 / 0
+        spans = {span.name: span for span in timing.stop_recording()}
+        self.assertEqual(list(spans), ['inner', sys.executable, 'outer', 'failing'])
+        self.assertEqual(spans['inner'].parent, outer.id)
+        self.assertEqual(spans['inner'].attributes, {'command': 'inner --version', 'returncode': 0})
+        # spans of worker threads are nested below the span of the thread which started them
+        self.assertEqual(spans[sys.executable].parent, outer.id)
+        self.assertEqual(spans[sys.executable].attributes['returncode'], 0)
+        self.assertGreaterEqual(spans['outer'].wall, spans['inner'].wall)
+        self.assertIsNone(spans['failing'].parent)
+        self.assertEqual(spans['failing'].error, 'ZeroDivisionError')
+
+    def test_hooks(self):
+        finished = []
+
+        def failing_hook(span):
+            raise RuntimeError('unavailable')
+
+        for hook in (finished.append, failing_hook):
+            timing.add_hook(hook)
+            self.addCleanup(timing.remove_hook, hook)
+        with timing.span('scope', 'os'):
+            pass
+        self.assertEqual([span.name for span in finished], ['os'])
+        self.assertIs(timing.load_hook('json:dumps'), json.dumps)
+        with self.assertRaises(ValueError):
+            timing.load_hook('json.dumps')
+
+    def test_timings_export(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = pathlib.Path(directory, 'result.json')
+            query_and_export({'os', 'host'}, verbose=False, export_format='json', generate_html_table=False, output=output, timings=True)
+            info = json.loads(output.read_text())
+        self.assertEqual([(span['kind'], span['name']) for span in info['timings']], [('scope', 'host'), ('scope', 'os')])
+        self.assertEqual(info['timings'][0]['attributes'], {'cached': False})
@@ -0,0 +1,97 @@
+"""Tests for topology_info module."""
+
+import json
+import os
+import tempfile
+import unittest
+
+from system_intelligence import topology_info
+from system_intelligence.records import CoreRecord, CpuCacheRecord, DeviceLocalityRecord, from_builtin, to_builtin
+from system_intelligence.topology_info import TopologyInfo
+
+
+def _write(root: str, path: str, content: str) -> None:
+    path = os.path.join(root, path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as sysfs_file:
+        sysfs_file.write(content + '\n')
+
+
+def _create_sysfs(root: str) -> None:
+    """
+    Two packages with two cores with two threads each (CPUs n and n + 4 are siblings), one NUMA node per package
+    and a NIC attached to the second node.
+    """
+    _write(root, 'sys/devices/system/cpu/online', '0-7')
+    _write(root, 'sys/devices/system/cpu/smt/active', '1')
+    for cpu in range(8):
+        core = cpu % 4
+        package = core // 2
+        siblings = f'{core},{core + 4}'
+        package_cpus = f'{2 * package}-{2 * package + 1},{2 * package + 4}-{2 * package + 5}'
+        _write(root, f'sys/devices/system/cpu/cpu{cpu}/topology/physical_package_id', str(package))
+        _write(root, f'sys/devices/system/cpu/cpu{cpu}/topology/core_id', str(core % 2))
+        for index, (level, cache_type, size, shared) in enumerate([(1, 'Data', '32K', siblings), (1, 'Instruction', '32K', siblings),
+                                                                   (2, 'Unified', '1024K', siblings),
+                                                                   (3, 'Unified', '28160K', package_cpus)]):
+            cache = f'sys/devices/system/cpu/cpu{cpu}/cache/index{index}'
+            _write(root, f'{cache}/level', str(level))
+            _write(root, f'{cache}/type', cache_type)
+            _write(root, f'{cache}/size', size)
+            _write(root, f'{cache}/shared_cpu_list', shared)
+    for node, distances in enumerate(['10 21', '21 10']):
+        _write(root, f'sys/devices/system/node/node{node}/cpulist', f'{2 * node}-{2 * node + 1},{2 * node + 4}-{2 * node + 5}')
+        _write(root, f'sys/devices/system/node/node{node}/distance', distances)
+        _write(root, f'sys/devices/system/node/node{node}/meminfo', f'Node {node} MemTotal:       16777216 kB\nNode {node} MemFree:        1024 kB')
+    pci = os.path.join(root, 'sys/devices/pci0000:80/0000:80:02.0/0000:81:00.0')
+    _write(root, os.path.join(pci, 'numa_node'), '1')
+    _write(root, os.path.join(pci, 'local_cpulist'), '2-3,6-7')
+    _write(root, os.path.join(pci, 'class'), '0x020000')
+    _write(root, 'sys/devices/pci0000:80/0000:80:02.0/class', '0x060400')
+    os.makedirs(os.path.join(pci, 'net', 'ens1f0'))
+    os.makedirs(os.path.join(root, 'sys/class/net/ens1f0'))
+    os.symlink(pci, os.path.join(root, 'sys/class/net/ens1f0/device'))
+    os.makedirs(os.path.join(root, 'sys/bus/pci/devices'))
+    os.symlink(os.path.dirname(pci), os.path.join(root, 'sys/bus/pci/devices/0000:80:02.0'))
+    os.symlink(pci, os.path.join(root, 'sys/bus/pci/devices/0000:81:00.0'))
+
+
+class Tests(unittest.TestCase):
+
+    def test_cpu_list(self):
+        self.assertEqual(topology_info.parse_cpu_list('0-3,8,10-11\n'), (0, 1, 2, 3, 8, 10, 11))
+        self.assertEqual(topology_info.parse_cpu_list(''), ())
+        self.assertEqual(topology_info.format_cpu_list([11, 0, 1, 2, 3, 8, 10]), '0-3,8,10-11')
+
+    def test_pci_locality_behind_vmd(self):
+        with tempfile.TemporaryDirectory() as root:
+            # Intel VMD exposes the NVMe drives behind it in PCI domains with 5 hex digits
+            pci = os.path.join(root, 'sys/devices/pci0000:00/0000:00:0e.0/pci10000:00/10000:00:02.0/10000:01:00.0')
+            _write(root, os.path.join(pci, 'numa_node'), '0')
+            _write(root, os.path.join(pci, 'local_cpulist'), '0-3')
+            _write(root, os.path.join(pci, 'class'), '0x010802')
+            os.makedirs(os.path.join(pci, 'nvme', 'nvme0'))
+            locality = topology_info._pci_locality('block', 'nvme0n1', os.path.join(pci, 'nvme', 'nvme0'))
+        self.assertEqual(locality, DeviceLocalityRecord(kind='block', name='nvme0n1', pci_address='10000:01:00.0', pci_class='0x010802',
+                                                        numa_node=0, cpus=(0, 1, 2, 3)))
+
+    def test_query_topology(self):
+        querier = TopologyInfo()
+        if querier.OS != 'linux':
+            self.skipTest('The topology is only read from sysfs on Linux')
+        with tempfile.TemporaryDirectory() as root:
+            _create_sysfs(root)
+            topology = querier.query_topology(root=root)
+        self.assertTrue(topology.smt)
+        self.assertEqual(topology.online, tuple(range(8)))
+        self.assertEqual([package.cpus for package in topology.packages], [(0, 1, 4, 5), (2, 3, 6, 7)])
+        self.assertEqual(topology.packages[1].cores, (CoreRecord(id=0, cpus=(2, 6)), CoreRecord(id=1, cpus=(3, 7))))
+        caches = topology.packages[0].caches
+        # every cache is listed once, with all CPUs sharing it
+        self.assertEqual(len(caches), 7)
+        self.assertEqual(caches[-1], CpuCacheRecord(level=3, type='Unified', size=28160 * 1024, cpus=(0, 1, 4, 5)))
+        self.assertEqual([(node.cpus, node.memory, node.distances) for node in topology.nodes],
+                         [((0, 1, 4, 5), 2 ** 34, (10, 21)), ((2, 3, 6, 7), 2 ** 34, (21, 10))])
+        nic = DeviceLocalityRecord(kind='net', name='ens1f0', pci_address='0000:81:00.0', pci_class='0x020000', numa_node=1, cpus=(2, 3, 6, 7))
+        self.assertEqual(topology.devices, (nic, nic._replace(kind='pci', name='0000:81:00.0')))
+        self.assertEqual(from_builtin('topology', json.loads(json.dumps(to_builtin(topology)))), topology)
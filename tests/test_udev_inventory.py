@@ -0,0 +1,60 @@
+"""Tests for udev_inventory module."""
+
+import unittest
+
+from system_intelligence import udev_inventory
+from system_intelligence.records import DiskRecord
+
+
+class Attributes(dict):
+
+    def asstring(self, name):
+        return self[name]
+
+    def asint(self, name):
+        return int(self[name])
+
+
+class Device:
+
+    def __init__(self, node, path, size, model=None, action=None):
+        self.device_node = node
+        self.device_path = path
+        self.action = action
+        self.attributes = Attributes(size=str(size))
+        parent = Attributes(model=model) if model else Attributes()
+        self.ancestors = [type('Parent', (), {'attributes': parent})()]
+
+
+class Context:
+
+    def __init__(self, devices):
+        self.devices = devices
+        self.listed = 0
+
+    def list_devices(self, subsystem, DEVTYPE):
+        self.listed += 1
+        return list(self.devices)
+
+
+class Tests(unittest.TestCase):
+
+    def test_events(self):
+        context = Context([Device('/dev/sda', '/devices/pci0000:00/host0/block/sda', 2048, 'SAMSUNG MZ7L3'),
+                           Device('/dev/loop0', '/devices/virtual/block/loop0', 128)])
+        inventory = udev_inventory.DiskInventory(context)
+        inventory.refresh()
+        self.assertEqual(dict(inventory.devices), {'/dev/sda': DiskRecord(size=2048 * 512, model='SAMSUNG MZ7L3')})
+        devices = inventory.devices
+        inventory.handle_event(Device('/dev/sdb', '/devices/pci0000:00/host1/block/sdb', 4096, 'ST16000NM001G', action='add'))
+        inventory.handle_event(Device('/dev/sda', '/devices/pci0000:00/host0/block/sda', 8192, 'SAMSUNG MZ7L3', action='change'))
+        inventory.handle_event(Device('/dev/loop1', '/devices/virtual/block/loop1', 128, action='add'))
+        self.assertEqual(dict(inventory.devices), {'/dev/sda': DiskRecord(size=8192 * 512, model='SAMSUNG MZ7L3'),
+                                                   '/dev/sdb': DiskRecord(size=4096 * 512, model='ST16000NM001G')})
+        # mappings handed out earlier are not changed by later events
+        self.assertEqual(list(devices), ['/dev/sda'])
+        inventory.handle_event(Device('/dev/sda', '/devices/pci0000:00/host0/block/sda', 0, action='remove'))
+        self.assertEqual(list(inventory.devices), ['/dev/sdb'])
+        self.assertEqual(context.listed, 1)
+        with self.assertRaises(TypeError):
+            inventory.devices['/dev/sdc'] = DiskRecord()
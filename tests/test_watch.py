@@ -0,0 +1,38 @@
+"""Tests for watch module."""
+
+import json
+import math
+import os
+import tempfile
+import unittest
+
+from system_intelligence.watch import MetricSampler, RingBuffer, watch
+
+
+class Tests(unittest.TestCase):
+
+    def test_ring_buffer(self):
+        buffer = RingBuffer(3)
+        for i in range(5):
+            buffer.append(i, {'a': i})
+        buffer.append(5, {'a': 5, 'b': 1.5})
+        self.assertEqual(buffer.column('a'), [3, 4, 5])
+        self.assertEqual(buffer.column('b'), [1.5])
+        self.assertEqual(buffer.summary()['a'], (5, 3, 5, 4))
+        self.assertTrue(math.isnan(RingBuffer(1).times[0]))
+
+    def test_overhead_bounded(self):
+        sampler = MetricSampler(['cpu', 'ram'], interval=0.001, max_overhead=0.01)
+        sampler.run(count=3)
+        self.assertEqual(sampler.samples, 3)
+        self.assertGreaterEqual(sampler.effective_interval, sampler.interval)
+        self.assertLessEqual(sampler.overhead, 0.01 + 1e-9)
+
+    def test_ndjson(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'metrics.ndjson')
+            watch(['swap', 'network'], interval=0, count=2, ndjson=path, live=False)
+            with open(path) as ndjson_file:
+                samples = [json.loads(line) for line in ndjson_file]
+        self.assertEqual(len(samples), 2)
+        self.assertIn('swap.used', samples[0]['metrics'])